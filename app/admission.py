@@ -0,0 +1,191 @@
+# app/admission.py
+import asyncio
+import math
+import threading
+from collections import deque
+from concurrent import futures
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from . import config
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request is shed; answer 503 with Retry-After
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share the result of the first one.
+
+    The first caller (the leader) runs the work; callers arriving while it
+    runs wait for its result or exception instead of doing the work again.
+    The key is forgotten as soon as the leader finishes, so nothing is cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, Future] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def _join(self, key) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def _finish(self, key, future: Future, result=None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            del self._flights[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def run(self, key, work: Callable[[], Any]) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = work()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def run_async(self, key, work: Callable[[], Awaitable[Any]]) -> Any:
+        future, leader = self._join(key)
+        if not leader:
+            # Shielded: a disconnecting follower must not cancel the leader's result
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await work()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+
+class AdmissionQueue:
+    """
+    At most `concurrency` requests run at once; up to `queue_size` more wait
+    for a slot, each until its deadline `timeout` seconds after arrival.
+
+    A request arriving at a full queue, or still waiting at its deadline, is
+    shed with Overloaded instead of piling up in the threadpool. Slots are
+    handed to waiters in arrival order. concurrency <= 0 admits everything.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, timeout: float):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._waiters: Deque[Future] = deque()
+        self.active = 0
+        self.shed = {"queue_full": 0, "deadline": 0}
+
+    @property
+    def depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    def _enter(self) -> Optional[Future]:
+        """
+        None when admitted right away, else the future a slot is handed over with
+        """
+        with self._lock:
+            if self.active < self.concurrency and not self._waiters:
+                self.active += 1
+                return None
+            if len(self._waiters) >= self.queue_size:
+                self.shed["queue_full"] += 1
+                raise Overloaded("queue full", self.retry_after)
+            waiter = Future()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter: Future) -> bool:
+        """
+        Stop waiting; True if the slot was handed over meanwhile
+        """
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return False
+        return waiter.done() and not waiter.cancelled()
+
+    def _shed_late(self) -> Overloaded:
+        with self._lock:
+            self.shed["deadline"] += 1
+        return Overloaded("queue deadline", self.retry_after)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                # The slot passes to the waiter, active stays the same
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self.active -= 1
+
+    @contextmanager
+    def slot(self):
+        if self.concurrency <= 0:
+            yield
+            return
+        waiter = self._enter()
+        if waiter is not None:
+            try:
+                waiter.result(self.timeout)
+            except futures.TimeoutError:
+                if not self._abandon(waiter):
+                    raise self._shed_late()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        if self.concurrency <= 0:
+            yield
+            return
+        waiter = self._enter()
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(waiter)), self.timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(waiter):
+                    raise self._shed_late()
+            except asyncio.CancelledError:
+                if self._abandon(waiter):
+                    self.release()
+                raise
+        try:
+            yield
+        finally:
+            self.release()
+
+
+single_flight = SingleFlight()
+admission = AdmissionQueue(config.ADMISSION_CONCURRENCY, config.ADMISSION_QUEUE_SIZE, config.ADMISSION_QUEUE_TIMEOUT)
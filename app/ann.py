@@ -0,0 +1,292 @@
+# app/ann.py
+import hashlib
+import os
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from . import config
+from .catalog import CatalogSnapshot
+from .ranking import top_k
+from .scoring import calculate_description_similarity_mock
+from .similarity import DescriptionIndex, tokenize
+
+# Universal hashing of 32-bit token hashes modulo a Mersenne prime
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Signatures are computed for this many records at a time
+SIGNATURE_CHUNK = 2048
+
+
+def token_hash(token: str) -> int:
+    """
+    Stable 32-bit hash of a token (Python's hash() is salted per process)
+    """
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHashLSH:
+    """
+    Approximate nearest-neighbour index over internship descriptions for the
+    Jaccard similarity of calculate_description_similarity_mock.
+
+    Each description's word set gets a MinHash signature of ``bands * rows``
+    values; every band of ``rows`` values is hashed into a bucket key. Two
+    descriptions with Jaccard similarity J share at least one bucket with
+    probability 1 - (1 - J^rows)^bands, so a query only looks at the
+    internships in its own buckets, which are then rescored exactly.
+
+    Bucket keys are kept per band in sorted arrays (binary search) plus small
+    dicts for records appended since the last merge. Like InvertedIndex,
+    ``extend`` patches the index in place and readers pass their snapshot size.
+    """
+
+    def __init__(self, bands: int = 64, rows: int = 3, seed: int = 1):
+        self.bands, self.rows, self.seed = bands, rows, seed
+        rng = np.random.RandomState(seed)
+        # a * hash + b stays below 2^64 for 32-bit token hashes
+        self._a = rng.randint(1, 1 << 32, size=bands * rows, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=bands * rows, dtype=np.uint64)
+        self._mix = rng.randint(1, 1 << 62, size=rows, dtype=np.uint64) | np.uint64(1)
+        self.ids = np.zeros(0, dtype=np.int64)
+        # Bucket key of every record in every band; empty descriptions are in no bucket
+        self.keys = np.zeros((0, bands), dtype=np.uint32)
+        self.empty = np.zeros(0, dtype=bool)
+        # (merged record count, per-band (sorted keys, positions), per-band key -> positions)
+        self._tables: Tuple[int, List, List[Dict[int, List[int]]]] = (0, [], [{} for _ in range(bands)])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, records: Sequence) -> "MinHashLSH":
+        """
+        Load the index saved at ANN_INDEX_PATH when it covers a prefix of the
+        records (new ones are added), else build it from scratch
+        """
+        path = config.ANN_INDEX_PATH
+        if path and os.path.exists(path):
+            index = cls.load(path)
+            saved = len(index)
+            if (
+                (index.bands, index.rows) == (config.ANN_BANDS, config.ANN_ROWS)
+                and saved <= len(records)
+                and np.array_equal(index.ids, [record.id for record in records[:saved]])
+            ):
+                return index.extend(records, saved)
+        index = cls(config.ANN_BANDS, config.ANN_ROWS)
+        return index.extend(records, 0)
+
+    def extend(self, records: Sequence, start: int) -> "MinHashLSH":
+        if start != len(self):
+            raise ValueError(f"Index has {len(self)} records, cannot append at {start}")
+        chunks = [
+            self._bucket_keys([record.description for record in records[i:i + SIGNATURE_CHUNK]])
+            for i in range(start, len(records), SIGNATURE_CHUNK)
+        ]
+        if not chunks:
+            return self
+        # Arrays are replaced, never resized, so readers of an older size stay valid
+        self.keys = np.concatenate([self.keys] + [keys for keys, _ in chunks])
+        self.empty = np.concatenate([self.empty] + [empty for _, empty in chunks])
+        self.ids = np.concatenate([self.ids, np.array([record.id for record in records[start:]], dtype=np.int64)])
+
+        merged, _, delta = self._tables
+        if len(self) - merged > max(1024, merged // 10):
+            self._merge()
+        else:
+            for position in (start + np.flatnonzero(~self.empty[start:])).tolist():
+                for band, key in enumerate(self.keys[position].tolist()):
+                    delta[band].setdefault(key, []).append(position)
+        return self
+
+    def _signatures(self, token_sets: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        MinHash signatures (one row per non-empty set) and the empty-set mask
+        """
+        empty = np.array([not tokens for tokens in token_sets], dtype=bool)
+        sets = [tokens for tokens in token_sets if tokens]
+        if not sets:
+            return np.zeros((0, self.bands * self.rows), dtype=np.uint64), empty
+        hashes = np.fromiter((value for tokens in sets for value in tokens), dtype=np.uint64)
+        starts = np.cumsum([0] + [len(tokens) for tokens in sets[:-1]])
+        # All permutations of all tokens at once (uint64 products wrap), then the
+        # minimum per set and permutation
+        permuted = ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME) & MAX_HASH
+        return np.minimum.reduceat(permuted, starts, axis=1).T, empty
+
+    def _bucket_keys(self, descriptions: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        token_sets = [[token_hash(token) for token in tokenize(description)] for description in descriptions]
+        signatures, empty = self._signatures(token_sets)
+        keys = np.zeros((len(descriptions), self.bands), dtype=np.uint32)
+        if len(signatures):
+            bands = signatures.reshape(len(signatures), self.bands, self.rows)
+            mixed = (bands * self._mix).sum(axis=2)
+            keys[~empty] = (mixed >> np.uint64(32)).astype(np.uint32)
+        return keys, empty
+
+    def _merge(self) -> None:
+        """
+        Rebuild the sorted per-band tables over all records
+        """
+        positions = np.flatnonzero(~self.empty)
+        sorted_tables = []
+        for band in range(self.bands):
+            band_keys = self.keys[positions, band]
+            order = np.argsort(band_keys, kind="stable")
+            sorted_tables.append((band_keys[order], positions[order]))
+        self._tables = (len(self), sorted_tables, [{} for _ in range(self.bands)])
+
+    def candidates(self, description: str, size: int) -> np.ndarray:
+        """
+        Sorted positions (< size) sharing at least one bucket with the description
+        """
+        keys, empty = self._bucket_keys([description])
+        if empty[0]:
+            return np.zeros(0, dtype=np.int64)
+        merged, sorted_tables, delta = self._tables
+        found = []
+        for band, key in enumerate(keys[0].tolist()):
+            if sorted_tables:
+                band_keys, band_positions = sorted_tables[band]
+                lo, hi = np.searchsorted(band_keys, key, "left"), np.searchsorted(band_keys, key, "right")
+                found.append(band_positions[lo:hi])
+            found.append(np.asarray(delta[band].get(key, ()), dtype=np.int64))
+        positions = np.unique(np.concatenate(found))
+        return positions[positions < size]
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to `path` (.npz), replacing any previous file atomically
+        """
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, params=np.array([self.bands, self.rows, self.seed]), ids=self.ids, keys=self.keys, empty=self.empty)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MinHashLSH":
+        with np.load(path) as data:
+            bands, rows, seed = (int(value) for value in data["params"])
+            index = cls(bands, rows, seed)
+            index.ids, index.keys, index.empty = data["ids"], data["keys"], data["empty"]
+        index._merge()
+        return index
+
+
+def search(snapshot: CatalogSnapshot, description: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate top k positions by description similarity (out of 40, like
+    calculate_description_similarity_mock) and their exact scores. Only the
+    internships sharing an LSH bucket with the description are scored.
+    """
+    positions = snapshot.derived(MinHashLSH).candidates(description, len(snapshot))
+    scores = snapshot.derived(DescriptionIndex).jaccard_at(tokenize(description), positions) * 40
+    above_zero = scores > 0
+    return top_k(positions[above_zero], scores[above_zero], k)
+
+
+def _sample_queries(snapshot: CatalogSnapshot, count: int, seed: int) -> List[str]:
+    """
+    Student-like descriptions: part of the words of one internship
+    description mixed with a few words of another
+    """
+    rng = random.Random(f"ann-queries:{seed}")
+    queries = []
+    for _ in range(count):
+        words = snapshot.records[rng.randrange(len(snapshot))].description.split()
+        other = snapshot.records[rng.randrange(len(snapshot))].description.split()
+        kept = [word for word in words if rng.random() < 0.6]
+        kept += rng.sample(other, min(2, len(other)))
+        rng.shuffle(kept)
+        queries.append(" ".join(kept))
+    return queries
+
+
+def evaluate(snapshot: CatalogSnapshot, queries: int = 100, k: int = 10, seed: int = 0, exact: str = "index") -> Dict:
+    """
+    Recall@k of ``search`` against the exact ranking for sampled queries.
+
+    A returned internship counts as a hit when its exact score reaches the
+    k-th best exact score, so ties at the boundary are not penalized. The
+    exact ranking comes from DescriptionIndex ("index", same values) or from
+    calling calculate_description_similarity_mock on every internship ("mock").
+    """
+    if not len(snapshot):
+        raise ValueError("The catalog is empty")
+    t0 = time.perf_counter()
+    index = snapshot.derived(MinHashLSH)
+    build_seconds = time.perf_counter() - t0
+    description_index = snapshot.derived(DescriptionIndex)
+    all_positions = np.arange(len(snapshot))
+
+    hits = relevant = candidates = 0
+    ann_seconds = exact_seconds = 0.0
+    for query in _sample_queries(snapshot, queries, seed):
+        t0 = time.perf_counter()
+        if exact == "mock":
+            exact_scores = np.array([
+                calculate_description_similarity_mock(record.description, query) for record in snapshot.records
+            ], dtype=np.float64)
+        else:
+            exact_scores = description_index.scores(query, mode="jaccard")
+        above_zero = exact_scores > 0
+        _, best = top_k(all_positions[above_zero], exact_scores[above_zero], k)
+        exact_seconds += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        positions, _ = search(snapshot, query, k)
+        ann_seconds += time.perf_counter() - t0
+        candidates += len(index.candidates(query, len(snapshot)))
+
+        if len(best):
+            relevant += len(best)
+            hits += int(np.count_nonzero(exact_scores[positions] >= best[-1]))
+    return {
+        "internships": len(snapshot),
+        "queries": queries,
+        "k": k,
+        "bands": index.bands,
+        "rows": index.rows,
+        "exact": exact,
+        "recall_at_k": round(hits / relevant, 4) if relevant else None,
+        "mean_candidates": round(candidates / queries, 1) if queries else 0.0,
+        "candidate_fraction": round(candidates / queries / len(snapshot), 4) if queries else 0.0,
+        "index_build_seconds": round(build_seconds, 3),
+        "mean_ann_ms": round(ann_seconds / queries * 1000, 3) if queries else 0.0,
+        "mean_exact_ms": round(exact_seconds / queries * 1000, 3) if queries else 0.0,
+    }
+
+
+def main(argv=None) -> None:
+    import argparse
+    import json
+    from .catalog import catalog
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.ann", description="Description ANN index over the catalog database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the index and save it")
+    build.add_argument("--output", default=config.ANN_INDEX_PATH, help="index file (default: ANN_INDEX_PATH)")
+    evaluation = commands.add_parser("evaluate", help="measure recall@k against the exact similarity ranking")
+    evaluation.add_argument("--queries", type=int, default=100)
+    evaluation.add_argument("-k", type=int, default=10)
+    evaluation.add_argument("--seed", type=int, default=0)
+    evaluation.add_argument("--exact", choices=["index", "mock"], default="index")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        snapshot = catalog.snapshot(db)
+    if args.command == "build":
+        if not args.output:
+            parser.error("--output or ANN_INDEX_PATH is required")
+        # Built from scratch, not from the file being replaced
+        index = MinHashLSH(config.ANN_BANDS, config.ANN_ROWS).extend(snapshot.records, 0)
+        index.save(args.output)
+        print(json.dumps({"path": args.output, "internships": len(index)}))
+    else:
+        print(json.dumps(evaluate(snapshot, args.queries, args.k, args.seed, args.exact), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
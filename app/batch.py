@@ -0,0 +1,110 @@
+# app/batch.py
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from pydantic import ValidationError
+from . import config, schemas
+from .catalog import CatalogSnapshot
+from .recommender import recommend
+
+# Snapshot held by each process pool worker
+_worker_snapshot: Optional[CatalogSnapshot] = None
+
+
+def _init_worker(version: int, records: Tuple) -> None:
+    global _worker_snapshot
+    _worker_snapshot = CatalogSnapshot(version, records)
+    # Profiles are already spread over the pool, don't start shard workers per process
+    config.SHARD_COUNT = 0
+
+
+def _recommend_item(snapshot: CatalogSnapshot, k: int, item: Tuple[int, Any]) -> Dict:
+    """
+    Recommendations for one profile; failures are reported inline
+    """
+    index, payload = item
+    try:
+        student_form = payload if isinstance(payload, schemas.StudentForm) else schemas.StudentForm.model_validate(payload)
+        return {"index": index, "recommendations": recommend(snapshot, student_form, k).recommendations}
+    except ValidationError as e:
+        return {"index": index, "error": str(e)}
+    except Exception as e:
+        return {"index": index, "error": f"{type(e).__name__}: {e}"}
+
+
+def _recommend_in_worker(k: int, item: Tuple[int, Any]) -> Dict:
+    return _recommend_item(_worker_snapshot, k, item)
+
+
+class BatchExecutor:
+    """
+    Persistent worker pool for batch recommendations.
+
+    Thread workers share the caller's snapshot. Process workers receive a copy
+    of the catalog once, when the pool is started, so the pool is replaced
+    whenever the catalog version changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+        self._key = None
+
+    def _pool_for(self, snapshot: CatalogSnapshot, kind: str, workers: int) -> Executor:
+        key = (kind, workers, snapshot.version if kind == "process" else None)
+        with self._lock:
+            if self._pool is None or self._key != key:
+                if self._pool is not None:
+                    # Work already submitted to the old pool still completes
+                    self._pool.shutdown(wait=False)
+                if kind == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(snapshot.version, snapshot.records),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+                self._key = key
+            return self._pool
+
+    def run(
+        self,
+        snapshot: CatalogSnapshot,
+        student_forms: Iterable,
+        k: int = 5,
+        kind: Optional[str] = None,
+        workers: Optional[int] = None
+    ) -> Iterator[Dict]:
+        kind = kind or config.BATCH_EXECUTOR
+        workers = workers or config.BATCH_WORKERS
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown batch executor: {kind}")
+
+        items = list(enumerate(student_forms))
+        if workers <= 1 or len(items) <= 1:
+            return (_recommend_item(snapshot, k, item) for item in items)
+
+        pool = self._pool_for(snapshot, kind, workers)
+        if kind == "process":
+            function = partial(_recommend_in_worker, k)
+            chunksize = max(1, len(items) // (workers * 4))
+        else:
+            function = partial(_recommend_item, snapshot, k)
+            chunksize = 1
+        # map() yields results in input order
+        return pool.map(function, items, chunksize=chunksize)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
+            self._key = None
+
+
+# Shared by all batch requests in this process
+batch_executor = BatchExecutor()
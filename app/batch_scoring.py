@@ -0,0 +1,143 @@
+# app/batch_scoring.py
+from typing import Dict, Optional, Sequence
+import numpy as np
+from . import scoring
+
+
+def _normalized_skills(skills) -> set:
+    return set(skill.strip().lower() for skill in skills)
+
+
+def _code(vocabulary: Dict[str, int], value: str) -> int:
+    code = vocabulary.get(value)
+    if code is None:
+        code = vocabulary[value] = len(vocabulary)
+    return code
+
+
+class BatchScorer:
+    """
+    Catalog encoded as arrays so rule-based scores for every internship are
+    computed with a few NumPy operations instead of a Python loop.
+
+    - skills: sparse row matrix (CSR) of skill ids, one row per internship
+    - sector / location: integer codes of the lowercased values
+    - remote: location is "Remote"
+    - education: required level from EDUCATION_HIERARCHY
+
+    Vocabularies only grow, so ``extend`` shares them with the previous
+    snapshot and returns new arrays. ``skill_count`` is the size of the skill
+    vocabulary this scorer was encoded with; later snapshots may add more.
+    """
+
+    def __init__(self):
+        self.skill_ids: Dict[str, int] = {}
+        self.skill_count = 0
+        self.sector_ids: Dict[str, int] = {}
+        self.location_ids: Dict[str, int] = {}
+        self.skill_indices = np.zeros(0, dtype=np.int32)
+        self.skill_rows = np.zeros(0, dtype=np.int32)
+        self.skill_counts = np.zeros(0, dtype=np.int32)
+        self.sectors = np.zeros(0, dtype=np.int32)
+        self.locations = np.zeros(0, dtype=np.int32)
+        self.remote = np.zeros(0, dtype=bool)
+        self.education = np.zeros(0, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.sectors)
+
+    @classmethod
+    def build(cls, records: Sequence) -> "BatchScorer":
+        return cls()._appended(records, 0)
+
+    def extend(self, records: Sequence, start: int) -> "BatchScorer":
+        scorer = BatchScorer()
+        scorer.skill_ids = self.skill_ids
+        scorer.sector_ids = self.sector_ids
+        scorer.location_ids = self.location_ids
+        return scorer._appended(records, start, base=self)
+
+    def _appended(self, records: Sequence, start: int, base: Optional["BatchScorer"] = None) -> "BatchScorer":
+        skill_indices, skill_rows, skill_counts = [], [], []
+        sectors, locations, remote, education = [], [], [], []
+        for position in range(start, len(records)):
+            internship = records[position]
+            skills = _normalized_skills(internship.skills.split(','))
+            skill_indices.extend(_code(self.skill_ids, skill) for skill in skills)
+            skill_rows.extend([position] * len(skills))
+            skill_counts.append(len(skills))
+            sectors.append(_code(self.sector_ids, internship.sector.lower()))
+            location = internship.location.lower()
+            locations.append(_code(self.location_ids, location))
+            remote.append(location == "remote")
+            education.append(scoring.EDUCATION_HIERARCHY.get(internship.min_education, 0))
+
+        def concat(name, values, dtype):
+            array = np.asarray(values, dtype=dtype)
+            return np.concatenate([getattr(base, name), array]) if base is not None else array
+
+        self.skill_count = len(self.skill_ids)
+        self.skill_indices = concat("skill_indices", skill_indices, np.int32)
+        self.skill_rows = concat("skill_rows", skill_rows, np.int32)
+        self.skill_counts = concat("skill_counts", skill_counts, np.int32)
+        self.sectors = concat("sectors", sectors, np.int32)
+        self.locations = concat("locations", locations, np.int32)
+        self.remote = concat("remote", remote, bool)
+        self.education = concat("education", education, np.int8)
+        return self
+
+    def skill_match_ratios(self, student_skills: Sequence[str]) -> np.ndarray:
+        """
+        Share of each internship's skills the student has
+        """
+        mask = np.zeros(self.skill_count, dtype=np.float64)
+        for skill in _normalized_skills(student_skills):
+            skill_id = self.skill_ids.get(skill)
+            # Skills added by later snapshots are unknown to this one
+            if skill_id is not None and skill_id < self.skill_count:
+                mask[skill_id] = 1.0
+        matches = np.bincount(self.skill_rows, weights=mask[self.skill_indices], minlength=len(self))
+        return matches / np.maximum(self.skill_counts, 1)
+
+    def rule_scores(self, student_data: Dict, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Vectorized calculate_rule_based_score for all internships (or the given positions)
+        """
+        if student_data['skills']:
+            skill_match_ratio = self.skill_match_ratios(student_data['skills'])
+        else:
+            skill_match_ratio = np.zeros(len(self), dtype=np.float64)
+        sectors, locations, remote, education = self.sectors, self.locations, self.remote, self.education
+        if positions is not None:
+            skill_match_ratio = skill_match_ratio[positions]
+            sectors, locations = sectors[positions], locations[positions]
+            remote, education = remote[positions], education[positions]
+
+        sector_match = sectors == self.sector_ids.get(student_data['sector'].lower(), -1)
+        location_match = locations == self.location_ids.get(student_data['preferred_location'].lower(), -1)
+        student_edu_level = scoring.EDUCATION_HIERARCHY.get(student_data['education'], 0)
+
+        # Same order of operations as calculate_rule_based_score so results match exactly
+        score = skill_match_ratio * scoring.SKILL_MATCH_WEIGHT
+        score = score + np.where(sector_match, scoring.SECTOR_MATCH_WEIGHT, 0.0)
+        score = score + np.where(
+            location_match,
+            scoring.LOCATION_MATCH_WEIGHT,
+            np.where(remote, scoring.LOCATION_MATCH_WEIGHT * 0.5, 0.0),
+        )
+        education_met = student_edu_level >= education
+        score = score + np.where(
+            education_met,
+            scoring.EDUCATION_MATCH_WEIGHT,
+            np.where(student_edu_level == education - 1, scoring.EDUCATION_MATCH_WEIGHT * 0.5, 0.0),
+        )
+        perfect_match = (skill_match_ratio >= 0.8) & sector_match & location_match & education_met
+        score = score + np.where(perfect_match, scoring.PERFECT_MATCH_BONUS, 0.0)
+
+        max_possible_score = (
+            scoring.SKILL_MATCH_WEIGHT + scoring.SECTOR_MATCH_WEIGHT + scoring.LOCATION_MATCH_WEIGHT
+            + scoring.EDUCATION_MATCH_WEIGHT + scoring.PERFECT_MATCH_BONUS
+        )
+        if max_possible_score <= 0:
+            return np.zeros(len(score), dtype=np.float64)
+        return (score / max_possible_score) * 60
@@ -0,0 +1,189 @@
+# app/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from . import config, schemas
+from .ranking import Cursor
+from .recommender import RecommendationPage
+from .scoring import EDUCATION_HIERARCHY
+from .similarity import tokenize
+
+
+def canonical_form_key(student_form: schemas.StudentForm, k: int = 5, cursor: Optional[Cursor] = None) -> str:
+    """
+    Cache key for a student form: two forms with the same key get the same recommendations.
+    The cursor's version is left out so every worker computes the same key.
+    """
+    tokens = tokenize(student_form.description)
+    mode = config.DESCRIPTION_SIMILARITY_MODE
+    # Jaccard only looks at the word set; tfidf/bm25 also use word counts
+    description = sorted(tokens) if mode == "jaccard" else sorted(tokens.items())
+    return json.dumps([
+        EDUCATION_HIERARCHY.get(student_form.education, 0),
+        sorted(set(skill.strip().lower() for skill in student_form.skills)),
+        student_form.sector.lower(),
+        student_form.preferred_location.lower(),
+        description,
+        mode,
+        config.RERANK_CANDIDATES,
+        config.RERANKER,
+        config.RERANK_ANN_CANDIDATES,
+        k,
+        None if cursor is None else [cursor.score, cursor.position],
+    ], separators=(",", ":"))
+
+
+class SharedCacheBackend:
+    """
+    Interface of a cache shared between worker processes (e.g. Redis)
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+
+class InMemorySharedBackend(SharedCacheBackend):
+    """
+    In-process stand-in for a shared backend, used in tests and single-process setups
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, tuple] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache of recommendation pages in front of scoring.
+
+    Entries belong to a catalog snapshot version; the first lookup or store at
+    a newer version drops everything cached for the old one, while pages of an
+    older version (slow requests still scoring a previous snapshot) are not
+    stored. An optional shared backend is consulted on local misses so workers
+    can reuse each other's results. Shared entries are keyed by a version every
+    worker agrees on (the catalog content digest) and their cursors are
+    re-issued at the local snapshot version.
+    """
+
+    def __init__(self, max_size: int, ttl: float, shared: Optional[SharedCacheBackend] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_version(self, version: int) -> bool:
+        """
+        Move forward to a newer version; False for a version older than the current one
+        """
+        if self._version is None or version > self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return version == self._version
+
+    def get(self, key: str, version: int, shared_version: Optional[str] = None) -> Optional[RecommendationPage]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is not None:
+                page, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return page
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.shared is not None:
+            value = self.shared.get(f"{shared_version or version}:{key}")
+            if value is not None:
+                page = RecommendationPage(**json.loads(value))
+                if page.next_cursor:
+                    page.next_cursor = Cursor.parse(page.next_cursor)._replace(version=version).encode()
+                with self._lock:
+                    self.shared_hits += 1
+                    self._store(key, version, page)
+                return page
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, version: int, page: RecommendationPage, shared_version: Optional[str] = None) -> None:
+        with self._lock:
+            self._store(key, version, page)
+        if self.shared is not None:
+            value = json.dumps({"recommendations": page.recommendations, "next_cursor": page.next_cursor})
+            self.shared.set(f"{shared_version or version}:{key}", value.encode(), self.ttl)
+
+    def _store(self, key: str, version: int, page: RecommendationPage) -> None:
+        if not self._check_version(version):
+            return
+        self._entries[key] = (page, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def _shared_backend() -> Optional[SharedCacheBackend]:
+    if config.RESULT_CACHE_BACKEND == "memory":
+        return InMemorySharedBackend()
+    if config.RESULT_CACHE_BACKEND:
+        raise ValueError(f"Unknown result cache backend: {config.RESULT_CACHE_BACKEND}")
+    return None
+
+
+# Shared by all requests in this process
+result_cache = ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_TTL, _shared_backend())
@@ -0,0 +1,351 @@
+# app/catalog.py
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import config, models
+from .facets import FacetCounts
+
+# Ancestor versions remembered by a snapshot (see CatalogSnapshot.lineage)
+LINEAGE_SIZE = 32
+
+
+class CatalogRecord(NamedTuple):
+    """
+    Compact read-only copy of an active internship row used for scoring
+    """
+    id: int
+    title: str
+    min_education: str
+    skills: str
+    sector: str
+    location: str
+    duration: str
+    no_of_posts: int
+    is_active: bool
+    description: str
+
+    @classmethod
+    def from_model(cls, internship: models.Internship) -> "CatalogRecord":
+        return cls(*(getattr(internship, field) for field in cls._fields))
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the active catalog at a given version.
+    Records are ordered by internship id.
+
+    Derived structures (indexes, encoded arrays, ...) are built lazily with
+    ``derived(Builder)`` and cached on the snapshot. A builder is a class with
+    a ``build(records)`` classmethod; if its instances also define
+    ``extend(records, start)`` they are carried over to the next snapshot when
+    internships are appended, instead of being rebuilt.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        records: Tuple[CatalogRecord, ...],
+        derived: Optional[Dict] = None,
+        lineage: Tuple[Tuple[int, int], ...] = ()
+    ):
+        self.version = version
+        self.records = records
+        # (version, length) of recent snapshots whose records are a prefix of these
+        self.lineage = lineage[-LINEAGE_SIZE:]
+        self._positions: Optional[Dict[int, int]] = None
+        self._derived: Dict = dict(derived or {})
+        self._derived_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def positions(self) -> Dict[int, int]:
+        """
+        Map of internship id -> position in records (built on first use)
+        """
+        if self._positions is None:
+            self._positions = {record.id: i for i, record in enumerate(self.records)}
+        return self._positions
+
+    def derived(self, builder):
+        """
+        Get the structure built by ``builder`` for this snapshot
+        """
+        structure = self._derived.get(builder)
+        if structure is None:
+            with self._derived_lock:
+                structure = self._derived.get(builder)
+                if structure is None:
+                    structure = builder.build(self.records)
+                    self._derived[builder] = structure
+        return structure
+
+    def appended(self, version: int, new_records: Tuple[CatalogRecord, ...]) -> "CatalogSnapshot":
+        """
+        Create the next snapshot with new_records appended, patching derived structures
+        """
+        records = self.records + new_records
+        start = len(self.records)
+        derived = {
+            builder: structure.extend(records, start)
+            for builder, structure in list(self._derived.items())
+            if hasattr(structure, "extend")
+        }
+        return CatalogSnapshot(version, records, derived, self.lineage + ((self.version, len(self)),))
+
+    def relabeled(self, version: int) -> "CatalogSnapshot":
+        """
+        The same records and derived structures under a new version
+        """
+        return CatalogSnapshot(version, self.records, self._derived, self.lineage + ((self.version, len(self)),))
+
+
+class ContentDigest:
+    """
+    Digest of the records, the same in every process holding the same catalog,
+    unlike versions and etags. Appending extends the digest, so it equals the
+    digest of the records loaded from scratch.
+    """
+
+    def __init__(self, hasher):
+        self._hasher = hasher
+        self.hexdigest = hasher.hexdigest()
+
+    @classmethod
+    def build(cls, records) -> "ContentDigest":
+        return cls(hashlib.blake2b(digest_size=16)).extend(records, 0)
+
+    def extend(self, records, start: int) -> "ContentDigest":
+        hasher = self._hasher.copy()
+        if start < len(records):
+            # One record per element, each followed by a comma, however the records were appended
+            hasher.update(json.dumps(records[start:], separators=(",", ":"))[1:-1].encode() + b",")
+        return ContentDigest(hasher)
+
+
+class IdFingerprint:
+    """
+    (count, max id, sum of ids) of the records, compared with the same
+    aggregates of the active rows to tell whether the database moved on
+    """
+
+    def __init__(self, count: int, last_id: int, id_sum: int):
+        self.value = (count, last_id, id_sum)
+
+    @classmethod
+    def build(cls, records) -> "IdFingerprint":
+        return cls(0, 0, 0).extend(records, 0)
+
+    def extend(self, records, start: int) -> "IdFingerprint":
+        id_sum = self.value[2] + sum(records[position].id for position in range(start, len(records)))
+        return IdFingerprint(len(records), records[-1].id if len(records) else 0, id_sum)
+
+
+class Catalog:
+    """
+    Process-level catalog of active internships.
+
+    The snapshot is loaded from the database once and then patched on writes,
+    so read paths only query the internships table for a cheap staleness check
+    every CATALOG_CHECK_INTERVAL seconds: rows other workers inserted are
+    patched in, other changes (deactivations) reload the snapshot. Every write
+    bumps ``version``; ``epoch`` tells versions of different processes apart.
+    Form option facets are maintained alongside the snapshot.
+
+    With a ``shared`` snapshot file (app/shared_catalog.py) versions come from
+    a counter shared by all worker processes, writes are published to the
+    file and reads switch to the newest published snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self.version = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self.facets = FacetCounts()
+        self.shared = None
+        self._checked_at = 0.0
+
+    def etag(self, version: Optional[int] = None) -> str:
+        return f'"{self.epoch}-{self.version if version is None else version}"'
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        The loaded snapshot, or None; never touches the database
+        """
+        return self._snapshot
+
+    @property
+    def size(self) -> int:
+        """
+        Number of records in the loaded snapshot (0 when not loaded)
+        """
+        snapshot = self._snapshot
+        return len(snapshot) if snapshot is not None else 0
+
+    def _next_version(self) -> None:
+        self.version = self.shared.next_version() if self.shared is not None else self.version + 1
+
+    def _adopt_published(self) -> None:
+        """
+        Switch to the shared snapshot file if it is newer than what this process has
+        """
+        published = self.shared.latest()
+        if published is None:
+            return
+        with self._lock:
+            current = self._snapshot
+            if current is None and published.version >= self.version or current is not None and published.version > current.version:
+                self._snapshot = published
+                self.version = max(self.version, published.version)
+                self.facets.restore(published.facet_counts, published.facets_version)
+
+    def _check_database(self, db: Session) -> None:
+        """
+        Catch up with writes of other workers: active rows past the last known
+        id are patched in, any other difference reloads the snapshot
+        """
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is None or config.CATALOG_CHECK_INTERVAL < 0 or now - self._checked_at < config.CATALOG_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        
+        internship_id = models.Internship.id
+        active = models.Internship.is_active == True
+        found = tuple(db.execute(
+            select(func.count(internship_id), func.coalesce(func.max(internship_id), 0), func.coalesce(func.sum(internship_id), 0))
+            .where(active)
+        ).one())
+        if found == snapshot.derived(IdFingerprint).value:
+            return
+        last_id = snapshot.records[-1].id if len(snapshot) else 0
+        inserted = db.query(models.Internship).filter(active, internship_id > last_id).order_by(internship_id).all()
+        if inserted:
+            self.add(inserted)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.derived(IdFingerprint).value != found:
+            self.invalidate()
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        if self.shared is not None:
+            self._adopt_published()
+        else:
+            self._check_database(db)
+        while True:
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+
+            # The query runs without holding the lock: async sessions run it on the
+            # event loop thread, where another request may be waiting for the lock
+            version = self.version
+            internships = (
+                db.query(models.Internship)
+                .filter(models.Internship.is_active == True)
+                .order_by(models.Internship.id)
+                .all()
+            )
+            records = tuple(CatalogRecord.from_model(internship) for internship in internships)
+            with self._lock:
+                # Retry if the catalog changed while loading
+                if self._snapshot is None and self.version == version:
+                    self._snapshot = CatalogSnapshot(version, records)
+                    self.facets.reset(records, version)
+                    self._checked_at = time.monotonic()
+            if self.shared is not None:
+                # First process to load the catalog creates the file, or it was stale
+                self.shared.schedule_publish(self)
+
+    def add(self, internships: Iterable[models.Internship]) -> None:
+        """
+        Patch the snapshot with newly created internships
+        """
+        self.add_records(CatalogRecord.from_model(internship) for internship in internships)
+
+    def add_records(self, records: Iterable[CatalogRecord]) -> None:
+        """
+        Patch the snapshot with records of newly inserted rows, inactive ones are skipped
+        """
+        new_records = [record for record in records if record.is_active]
+
+        if self.shared is not None:
+            # Patch the newest published catalog, not the one this process last read
+            self._adopt_published()
+        with self._lock:
+            self._next_version()
+            if self._snapshot is None:
+                # Nothing loaded yet, the next read picks the rows up from the database
+                return
+
+            known = self._snapshot.positions
+            new_records = sorted(
+                (record for record in new_records if record.id not in known),
+                key=lambda record: record.id,
+            )
+            self.facets.add(new_records, self.version)
+            if new_records and self._snapshot.records and new_records[0].id < self._snapshot.records[-1].id:
+                # Out-of-order ids, rebuild derived structures from scratch
+                records = tuple(sorted(self._snapshot.records + tuple(new_records), key=lambda record: record.id))
+                self._snapshot = CatalogSnapshot(self.version, records)
+            else:
+                self._snapshot = self._snapshot.appended(self.version, tuple(new_records))
+        self._changed()
+
+    def remove(self, internship_ids: Iterable[int]) -> None:
+        """
+        Drop deactivated internships from the snapshot
+        """
+        if self.shared is not None:
+            self._adopt_published()
+        with self._lock:
+            self._next_version()
+            if self._snapshot is None:
+                return
+
+            removed_ids = set(internship_ids)
+            removed = [record for record in self._snapshot.records if record.id in removed_ids]
+            if not removed:
+                self._snapshot = self._snapshot.relabeled(self.version)
+            else:
+                self.facets.remove(removed, self.version)
+                # Positions shift, so derived structures are rebuilt on next use
+                records = tuple(record for record in self._snapshot.records if record.id not in removed_ids)
+                self._snapshot = CatalogSnapshot(self.version, records)
+        self._changed()
+
+    def clear(self) -> None:
+        """
+        Reset to an empty catalog (after all internships were deleted)
+        """
+        with self._lock:
+            self._next_version()
+            if self._snapshot is not None:
+                self.facets.remove(self._snapshot.records, self.version)
+            else:
+                self.facets.reset((), self.version)
+            self._snapshot = CatalogSnapshot(self.version, ())
+        self._changed()
+
+    def invalidate(self) -> None:
+        """
+        Drop the snapshot so the next read reloads it from the database
+        """
+        with self._lock:
+            self._next_version()
+            self._snapshot = None
+        self._changed()
+
+    def _changed(self) -> None:
+        if self.shared is not None:
+            self.shared.schedule_publish(self)
+
+
+# Shared by all requests in this process
+catalog = Catalog()
@@ -0,0 +1,106 @@
+# app/config.py
+import os
+
+# Description similarity used for recommendations:
+# "jaccard" (same as calculate_description_similarity_mock), "tfidf" or "bm25"
+DESCRIPTION_SIMILARITY_MODE = os.getenv("DESCRIPTION_SIMILARITY_MODE", "jaccard")
+
+# Batch recommendations: "process" or "thread" pool, and its size (<= 1 runs inline)
+BATCH_EXECUTOR = os.getenv("BATCH_EXECUTOR", "process")
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", os.cpu_count() or 1))
+
+# Database connection pool and SQLite tuning applied to every new connection
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./internships.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+
+# Recommendation result cache: max entries (0 disables), TTL in seconds and
+# optional shared backend ("memory" is an in-process stand-in)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 10000))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", 300))
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "")
+
+# Bulk ingestion: rows per transaction and max row errors reported per upload
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", 1000))
+
+# Per-stage timers, Server-Timing header and the /metrics endpoint (off: no overhead)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# On-demand profiling: requests sending PROFILE_TOKEN in the X-Profile header or
+# ?profile= query flag are profiled, plus a PROFILE_SAMPLE_RATE fraction of all
+# requests. PROFILER is "cprofile" (deterministic) or "sampling" (stack samples
+# every PROFILE_SAMPLE_INTERVAL seconds); the last PROFILE_RING_SIZE are kept and
+# can be downloaded from /api/admin/profiles only when PROFILE_TOKEN is set.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILER = os.getenv("PROFILER", "cprofile")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", 20))
+
+# Encode recommendation responses from per-internship JSON cached in the catalog
+# instead of validating and serializing them through the response model
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "1").lower() in ("1", "true", "yes")
+
+# Traffic capture for offline replay: a TRAFFIC_CAPTURE_RATE sample of /api
+# requests is appended to TRAFFIC_CAPTURE_PATH (JSONL); TRAFFIC_CAPTURE_REDACT
+# blanks student descriptions. Bodies over TRAFFIC_CAPTURE_MAX_BODY bytes are dropped.
+TRAFFIC_CAPTURE = os.getenv("TRAFFIC_CAPTURE", "0").lower() in ("1", "true", "yes")
+TRAFFIC_CAPTURE_PATH = os.getenv("TRAFFIC_CAPTURE_PATH", "requests.jsonl")
+TRAFFIC_CAPTURE_RATE = float(os.getenv("TRAFFIC_CAPTURE_RATE", 1.0))
+TRAFFIC_CAPTURE_REDACT = os.getenv("TRAFFIC_CAPTURE_REDACT", "0").lower() in ("1", "true", "yes")
+TRAFFIC_CAPTURE_MAX_BODY = int(os.getenv("TRAFFIC_CAPTURE_MAX_BODY", 64 * 1024))
+
+# Two-stage recommendations: retrieval keeps the RERANK_CANDIDATES best internships
+# by rule-based score (0 = score every candidate fully, single stage), then RERANKER
+# rescores only those within RERANK_BUDGET_MS, else the retrieval order is kept
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", 0))
+RERANKER = os.getenv("RERANKER", "description")
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", 50))
+
+# Approximate description index (MinHash LSH, see app/ann.py): ANN_BANDS bands of
+# ANN_ROWS MinHash values each. ANN_INDEX_PATH is an index file written by
+# `python -m app.ann build`, loaded instead of rebuilding when it is still current.
+# RERANK_ANN_CANDIDATES adds that many ANN matches to the two-stage retrieval.
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "")
+ANN_BANDS = int(os.getenv("ANN_BANDS", 64))
+ANN_ROWS = int(os.getenv("ANN_ROWS", 3))
+RERANK_ANN_CANDIDATES = int(os.getenv("RERANK_ANN_CANDIDATES", 0))
+
+# Catalog snapshot file shared by uvicorn workers (POSIX-only, see app/shared_catalog.py):
+# workers memory-map it instead of loading the catalog, and a worker that
+# changed the catalog republishes it at most every CATALOG_SNAPSHOT_INTERVAL seconds
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "")
+CATALOG_SNAPSHOT_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_INTERVAL", 1.0))
+
+# Without a shared snapshot file, a worker compares its catalog with the active
+# rows of the database at most every CATALOG_CHECK_INTERVAL seconds to pick up
+# internships other workers inserted or deactivated (negative disables the check)
+CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", 1.0))
+
+# Upper-bound pruning (single-stage only): candidates are scored by decreasing
+# bound (rule score + description bound) and the description similarity of those
+# that can no longer reach the top k is skipped; results are unchanged
+SCORE_PRUNING = os.getenv("SCORE_PRUNING", "0").lower() in ("1", "true", "yes")
+
+# Burst protection for /api/recommendations: concurrent identical requests (same
+# canonical form, k and cursor) share one scoring run. Admission control is opt-in:
+# with ADMISSION_CONCURRENCY > 0 at most that many scoring runs at once,
+# ADMISSION_QUEUE_SIZE more wait up to ADMISSION_QUEUE_TIMEOUT seconds and the
+# rest get 503 with Retry-After; 0 (the default) admits everything
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1").lower() in ("1", "true", "yes")
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", 0))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 64))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))
+
+# Sharded scoring (see app/sharding.py): catalogs of at least SHARD_MIN_CATALOG
+# internships are split by id range into SHARD_COUNT shards, each held by a
+# persistent worker process that scores its part of every query (< 2 = serial).
+# Applies to single-stage Jaccard scoring; pages are identical to serial scoring.
+# Each uvicorn worker starts its own shard processes.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 0))
+SHARD_MIN_CATALOG = int(os.getenv("SHARD_MIN_CATALOG", 50000))
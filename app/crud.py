@@ -1,89 +1,205 @@
 # app/crud.py
+import dataclasses
+import logging
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from . import models, schemas
-from .scoring import calculate_total_score
+from typing import AsyncIterator, Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from . import config, matching, metrics, models, profiling, schemas
+from .admission import admission, single_flight
+from .batch import batch_executor
+from .cache import canonical_form_key, result_cache
+from .catalog import CatalogRecord, CatalogSnapshot, ContentDigest, catalog
+from .database import AsyncSessionLocal
+from .ranking import Cursor
+from .recommender import RecommendationPage, recommend
+
+logger = logging.getLogger(__name__)
 
 def get_all_internships(db: Session):
-    return db.query(models.Internship).filter(models.Internship.is_active == True).all()
+    # Explicit order: with the is_active indexes SQLite would otherwise return index order
+    return db.query(models.Internship).filter(models.Internship.is_active == True).order_by(models.Internship.id).all()
+
+# Fields of InternshipResponse, in serialization order
+INTERNSHIP_FIELDS = tuple(schemas.InternshipResponse.model_fields)
+
+def internship_fields(fields: Optional[str] = None) -> List[str]:
+    """
+    Validate a comma-separated field projection; id is always included
+    """
+    if not fields:
+        return list(INTERNSHIP_FIELDS)
+    requested = set(field.strip() for field in fields.split(',') if field.strip())
+    unknown = requested - set(INTERNSHIP_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return [field for field in INTERNSHIP_FIELDS if field in requested]
+
+def skill_overlap_ids(skills: str, min_overlap: int = 1):
+    """
+    Ids of internships requiring at least min_overlap of the comma-separated
+    skills, counted in SQL over the normalized skill tables
+    """
+    links = models.internship_skills.c
+    return (
+        select(links.internship_id)
+        .join(models.Skill, models.Skill.id == links.skill_id)
+        .where(models.Skill.name.in_(models.canonical_skills(skills)))
+        .group_by(links.internship_id)
+        .having(func.count() >= min_overlap)
+    )
+
+def internships_query(
+    fields: List[str],
+    after: Optional[int] = None,
+    sector: Optional[str] = None,
+    location: Optional[str] = None,
+    is_active: bool = True,
+    skills: Optional[str] = None,
+    min_skills: int = 1
+):
+    """
+    Select only the projected columns, with filters pushed into SQL, in id order
+    """
+    query = select(*(getattr(models.Internship, field) for field in fields)).where(models.Internship.is_active == is_active)
+    if after is not None:
+        query = query.where(models.Internship.id > after)
+    if sector is not None:
+        query = query.where(models.Internship.sector == sector)
+    if location is not None:
+        query = query.where(models.Internship.location == location)
+    if skills is not None:
+        query = query.where(models.Internship.id.in_(skill_overlap_ids(skills, min_skills)))
+    return query.order_by(models.Internship.id)
+
+async def get_internships_page_async(db: AsyncSession, query, limit: int) -> Tuple[List[Dict], Optional[int]]:
+    """
+    One keyset page of rows and the `after` value of the next page (None on the last page)
+    """
+    rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+    next_after = rows[limit - 1]["id"] if len(rows) > limit else None
+    return [dict(row) for row in rows[:limit]], next_after
+
+async def stream_internships_async(query) -> AsyncIterator[Dict]:
+    """
+    Yield rows as they are fetched; uses its own session so it can outlive the request handler
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for row in result.mappings():
+            yield dict(row)
+
+def link_skills(db: Session, internships: Iterable[Tuple[int, str]]) -> None:
+    """
+    Fill the normalized skill tables for (internship id, comma-separated skills) pairs
+    """
+    links = [(internship_id, models.canonical_skills(skills)) for internship_id, skills in internships]
+    names = set().union(*(skill_names for _, skill_names in links))
+    if not names:
+        return
+    db.execute(
+        sqlite_insert(models.Skill).on_conflict_do_nothing(index_elements=["name"]),
+        [{"name": name} for name in names]
+    )
+    skill_ids = dict(db.execute(select(models.Skill.name, models.Skill.id).where(models.Skill.name.in_(names))).all())
+    db.execute(
+        sqlite_insert(models.internship_skills).on_conflict_do_nothing(),
+        [
+            {"internship_id": internship_id, "skill_id": skill_ids[name]}
+            for internship_id, skill_names in links
+            for name in skill_names
+        ]
+    )
 
 def create_internship(db: Session, internship: schemas.InternshipCreate):
     db_internship = models.Internship(**internship.dict())
     db.add(db_internship)
+    db.flush()
+    link_skills(db, [(db_internship.id, db_internship.skills)])
     db.commit()
     db.refresh(db_internship)
+    catalog.add([db_internship])
+    _record_matches(db, [db_internship])
     return db_internship
 
-def get_form_options(db: Session) -> Dict:
+def create_internships_bulk(db: Session, internships: List[schemas.InternshipCreate]) -> int:
     """
-    Get unique values for form dropdowns
+    Insert many internships in one transaction with a single executemany statement
     """
-    internships = get_all_internships(db)
-    
-    education_options = set()
-    skills_options = set()
-    sector_options = set()
-    location_options = set()
-    
-    for internship in internships:
-        education_options.add(internship.min_education)
-        sector_options.add(internship.sector)
-        location_options.add(internship.location)
-        
-        # Split skills and add individually
-        for skill in internship.skills.split(','):
-            skills_options.add(skill.strip())
-    
-    return {
-        "education_options": sorted(list(education_options)),
-        "skills_options": sorted(list(skills_options)),
-        "sector_options": sorted(list(sector_options)),
-        "location_options": sorted(list(location_options))
-    }
+    rows = [internship.model_dump() for internship in internships]
+    try:
+        ids = db.scalars(
+            insert(models.Internship).returning(models.Internship.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        link_skills(db, [(internship_id, row["skills"]) for internship_id, row in zip(ids, rows)])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    # Derived indexes and facets are patched once for the whole chunk
+    records = [CatalogRecord(id=internship_id, **row) for internship_id, row in zip(ids, rows)]
+    catalog.add_records(records)
+    _record_matches(db, records)
+    return len(ids)
+
+def _record_matches(db: Session, internships: List) -> None:
+    # The internships are committed already: failing here would fail a done insert and invite a duplicate retry
+    try:
+        matching.record_matches(db, internships)
+    except Exception:
+        db.rollback()
+        logger.exception("Recording saved profile matches failed for %d internships", len(internships))
+
+def deactivate_internship(db: Session, internship_id: int) -> Optional[models.Internship]:
+    db_internship = db.get(models.Internship, internship_id)
+    if db_internship is None:
+        return None
+    db_internship.is_active = False
+    db.commit()
+    db.refresh(db_internship)
+    catalog.remove([internship_id])
+    return db_internship
 
-def get_recommendations(db: Session, student_form: schemas.StudentForm) -> List[Dict]:
+def create_saved_profile(db: Session, profile: schemas.SavedProfileCreate) -> models.SavedProfile:
+    db_profile = models.SavedProfile(**profile.model_dump())
+    db.add(db_profile)
+    db.commit()
+    db.refresh(db_profile)
+    return db_profile
+
+def get_saved_profile(db: Session, profile_id: int) -> Optional[models.SavedProfile]:
+    return db.get(models.SavedProfile, profile_id)
+
+def delete_saved_profile(db: Session, profile_id: int) -> bool:
+    db_profile = db.get(models.SavedProfile, profile_id)
+    if db_profile is None:
+        return False
+    db.query(models.ProfileMatch).filter(models.ProfileMatch.profile_id == profile_id).delete()
+    db.delete(db_profile)
+    db.commit()
+    return True
+
+def get_profile_matches(db: Session, profile_id: int, since: int = 0, limit: int = 100) -> Dict:
     """
-    Get top 5 internship recommendations based on student profile
+    Match events of a profile after event id `since`, oldest first, with their
+    internships. Deactivated internships are skipped.
     """
-    # Get all active internships
-    internships = get_all_internships(db)
-    
-    # Convert student form to dict for scoring
-    student_data = {
-        "education": student_form.education,
-        "skills": student_form.skills,
-        "sector": student_form.sector,
-        "preferred_location": student_form.preferred_location,
-        "description": student_form.description
-    }
-    
-    # Calculate scores for each internship
-    scored_internships = []
-    for internship in internships:
-        score = calculate_total_score(internship, student_data)
-        
-        # Only include internships with score > 0
-        if score > 0:
-            scored_internships.append({
-                "internship": internship,
-                "score": score
-            })
-    
-    # Sort by score (descending) and get top 20-30
-    scored_internships.sort(key=lambda x: x["score"], reverse=True)
-    top_internships = scored_internships[:30]  # Get top 30 for further filtering
-    
-    # In production, here you would apply ML model for better ranking
-    # For now, we'll use the existing scores
+    # 1. Only the profile's newer events are read, through the (profile_id, id) index
+    rows = db.execute(
+        select(models.ProfileMatch.id, models.ProfileMatch.score, models.Internship)
+        .join(models.Internship, models.Internship.id == models.ProfileMatch.internship_id)
+        .where(models.ProfileMatch.profile_id == profile_id, models.ProfileMatch.id > since)
+        .order_by(models.ProfileMatch.id)
+        .limit(limit)
+    ).all()
     
-    # Get top 5
-    top_5 = top_internships[:5]
-    
-    # Format response
-    recommendations = []
-    for item in top_5:
-        internship = item["internship"]
-        recommendations.append({
+    # 2. Resume after the last event read, even if its internship is inactive now
+    matches = [
+        {
             "id": internship.id,
             "title": internship.title,
             "sector": internship.sector,
@@ -91,7 +207,149 @@ def get_recommendations(db: Session, student_form: schemas.StudentForm) -> List[
             "skills": internship.skills,
             "duration": internship.duration,
             "description": internship.description,
-            "match_score": round(item["score"], 2)
-        })
+            "match_score": round(score, 2)
+        }
+        for _, score, internship in rows
+        if internship.is_active
+    ]
+    next_since = rows[-1][0] if rows else since
+    return {"profile_id": profile_id, "matches": matches, "next_since": next_since}
+
+def get_form_options(db: Session) -> Dict:
+    """
+    Get unique values for form dropdowns
+    """
+    return get_form_options_snapshot(db)[1]
+
+def get_form_options_snapshot(db: Session) -> Tuple[int, Dict]:
+    """
+    Get (version, form options); options are maintained incrementally by the catalog
+    """
+    # Facets are loaded together with the catalog snapshot
+    with metrics.stage("catalog"):
+        catalog.snapshot(db)
+    with metrics.stage("facets"):
+        return catalog.facets.snapshot()
+
+def get_form_options_changes(db: Session, since: int) -> Optional[Dict]:
+    """
+    Form option values added/removed since a version, None if that version is too old
+    """
+    catalog.snapshot(db)
+    return catalog.facets.changes_since(since)
+
+async def get_form_options_snapshot_async(db: AsyncSession) -> Tuple[int, Dict]:
+    return await db.run_sync(get_form_options_snapshot)
+
+def get_recommendations(db: Session, student_form: schemas.StudentForm, k: int = 5, cursor: Optional[str] = None) -> List[Dict]:
+    """
+    Get top k (default 5) internship recommendations based on student profile
+    """
+    return get_recommendation_page(db, student_form, k, cursor).recommendations
+
+# Scoring offloaded to the threadpool is profiled with the request that started it
+_profiled_recommend = profiling.profiled(recommend)
+
+def _count_request(cache: str) -> None:
+    if metrics.enabled:
+        metrics.recommendation_requests.inc(cache)
+
+def _cached_page(
+    snapshot: CatalogSnapshot, student_form: schemas.StudentForm, k: int, cursor: Optional[str]
+) -> Tuple[str, Tuple[int, Optional[str]], Optional[RecommendationPage]]:
+    """
+    Result cache key and versions of a request, and its cached page if any.
+    The local version is the snapshot version, which only moves forward in a
+    process; the shared one is the catalog content digest, which every worker
+    computes the same.
+    Raises InvalidCursorError for a stale cursor before looking anything up.
+    """
+    start = Cursor.decode(cursor, snapshot.version) if cursor else None
+    if not result_cache.enabled:
+        # Still keys in-flight coalescing
+        _count_request("off")
+        return canonical_form_key(student_form, k, start), (snapshot.version, None), None
+    with metrics.stage("cache"):
+        key = canonical_form_key(student_form, k, start)
+        shared_version = snapshot.derived(ContentDigest).hexdigest if result_cache.shared is not None else None
+        version = (snapshot.version, shared_version)
+        page = result_cache.get(key, *version)
+    _count_request("miss" if page is None else "hit")
+    if page is not None and page.snapshot is None:
+        # Shared pages are ranked in another worker's snapshot of the same catalog
+        page = dataclasses.replace(page, snapshot=snapshot)
+    return key, version, page
+
+def _cache_page(key: str, version: Tuple[int, Optional[str]], page: RecommendationPage) -> None:
+    # A page that ran out of re-ranking budget is degraded, let the next request retry
+    if page.pipeline is None or not page.pipeline.get("budget_exhausted"):
+        result_cache.set(key, version[0], page, version[1])
+
+def _score_page(key: str, version: Tuple[int, Optional[str]], work: Callable[[], RecommendationPage]) -> RecommendationPage:
+    """
+    Score a page under admission control; concurrent identical requests share one run
+    """
+    def score():
+        with admission.slot():
+            page = work()
+        if result_cache.enabled:
+            _cache_page(key, version, page)
+        return page
+    
+    if not config.COALESCE_REQUESTS:
+        return score()
+    return single_flight.run((key, version), score)
+
+async def _score_page_async(key: str, version: Tuple[int, Optional[str]], work: Callable[[], RecommendationPage]) -> RecommendationPage:
+    """
+    Async variant of _score_page; work runs in the threadpool once admitted
+    """
+    async def score():
+        async with admission.slot_async():
+            # Scoring is CPU-bound, keep it off the event loop
+            page = await run_in_threadpool(work)
+        if result_cache.enabled:
+            _cache_page(key, version, page)
+        return page
     
-    return recommendations
\ No newline at end of file
+    if not config.COALESCE_REQUESTS:
+        return await score()
+    return await single_flight.run_async((key, version), score)
+
+def get_recommendation_page(db: Session, student_form: schemas.StudentForm, k: int = 5, cursor: Optional[str] = None) -> RecommendationPage:
+    """
+    Get a page of k recommendations, starting after the given cursor.
+    Raises admission.Overloaded when the request is shed.
+    """
+    # Read active internships from the in-memory catalog snapshot
+    with metrics.stage("catalog"):
+        snapshot = catalog.snapshot(db)
+    key, version, page = _cached_page(snapshot, student_form, k, cursor)
+    if page is None:
+        page = _score_page(key, version, lambda: recommend(snapshot, student_form, k, cursor))
+    return page
+
+async def get_recommendation_page_async(db: AsyncSession, student_form: schemas.StudentForm, k: int = 5, cursor: Optional[str] = None) -> RecommendationPage:
+    """
+    Async variant of get_recommendation_page; scoring runs in the threadpool
+    """
+    # Only touches the database when the snapshot is not loaded yet
+    with metrics.stage("catalog"):
+        snapshot = await db.run_sync(catalog.snapshot)
+    key, version, page = _cached_page(snapshot, student_form, k, cursor)
+    if page is None:
+        page = await _score_page_async(key, version, lambda: _profiled_recommend(snapshot, student_form, k, cursor))
+    return page
+
+def get_recommendations_batch(
+    db: Session,
+    student_forms: Iterable,
+    k: int = 5,
+    executor: Optional[str] = None,
+    workers: Optional[int] = None
+) -> Iterator[Dict]:
+    """
+    Recommendations for many student profiles against one catalog snapshot.
+    Yields {"index", "recommendations"} or {"index", "error"} per profile, in input order.
+    """
+    return batch_executor.run(catalog.snapshot(db), student_forms, k, executor, workers)
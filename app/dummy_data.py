@@ -0,0 +1,115 @@
+# app/dummy_data.py
+
+# Sample internships used by /api/populate-dummy-data and the benchmark generator
+DUMMY_INTERNSHIPS = [
+    {
+        "title": "Web Development Intern",
+        "min_education": "Bachelor's",
+        "skills": "HTML, CSS, JavaScript, React, Node.js",
+        "sector": "IT",
+        "location": "Delhi",
+        "duration": "3 months",
+        "no_of_posts": 5,
+        "is_active": True,
+        "description": "Looking for enthusiastic web development interns to work on modern web applications. You will be working with React and Node.js to build scalable solutions."
+    },
+    {
+        "title": "Data Science Intern",
+        "min_education": "Bachelor's",
+        "skills": "Python, Machine Learning, SQL, Pandas, NumPy",
+        "sector": "IT",
+        "location": "Mumbai",
+        "duration": "6 months",
+        "no_of_posts": 3,
+        "is_active": True,
+        "description": "Join our data science team to work on real-world ML projects. Experience with Python and data analysis libraries required."
+    },
+    {
+        "title": "Digital Marketing Intern",
+        "min_education": "12th Pass",
+        "skills": "Social Media Marketing, Content Writing, SEO, Google Analytics",
+        "sector": "Marketing",
+        "location": "Remote",
+        "duration": "3 months",
+        "no_of_posts": 10,
+        "is_active": True,
+        "description": "Help us grow our digital presence through social media campaigns and content marketing strategies."
+    },
+    {
+        "title": "Finance Analyst Intern",
+        "min_education": "Bachelor's",
+        "skills": "Excel, Financial Analysis, Accounting, Tally",
+        "sector": "Finance",
+        "location": "Bangalore",
+        "duration": "4 months",
+        "no_of_posts": 2,
+        "is_active": True,
+        "description": "Assist in financial planning, budgeting, and analysis. Strong Excel skills and understanding of financial concepts required."
+    },
+    {
+        "title": "Mobile App Development Intern",
+        "min_education": "Bachelor's",
+        "skills": "Flutter, React Native, Mobile Development, JavaScript",
+        "sector": "IT",
+        "location": "Hyderabad",
+        "duration": "6 months",
+        "no_of_posts": 4,
+        "is_active": True,
+        "description": "Develop cross-platform mobile applications using Flutter or React Native. Work on innovative mobile solutions."
+    },
+    {
+        "title": "Content Writing Intern",
+        "min_education": "12th Pass",
+        "skills": "Content Writing, Research, SEO Writing, Blogging",
+        "sector": "Marketing",
+        "location": "Remote",
+        "duration": "2 months",
+        "no_of_posts": 8,
+        "is_active": True,
+        "description": "Create engaging content for blogs, websites, and social media. Strong writing and research skills needed."
+    },
+    {
+        "title": "HR Management Intern",
+        "min_education": "Bachelor's",
+        "skills": "Recruitment, Communication, MS Office, HR Policies",
+        "sector": "HR",
+        "location": "Delhi",
+        "duration": "3 months",
+        "no_of_posts": 2,
+        "is_active": True,
+        "description": "Support HR team in recruitment, onboarding, and employee engagement activities."
+    },
+    {
+        "title": "Graphic Design Intern",
+        "min_education": "Diploma",
+        "skills": "Photoshop, Illustrator, Canva, UI/UX Design",
+        "sector": "Design",
+        "location": "Mumbai",
+        "duration": "3 months",
+        "no_of_posts": 3,
+        "is_active": True,
+        "description": "Create visual content for digital and print media. Experience with design software required."
+    },
+    {
+        "title": "Backend Development Intern",
+        "min_education": "Bachelor's",
+        "skills": "Python, Django, FastAPI, PostgreSQL, REST APIs",
+        "sector": "IT",
+        "location": "Pune",
+        "duration": "4 months",
+        "no_of_posts": 3,
+        "is_active": True,
+        "description": "Build robust backend systems and APIs using Python frameworks. Database knowledge essential."
+    },
+    {
+        "title": "Sales & Marketing Intern",
+        "min_education": "12th Pass",
+        "skills": "Sales, Communication, Customer Service, MS Office",
+        "sector": "Sales",
+        "location": "Chennai",
+        "duration": "3 months",
+        "no_of_posts": 6,
+        "is_active": True,
+        "description": "Support sales team in lead generation and customer relationship management."
+    }
+]
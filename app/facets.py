@@ -0,0 +1,135 @@
+# app/facets.py
+import threading
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FACETS = ("education_options", "skills_options", "sector_options", "location_options")
+
+# Number of facet value changes kept for delta requests
+CHANGELOG_SIZE = 10000
+
+
+def facet_values(internship) -> Dict[str, List[str]]:
+    """
+    Form option values contributed by one internship
+    """
+    return {
+        "education_options": [internship.min_education],
+        "skills_options": [skill.strip() for skill in internship.skills.split(',')],
+        "sector_options": [internship.sector],
+        "location_options": [internship.location],
+    }
+
+
+class FacetCounts:
+    """
+    Form dropdown options kept up to date as internships are added and removed.
+
+    Each facet counts the active internships per value; a value is listed
+    while its count is positive. Values appearing or disappearing are logged
+    with the catalog version so clients can ask what changed since a version.
+    ``version`` is the catalog version of the last change to the options.
+    """
+
+    def __init__(self, changelog_size: int = CHANGELOG_SIZE):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, Counter] = {facet: Counter() for facet in FACETS}
+        self.version = 0
+        # Deltas are only complete for versions >= base_version
+        self.base_version = 0
+        self.changes = deque(maxlen=changelog_size)
+        self._payload: Optional[Dict[str, List[str]]] = None
+
+    def reset(self, internships: Iterable, version: int) -> None:
+        with self._lock:
+            self.counts = {facet: Counter() for facet in FACETS}
+            for internship in internships:
+                for facet, values in facet_values(internship).items():
+                    self.counts[facet].update(set(values))
+            self.version = self.base_version = version
+            self.changes.clear()
+            self._payload = None
+
+    def restore(self, counts: Dict[str, Dict[str, int]], version: int) -> None:
+        """
+        Replace the counts with saved ones; deltas are only available after `version`
+        """
+        with self._lock:
+            self.counts = {facet: Counter(counts.get(facet, {})) for facet in FACETS}
+            self.version = self.base_version = version
+            self.changes.clear()
+            self._payload = None
+
+    def saved(self) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """
+        Copy of (version, counts) for restore()
+        """
+        with self._lock:
+            return self.version, {facet: dict(self.counts[facet]) for facet in FACETS}
+
+    def add(self, internships: Iterable, version: int) -> None:
+        self._update(internships, version, 1)
+
+    def remove(self, internships: Iterable, version: int) -> None:
+        self._update(internships, version, -1)
+
+    def _update(self, internships: Iterable, version: int, delta: int) -> None:
+        with self._lock:
+            changed = False
+            for internship in internships:
+                for facet, values in facet_values(internship).items():
+                    counts = self.counts[facet]
+                    for value in set(values):
+                        counts[value] += delta
+                        if delta > 0 and counts[value] == 1:
+                            self._log(version, facet, value, True)
+                            changed = True
+                        elif delta < 0 and counts[value] <= 0:
+                            del counts[value]
+                            self._log(version, facet, value, False)
+                            changed = True
+            # Count-only updates leave the options, their version and ETag unchanged
+            if changed:
+                self.version = version
+                self._payload = None
+
+    def _log(self, version: int, facet: str, value: str, added: bool) -> None:
+        if len(self.changes) == self.changes.maxlen:
+            self.base_version = max(self.base_version, self.changes[0][0])
+        self.changes.append((version, facet, value, added))
+
+    def snapshot(self) -> Tuple[int, Dict[str, List[str]]]:
+        """
+        Current (version, form options payload); the payload is rebuilt only after changes
+        """
+        with self._lock:
+            if self._payload is None:
+                self._payload = {facet: sorted(self.counts[facet]) for facet in FACETS}
+            return self.version, self._payload
+
+    def changes_since(self, since: int) -> Optional[Dict]:
+        """
+        Values added and removed after version ``since``, or None if the log no longer covers it
+        """
+        with self._lock:
+            if since < self.base_version or since > self.version:
+                return None
+            first_change = {}
+            for version, facet, value, was_added in self.changes:
+                if version > since:
+                    first_change.setdefault((facet, value), was_added)
+
+            added = {facet: [] for facet in FACETS}
+            removed = {facet: [] for facet in FACETS}
+            for (facet, value), first_added in first_change.items():
+                # A value first added after `since` was absent then; first removed means present
+                present = value in self.counts[facet]
+                if first_added and present:
+                    added[facet].append(value)
+                elif not first_added and not present:
+                    removed[facet].append(value)
+            return {
+                "version": self.version,
+                "added": {facet: sorted(values) for facet, values in added.items()},
+                "removed": {facet: sorted(values) for facet, values in removed.items()},
+            }
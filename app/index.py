@@ -0,0 +1,81 @@
+# app/index.py
+from typing import Dict, List, Sequence
+from .scoring import EDUCATION_HIERARCHY, STOP_WORDS
+
+
+def _skill_keys(skills: str) -> set:
+    return set(skill.strip().lower() for skill in skills.split(','))
+
+
+def _description_keys(description: str) -> set:
+    return set(description.lower().split()) - STOP_WORDS
+
+
+class InvertedIndex:
+    """
+    Posting lists of catalog positions keyed on every signal that can give an
+    internship a non-zero score: skills, sector, location, description words,
+    "Remote" and the required education level.
+
+    Posting lists are append-only and sorted, so ``extend`` patches the index in
+    place; readers pass their snapshot size to ignore positions added later.
+    """
+
+    def __init__(self):
+        self.skills: Dict[str, List[int]] = {}
+        self.sectors: Dict[str, List[int]] = {}
+        self.locations: Dict[str, List[int]] = {}
+        self.words: Dict[str, List[int]] = {}
+        self.education: Dict[int, List[int]] = {}
+        self.remote: List[int] = []
+
+    @classmethod
+    def build(cls, records: Sequence) -> "InvertedIndex":
+        index = cls()
+        index.extend(records, 0)
+        return index
+
+    def extend(self, records: Sequence, start: int) -> "InvertedIndex":
+        for position in range(start, len(records)):
+            internship = records[position]
+            for skill in _skill_keys(internship.skills):
+                self.skills.setdefault(skill, []).append(position)
+            for word in _description_keys(internship.description):
+                self.words.setdefault(word, []).append(position)
+            self.sectors.setdefault(internship.sector.lower(), []).append(position)
+            location = internship.location.lower()
+            self.locations.setdefault(location, []).append(position)
+            if location == "remote":
+                self.remote.append(position)
+            level = EDUCATION_HIERARCHY.get(internship.min_education, 0)
+            self.education.setdefault(level, []).append(position)
+        return self
+
+    def _postings(self, student_data: Dict) -> List:
+        """
+        Posting lists of every signal the student can match
+        """
+        postings = []
+        for skill in set(skill.strip().lower() for skill in student_data['skills']):
+            postings.append(self.skills.get(skill, ()))
+        for word in _description_keys(student_data.get('description') or ''):
+            postings.append(self.words.get(word, ()))
+        postings.append(self.sectors.get(student_data['sector'].lower(), ()))
+        postings.append(self.locations.get(student_data['preferred_location'].lower(), ()))
+        postings.append(self.remote)
+
+        # Full education score at or below the student's level, partial one level above
+        student_level = EDUCATION_HIERARCHY.get(student_data['education'], 0)
+        for level, positions in list(self.education.items()):
+            if level <= student_level + 1:
+                postings.append(positions)
+        return postings
+
+    def candidates(self, student_data: Dict, size: int) -> List[int]:
+        """
+        Sorted positions (< size) of internships that can score above zero
+        """
+        hits = set()
+        for positions in self._postings(student_data):
+            hits.update(positions)
+        return sorted(position for position in hits if position < size)
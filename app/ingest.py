@@ -0,0 +1,139 @@
+# app/ingest.py
+import csv
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from . import config, schemas
+
+# (row number, parsed row, parse error)
+Row = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def _decode(line: bytes) -> Tuple[str, Optional[str]]:
+    """
+    (text, error): a line that is not valid UTF-8 is decoded with replacement characters
+    """
+    try:
+        return line.decode("utf-8").rstrip("\r"), None
+    except UnicodeDecodeError as e:
+        return line.decode("utf-8", errors="replace").rstrip("\r"), f"Invalid UTF-8 at byte {e.start} of the line"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Split a byte stream into decoded (line, decode error) pairs without reading it all
+    """
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text, error = _decode(line)
+            if first:
+                text, first = text.lstrip("\ufeff"), False
+            yield text, error
+    if buffer:
+        text, error = _decode(buffer)
+        yield (text.lstrip("\ufeff") if first else text), error
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    row = 0
+    async for line, error in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        if error is not None:
+            yield row, None, error
+            continue
+        try:
+            yield row, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield row, None, f"Invalid JSON: {e}"
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    """
+    CSV rows as dicts keyed by the header row; quoted fields may span lines
+    """
+    header = None
+    pending = None
+    # Decode error of any line of the pending record
+    pending_error = None
+    row = 0
+    async for line, error in iter_lines(chunks):
+        pending = line if pending is None else pending + "\n" + line
+        pending_error = pending_error or error
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, None
+        error, pending_error = pending_error, None
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            if error is not None:
+                # Rows are numbered from 1, the header is row 0
+                yield 0, None, f"Header: {error}"
+            continue
+        row += 1
+        if error is not None:
+            yield row, None, error
+        elif len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row, dict(zip(header, values)), None
+    if pending is not None:
+        yield row + 1, None, "Unterminated quoted field"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def ingest_rows(
+    rows: AsyncIterator[Row],
+    insert_chunk: Callable[[List[schemas.InternshipCreate]], Awaitable[int]],
+    chunk_size: Optional[int] = None
+) -> Dict:
+    """
+    Validate rows as they stream in and insert them chunk by chunk.
+    Only one chunk is held in memory; errors beyond BULK_MAX_ERRORS are counted but not listed.
+    """
+    chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+    report = {"inserted": 0, "failed": 0, "errors": []}
+
+    def fail(row_numbers: List[int], message: str) -> None:
+        report["failed"] += len(row_numbers)
+        for row in row_numbers:
+            if len(report["errors"]) < config.BULK_MAX_ERRORS:
+                report["errors"].append({"row": row, "error": message})
+
+    async def flush(chunk: List[Tuple[int, schemas.InternshipCreate]]) -> None:
+        try:
+            report["inserted"] += await insert_chunk([internship for _, internship in chunk])
+        except Exception as e:
+            fail([row for row, _ in chunk], f"Insert failed: {e}")
+
+    chunk = []
+    async for row, data, error in rows:
+        if error is None:
+            try:
+                chunk.append((row, schemas.InternshipCreate.model_validate(data)))
+            except ValidationError as e:
+                error = _validation_message(e)
+        if error is not None:
+            fail([row], error)
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+    return report
@@ -1,13 +1,26 @@
 # app/main.py
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from . import models, schemas, crud
-from .database import engine, get_db
+from typing import Any, AsyncIterator, List, Optional
+import json
+from . import config, models, schemas, crud, ingest, metrics, migrations, profiling, serialization, shared_catalog, traffic
+from .admission import Overloaded
+from .cache import result_cache
+from .catalog import catalog
+from .database import engine, get_async_db, get_db
+from .dummy_data import DUMMY_INTERNSHIPS
+from .ranking import InvalidCursorError
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Create database tables and apply schema migrations
+migrations.migrate(engine)
+
+# Worker processes share one memory-mapped catalog snapshot
+if config.CATALOG_SNAPSHOT_PATH:
+    shared_catalog.share(catalog, config.CATALOG_SNAPSHOT_PATH, config.CATALOG_SNAPSHOT_INTERVAL)
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,47 +36,242 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Catalog-Version", "X-Next-After", "Server-Timing", "X-Profile-Id", "X-Pipeline-Candidates", "Retry-After"],
 )
 
+# Request counters/latency and the Server-Timing header (only when METRICS_ENABLED)
+app.add_middleware(metrics.MetricsMiddleware)
+# Profiles sampled requests (only when PROFILING_ENABLED); handlers are wrapped with profiling.profiled
+app.add_middleware(profiling.ProfilingMiddleware)
+# Appends sampled requests to a JSONL log for replay (only when TRAFFIC_CAPTURE)
+app.add_middleware(traffic.TrafficCaptureMiddleware)
+
 @app.get("/")
-def root():
+@profiling.profiled
+async def root():
     return {"message": "Internship Recommendation System API"}
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 @app.get("/api/form-options", response_model=schemas.FormOptions)
-def get_form_options(db: Session = Depends(get_db)):
+@profiling.profiled
+async def get_form_options(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get dropdown options for the student form
+    Get dropdown options for the student form.
+    Supports If-None-Match with the ETag of the catalog version (304 Not Modified);
+    X-Catalog-Version is the version to pass to /api/form-options/changes.
     """
-    options = crud.get_form_options(db)
+    version, options = await crud.get_form_options_snapshot_async(db)
+    etag = catalog.etag(version)
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    response.headers["X-Catalog-Version"] = str(version)
     return schemas.FormOptions(**options)
 
+@app.get("/api/form-options/changes", response_model=schemas.FormOptionsChanges)
+@profiling.profiled
+def get_form_options_changes(since: int, db: Session = Depends(get_db)):
+    """
+    Get form option values added and removed since a catalog version.
+    Returns 410 when that version is too old; fetch /api/form-options again.
+    """
+    changes = crud.get_form_options_changes(db, since)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="Version no longer available, reload all form options")
+    return changes
+
 @app.post("/api/recommendations", response_model=List[schemas.RecommendationResponse])
-def get_recommendations(
+@profiling.profiled
+async def get_recommendations(
     student_form: schemas.StudentForm,
-    db: Session = Depends(get_db)
+    response: Response,
+    k: int = Query(5, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get top 5 internship recommendations based on student profile
+    Get top k (default 5) internship recommendations based on student profile.
+    When more results exist, the X-Next-Cursor header holds the cursor for the next page.
+    With two-stage ranking, X-Pipeline-Candidates reports the candidates per stage.
+    Under overload the request is rejected with 503 and a Retry-After header.
     """
-    recommendations = crud.get_recommendations(db, student_form)
+    try:
+        page = await crud.get_recommendation_page_async(db, student_form, k, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     
-    if not recommendations:
+    if not page.recommendations and cursor is None:
         raise HTTPException(
             status_code=404, 
             detail="No matching internships found for your profile"
         )
     
-    return recommendations
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else {}
+    if page.pipeline is not None:
+        headers["X-Pipeline-Candidates"] = ", ".join(f"{name}={int(value)}" for name, value in page.pipeline.items())
+    if config.FAST_SERIALIZATION:
+        # Same bytes as the response_model path, from JSON pre-serialized per internship
+        with metrics.stage("serialize"):
+            body = serialization.encode_recommendations(page.snapshot, page.recommendations)
+        return Response(body, media_type="application/json", headers=headers)
+    
+    response.headers.update(headers)
+    return page.recommendations
+
+@app.post("/api/recommendations/batch")
+@profiling.profiled
+def get_recommendations_batch(
+    student_forms: List[Any] = Body(...),
+    k: int = Query(5, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Get recommendations for many student profiles in one call.
+    Results are streamed as NDJSON in input order; invalid profiles get an inline error.
+    """
+    results = crud.get_recommendations_batch(db, student_forms, k)
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in results),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/api/cache/stats")
+@profiling.profiled
+async def get_cache_stats():
+    """
+    Hit/miss/eviction counters of the recommendation result cache
+    """
+    return result_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics (text exposition format); 404 unless METRICS_ENABLED is set
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+def _check_profile_access(x_profile: Optional[str]) -> None:
+    if not profiling.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    # Profiles expose request data and code paths: no token configured means no access
+    if not config.PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Set PROFILE_TOKEN to access profiles")
+    if not profiling.token_matches(x_profile):
+        raise HTTPException(status_code=403, detail="Send the profiling token in the X-Profile header")
+
+@app.get("/api/admin/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """
+    Recently captured request profiles, newest first
+    """
+    _check_profile_access(x_profile)
+    return [profile.summary() for profile in profiling.profiles.list()]
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(
+    profile_id: int,
+    format: str = Query("pstats", pattern="^(pstats|collapsed)$"),
+    x_profile: Optional[str] = Header(None)
+):
+    """
+    Download a profile: pstats (cProfile, open with pstats/snakeviz) or
+    collapsed stacks (sampling profiler, input for flamegraph.pl/speedscope)
+    """
+    _check_profile_access(x_profile)
+    profile = profiling.profiles.get(profile_id)
+    data = getattr(profile, format, None) if profile is not None else None
+    if data is None:
+        raise HTTPException(status_code=404, detail=f"No {format} profile with id {profile_id}")
+    
+    filename = f"profile-{profile_id}.{'pstats' if format == 'pstats' else 'collapsed.txt'}"
+    return Response(
+        data,
+        media_type="application/octet-stream" if format == "pstats" else "text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _encode_row(row) -> bytes:
+    # Same formatting as FastAPI's JSONResponse
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _encode_rows(rows: List, format: str) -> bytes:
+    if format == "ndjson":
+        return b"".join(_encode_row(row) + b"\n" for row in rows)
+    return b"[" + b",".join(_encode_row(row) for row in rows) + b"]"
+
+async def _stream_rows(rows: AsyncIterator, format: str, flush_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """
+    Encode rows as they arrive, sending the body in chunks of about flush_size bytes
+    """
+    buffer = bytearray(b"[" if format == "json" else b"")
+    first = True
+    async for row in rows:
+        if format == "ndjson":
+            buffer += _encode_row(row) + b"\n"
+        else:
+            buffer += (b"" if first else b",") + _encode_row(row)
+        first = False
+        if len(buffer) >= flush_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if format == "json":
+        buffer += b"]"
+    if buffer:
+        yield bytes(buffer)
 
 @app.get("/api/internships", response_model=List[schemas.InternshipResponse])
-def get_all_internships(db: Session = Depends(get_db)):
+@profiling.profiled
+async def get_all_internships(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = None,
+    fields: Optional[str] = None,
+    sector: Optional[str] = None,
+    location: Optional[str] = None,
+    is_active: bool = True,
+    skills: Optional[str] = None,
+    min_skills: int = Query(1, ge=1),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get all active internships (for admin/testing purposes)
+    Get internships ordered by id (for admin/testing purposes; active ones by default).
+    - limit/after: keyset pagination on id; X-Next-After holds `after` for the next page
+    - fields: comma-separated fields to return (id is always included)
+    - sector/location/is_active: filters applied in SQL
+    - skills: comma-separated; internships requiring at least min_skills of them (any case)
+    - format=ndjson: one JSON object per line
+    Without limit, all matching rows are streamed as they are fetched.
     """
-    internships = crud.get_all_internships(db)
-    return internships
+    try:
+        columns = crud.internship_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    query = crud.internships_query(columns, after, sector, location, is_active, skills, min_skills)
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    
+    if limit is None:
+        return StreamingResponse(_stream_rows(crud.stream_internships_async(query), format), media_type=media_type)
+    
+    rows, next_after = await crud.get_internships_page_async(db, query, limit)
+    headers = {"X-Next-After": str(next_after)} if next_after is not None else {}
+    return Response(_encode_rows(rows, format), media_type=media_type, headers=headers)
 
 @app.post("/api/internships", response_model=schemas.InternshipResponse)
+@profiling.profiled
 def create_internship(
     internship: schemas.InternshipCreate,
     db: Session = Depends(get_db)
@@ -73,127 +281,87 @@ def create_internship(
     """
     return crud.create_internship(db, internship)
 
+@app.post("/api/internships/bulk")
+@profiling.profiled
+async def bulk_create_internships(request: Request, db: Session = Depends(get_db)):
+    """
+    Bulk-create internships from a streamed NDJSON (application/x-ndjson) or CSV (text/csv) body.
+    Rows are validated and inserted in chunked transactions; invalid rows are reported per row.
+    """
+    content_type = request.headers.get("content-type", "application/x-ndjson")
+    if "csv" in content_type:
+        rows = ingest.iter_csv_rows(request.stream())
+    elif "json" in content_type:
+        rows = ingest.iter_ndjson_rows(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv")
+    
+    async def insert_chunk(internships):
+        return await run_in_threadpool(profiling.profiled(crud.create_internships_bulk), db, internships)
+    
+    return await ingest.ingest_rows(rows, insert_chunk)
+
+@app.post("/api/internships/{internship_id}/deactivate", response_model=schemas.InternshipResponse)
+@profiling.profiled
+def deactivate_internship(internship_id: int, db: Session = Depends(get_db)):
+    """
+    Mark an internship inactive so it is no longer recommended
+    """
+    internship = crud.deactivate_internship(db, internship_id)
+    if internship is None:
+        raise HTTPException(status_code=404, detail="Internship not found")
+    return internship
+
+@app.post("/api/profiles", response_model=schemas.SavedProfileResponse)
+@profiling.profiled
+def create_saved_profile(profile: schemas.SavedProfileCreate, db: Session = Depends(get_db)):
+    """
+    Save a student profile; internships added later that score at least its
+    threshold are recorded as matches
+    """
+    return crud.create_saved_profile(db, profile)
+
+@app.get("/api/profiles/{profile_id}", response_model=schemas.SavedProfileResponse)
+@profiling.profiled
+def get_saved_profile(profile_id: int, db: Session = Depends(get_db)):
+    profile = crud.get_saved_profile(db, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+@app.delete("/api/profiles/{profile_id}")
+@profiling.profiled
+def delete_saved_profile(profile_id: int, db: Session = Depends(get_db)):
+    if not crud.delete_saved_profile(db, profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"message": "Profile deleted"}
+
+@app.get("/api/profiles/{profile_id}/matches", response_model=schemas.ProfileMatches)
+@profiling.profiled
+def get_profile_matches(
+    profile_id: int,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Internships matched to a saved profile after match event `since`, oldest first.
+    Poll with since=next_since instead of requesting recommendations again.
+    """
+    if crud.get_saved_profile(db, profile_id) is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return crud.get_profile_matches(db, profile_id, since, limit)
+
 # Optional: Add endpoint to populate dummy data
 @app.post("/api/populate-dummy-data")
+@profiling.profiled
 def populate_dummy_data(db: Session = Depends(get_db)):
     """
     Populate database with dummy internship data
     """
-    dummy_internships = [
-        {
-            "title": "Web Development Intern",
-            "min_education": "Bachelor's",
-            "skills": "HTML, CSS, JavaScript, React, Node.js",
-            "sector": "IT",
-            "location": "Delhi",
-            "duration": "3 months",
-            "no_of_posts": 5,
-            "is_active": True,
-            "description": "Looking for enthusiastic web development interns to work on modern web applications. You will be working with React and Node.js to build scalable solutions."
-        },
-        {
-            "title": "Data Science Intern",
-            "min_education": "Bachelor's",
-            "skills": "Python, Machine Learning, SQL, Pandas, NumPy",
-            "sector": "IT",
-            "location": "Mumbai",
-            "duration": "6 months",
-            "no_of_posts": 3,
-            "is_active": True,
-            "description": "Join our data science team to work on real-world ML projects. Experience with Python and data analysis libraries required."
-        },
-        {
-            "title": "Digital Marketing Intern",
-            "min_education": "12th Pass",
-            "skills": "Social Media Marketing, Content Writing, SEO, Google Analytics",
-            "sector": "Marketing",
-            "location": "Remote",
-            "duration": "3 months",
-            "no_of_posts": 10,
-            "is_active": True,
-            "description": "Help us grow our digital presence through social media campaigns and content marketing strategies."
-        },
-        {
-            "title": "Finance Analyst Intern",
-            "min_education": "Bachelor's",
-            "skills": "Excel, Financial Analysis, Accounting, Tally",
-            "sector": "Finance",
-            "location": "Bangalore",
-            "duration": "4 months",
-            "no_of_posts": 2,
-            "is_active": True,
-            "description": "Assist in financial planning, budgeting, and analysis. Strong Excel skills and understanding of financial concepts required."
-        },
-        {
-            "title": "Mobile App Development Intern",
-            "min_education": "Bachelor's",
-            "skills": "Flutter, React Native, Mobile Development, JavaScript",
-            "sector": "IT",
-            "location": "Hyderabad",
-            "duration": "6 months",
-            "no_of_posts": 4,
-            "is_active": True,
-            "description": "Develop cross-platform mobile applications using Flutter or React Native. Work on innovative mobile solutions."
-        },
-        {
-            "title": "Content Writing Intern",
-            "min_education": "12th Pass",
-            "skills": "Content Writing, Research, SEO Writing, Blogging",
-            "sector": "Marketing",
-            "location": "Remote",
-            "duration": "2 months",
-            "no_of_posts": 8,
-            "is_active": True,
-            "description": "Create engaging content for blogs, websites, and social media. Strong writing and research skills needed."
-        },
-        {
-            "title": "HR Management Intern",
-            "min_education": "Bachelor's",
-            "skills": "Recruitment, Communication, MS Office, HR Policies",
-            "sector": "HR",
-            "location": "Delhi",
-            "duration": "3 months",
-            "no_of_posts": 2,
-            "is_active": True,
-            "description": "Support HR team in recruitment, onboarding, and employee engagement activities."
-        },
-        {
-            "title": "Graphic Design Intern",
-            "min_education": "Diploma",
-            "skills": "Photoshop, Illustrator, Canva, UI/UX Design",
-            "sector": "Design",
-            "location": "Mumbai",
-            "duration": "3 months",
-            "no_of_posts": 3,
-            "is_active": True,
-            "description": "Create visual content for digital and print media. Experience with design software required."
-        },
-        {
-            "title": "Backend Development Intern",
-            "min_education": "Bachelor's",
-            "skills": "Python, Django, FastAPI, PostgreSQL, REST APIs",
-            "sector": "IT",
-            "location": "Pune",
-            "duration": "4 months",
-            "no_of_posts": 3,
-            "is_active": True,
-            "description": "Build robust backend systems and APIs using Python frameworks. Database knowledge essential."
-        },
-        {
-            "title": "Sales & Marketing Intern",
-            "min_education": "12th Pass",
-            "skills": "Sales, Communication, Customer Service, MS Office",
-            "sector": "Sales",
-            "location": "Chennai",
-            "duration": "3 months",
-            "no_of_posts": 6,
-            "is_active": True,
-            "description": "Support sales team in lead generation and customer relationship management."
-        }
-    ]
     
     created_count = 0
-    for internship_data in dummy_internships:
+    for internship_data in DUMMY_INTERNSHIPS:
         try:
             internship = schemas.InternshipCreate(**internship_data)
             crud.create_internship(db, internship)
@@ -204,13 +372,19 @@ def populate_dummy_data(db: Session = Depends(get_db)):
     return {"message": f"Successfully created {created_count} dummy internships"}
 
 @app.delete("/api/clear-database")
+@profiling.profiled
 def clear_database(db: Session = Depends(get_db)):
     """
     WARNING: Deletes all data from all tables. Use only for development/testing!
     """
     try:
+        db.query(models.ProfileMatch).delete()
+        db.query(models.SavedProfile).delete()
+        db.execute(models.internship_skills.delete())
         db.query(models.Internship).delete()
+        db.query(models.Skill).delete()
         db.commit()
+        catalog.clear()
         return {"message": "All internship entries deleted"}
     except Exception as e:
         db.rollback()
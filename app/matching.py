@@ -0,0 +1,166 @@
+# app/matching.py
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from . import metrics, models
+from .scoring import EDUCATION_HIERARCHY, EDUCATION_MATCH_WEIGHT, LOCATION_MATCH_WEIGHT, PERFECT_MATCH_BONUS, SECTOR_MATCH_WEIGHT, SKILL_MATCH_WEIGHT, calculate_total_score
+from .similarity import tokenize
+
+# Denominator calculate_rule_based_score normalizes by
+MAX_POSSIBLE_RULE_SCORE = SKILL_MATCH_WEIGHT + SECTOR_MATCH_WEIGHT + LOCATION_MATCH_WEIGHT + EDUCATION_MATCH_WEIGHT + PERFECT_MATCH_BONUS
+
+# Slack for float rounding between the vectorized estimates and calculate_total_score
+SCORE_TOLERANCE = 1e-6
+
+
+def profile_data(profile: models.SavedProfile) -> Dict:
+    """
+    StudentForm fields of a saved profile, as calculate_total_score expects them
+    """
+    return {
+        "education": profile.education,
+        "skills": list(profile.skills),
+        "sector": profile.sector,
+        "preferred_location": profile.preferred_location,
+        "description": profile.description,
+    }
+
+
+class ProfileIndex:
+    """
+    Saved profiles indexed by sector, preferred location, skill and description word.
+
+    An internship is scored against every profile at once: the postings of
+    its own sector, location, skills and words give the per-profile matches,
+    from which the rule-based and Jaccard scores follow with a few array
+    operations. Only the profiles whose estimate reaches their threshold are
+    scored with calculate_total_score, which decides the match.
+    """
+
+    def __init__(self, profiles: Iterable[models.SavedProfile] = ()):
+        profiles = list(profiles)
+        self.ids = np.array([profile.id for profile in profiles], dtype=np.int64)
+        self.thresholds = np.array([profile.threshold for profile in profiles], dtype=np.float64)
+        self.data = [profile_data(profile) for profile in profiles]
+        self.education_levels = np.array([EDUCATION_HIERARCHY.get(data["education"], 0) for data in self.data], dtype=np.int64)
+        self.word_counts = np.array([len(tokenize(data["description"])) for data in self.data], dtype=np.float64)
+        postings = defaultdict(list)
+        for position, data in enumerate(self.data):
+            keys = {("sector", data["sector"].lower()), ("location", data["preferred_location"].lower())}
+            keys.update(("skill", skill.strip().lower()) for skill in data["skills"])
+            keys.update(("word", word) for word in tokenize(data["description"]))
+            for key in keys:
+                postings[key].append(position)
+        self.postings = {key: np.array(positions, dtype=np.int64) for key, positions in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _hits(self, kind: str, values: Iterable[str]) -> np.ndarray:
+        """
+        Number of the values each profile has
+        """
+        hits = np.zeros(len(self.ids), dtype=np.float64)
+        for value in values:
+            positions = self.postings.get((kind, value))
+            if positions is not None:
+                hits[positions] += 1
+        return hits
+
+    def estimated_scores(self, internship) -> np.ndarray:
+        """
+        calculate_total_score of the internship for every profile, up to float rounding
+        """
+        # 1. Rule-based score, in the order calculate_rule_based_score adds it up
+        internship_skills = set(skill.strip().lower() for skill in internship.skills.split(','))
+        skill_match_ratio = self._hits("skill", internship_skills) / len(internship_skills)
+        sector_match = self._hits("sector", [internship.sector.lower()]) > 0
+        location_match = self._hits("location", [internship.location.lower()]) > 0
+        required_edu_level = EDUCATION_HIERARCHY.get(internship.min_education, 0)
+        education_met = self.education_levels >= required_edu_level
+        
+        score = skill_match_ratio * SKILL_MATCH_WEIGHT + sector_match * SECTOR_MATCH_WEIGHT
+        remote_score = LOCATION_MATCH_WEIGHT * 0.5 if internship.location.lower() == "remote" else 0
+        score += np.where(location_match, LOCATION_MATCH_WEIGHT, remote_score)
+        score += np.where(education_met, EDUCATION_MATCH_WEIGHT,
+                          np.where(self.education_levels == required_edu_level - 1, EDUCATION_MATCH_WEIGHT * 0.5, 0))
+        score += ((skill_match_ratio >= 0.8) & sector_match & location_match & education_met) * PERFECT_MATCH_BONUS
+        rule_score = score / MAX_POSSIBLE_RULE_SCORE * 60
+        
+        # 2. Jaccard similarity of the description word sets, out of 40
+        words = tokenize(internship.description)
+        intersection = self._hits("word", words)
+        union = self.word_counts + len(words) - intersection
+        similarity = np.zeros(len(self.ids), dtype=np.float64)
+        if words:
+            np.divide(intersection, union, out=similarity, where=self.word_counts > 0)
+        return np.minimum(rule_score + similarity * 40, 100)
+
+    def matches(self, internships: Iterable) -> List[Tuple[int, int, float]]:
+        """
+        (profile id, internship id, score) of every profile an internship reaches the threshold of
+        """
+        found = []
+        for internship in internships:
+            estimates = self.estimated_scores(internship)
+            for position in np.flatnonzero(estimates >= self.thresholds - SCORE_TOLERANCE).tolist():
+                score = calculate_total_score(internship, self.data[position])
+                if score >= self.thresholds[position]:
+                    found.append((int(self.ids[position]), internship.id, score))
+        return found
+
+
+class ProfileIndexCache:
+    """
+    ProfileIndex of the saved profiles, rebuilt when they change.
+
+    Profile ids are never reused, so (count, max id) changes with every
+    create or delete, including those made by other workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bind = None
+        self._fingerprint: Optional[Tuple[int, int]] = None
+        self._index = ProfileIndex()
+
+    def current(self, db: Session) -> ProfileIndex:
+        fingerprint = tuple(db.execute(
+            select(func.count(models.SavedProfile.id), func.coalesce(func.max(models.SavedProfile.id), 0))
+        ).one())
+        bind = db.get_bind()
+        with self._lock:
+            if fingerprint != self._fingerprint or bind is not self._bind:
+                self._index = ProfileIndex(db.scalars(select(models.SavedProfile)).all())
+                self._bind, self._fingerprint = bind, fingerprint
+            return self._index
+
+
+profile_index = ProfileIndexCache()
+
+
+def record_matches(db: Session, internships: Iterable) -> int:
+    """
+    Score new internships against the saved profiles and store a match event
+    for each profile whose threshold is reached. Returns the number of events.
+    """
+    internships = [internship for internship in internships if internship.is_active]
+    if not internships:
+        return 0
+    index = profile_index.current(db)
+    if not len(index):
+        return 0
+
+    found = index.matches(internships)
+    if found:
+        db.execute(insert(models.ProfileMatch), [
+            {"profile_id": profile_id, "internship_id": internship_id, "score": score}
+            for profile_id, internship_id, score in found
+        ])
+        db.commit()
+    if metrics.enabled:
+        metrics.profile_matches.inc(amount=len(found))
+    return len(found)
@@ -0,0 +1,272 @@
+# app/metrics.py
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+from . import config
+from .admission import admission, single_flight
+from .catalog import catalog
+
+# Instrumentation is skipped entirely while this is False
+enabled = config.METRICS_ENABLED
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Candidate count buckets
+SIZE_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """
+    Monotonic counter, optionally split by label values
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time. With labels, the callback
+    returns {label values: value}; kind="counter" exposes a count kept elsewhere.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable, labels: Tuple[str, ...] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labels = labels
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        if not self.labels:
+            return [f"{self.name} {_format_value(self.read())}"]
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in sorted(self.read().items())]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, optionally split by label values
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, *label_values) -> int:
+        entry = self._values.get(label_values)
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+stage_duration = registry.register(Histogram(
+    "pipeline_stage_duration_seconds", "Time spent per pipeline stage", ("stage",)
+))
+recommendation_requests = registry.register(Counter(
+    "recommendation_requests_total", "Recommendation pages requested, by result cache outcome", ("cache",)
+))
+candidates_scored = registry.register(Histogram(
+    "recommendation_candidates_scored", "Candidates scored per recommendation request", buckets=SIZE_BUCKETS
+))
+candidates_above_zero = registry.register(Histogram(
+    "recommendation_candidates_above_zero", "Candidates with a positive score per recommendation request", buckets=SIZE_BUCKETS
+))
+candidates_reranked = registry.register(Histogram(
+    "recommendation_candidates_reranked", "Candidates rescored by the re-ranker per two-stage request", buckets=SIZE_BUCKETS
+))
+candidates_pruned = registry.register(Histogram(
+    "recommendation_candidates_pruned", "Candidates skipped by score upper-bound pruning per request", buckets=SIZE_BUCKETS
+))
+rerank_budget_exhausted = registry.register(Counter(
+    "recommendation_rerank_budget_exhausted_total", "Two-stage requests that fell back to retrieval order"
+))
+profile_matches = registry.register(Counter(
+    "saved_profile_matches_total", "Match events recorded for saved profiles on internship insert"
+))
+admission_queue_depth = registry.register(Gauge(
+    "recommendation_admission_queue_depth", "Recommendation requests waiting for a scoring slot", lambda: admission.depth
+))
+admission_active = registry.register(Gauge(
+    "recommendation_admission_active", "Recommendation requests holding a scoring slot", lambda: admission.active
+))
+requests_coalesced = registry.register(Gauge(
+    "recommendation_requests_coalesced_total", "Recommendation requests that shared an identical in-flight request's result",
+    lambda: single_flight.coalesced, kind="counter"
+))
+requests_shed = registry.register(Gauge(
+    "recommendation_requests_shed_total", "Recommendation requests rejected with 503, by reason",
+    lambda: {(reason,): count for reason, count in admission.shed.items()}, ("reason",), kind="counter"
+))
+catalog_size = registry.register(Gauge(
+    "catalog_size", "Active internships in the loaded catalog snapshot", lambda: catalog.size
+))
+
+# Stage timings of the current request, reported in the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_timings", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        stage_duration.observe(elapsed, self.name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + elapsed
+
+
+_DISABLED = nullcontext()
+
+
+def stage(name: str):
+    """
+    Context manager timing one pipeline stage; a no-op while metrics are disabled
+    """
+    return _Stage(name) if enabled else _DISABLED
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """
+    Server-Timing header value, durations in milliseconds
+    """
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing HTTP requests and adding a Server-Timing header.
+    Requests pass straight through while metrics are disabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(timings, time.perf_counter() - started)
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"server-timing", header.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Label by route template so ids in paths don't create new series
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_requests.inc(scope["method"], route, str(status))
+            http_duration.observe(time.perf_counter() - started, scope["method"], route)
@@ -0,0 +1,55 @@
+# app/migrations.py
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from . import crud, models
+
+# Internships backfilled per transaction
+BACKFILL_BATCH_SIZE = 1000
+
+# Stored in PRAGMA user_version once a database is fully migrated
+SCHEMA_VERSION = 2
+
+def migrate(bind: Engine) -> int:
+    """
+    Bring a database up to the current schema. Safe to run on every startup.
+
+    Creates missing tables and indexes, then backfills the normalized skill
+    tables from Internship.skills for rows that have no skill links yet.
+    Returns the number of internships backfilled. A database already at
+    SCHEMA_VERSION is left alone, so worker startup costs one query.
+    """
+    with bind.connect() as connection:
+        if connection.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION:
+            return 0
+
+    models.Base.metadata.create_all(bind=bind)
+    # create_all does not add new indexes to tables that already exist
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    
+    linked = select(models.internship_skills.c.internship_id)
+    backfilled = 0
+    last_id = 0
+    with Session(bind) as db:
+        while True:
+            rows = db.execute(
+                select(models.Internship.id, models.Internship.skills)
+                .where(models.Internship.id > last_id, models.Internship.id.not_in(linked))
+                .order_by(models.Internship.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            crud.link_skills(db, rows)
+            db.commit()
+            backfilled += len(rows)
+            last_id = rows[-1][0]
+    with bind.begin() as connection:
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return backfilled
+
+if __name__ == "__main__":
+    from .database import engine
+    print(f"Backfilled skills for {migrate(engine)} internships")
@@ -1,17 +1,72 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, Text
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Index, Integer, String, Boolean, Table, Text, func
+from sqlalchemy.orm import relationship
 from .database import Base
 
+# Internship <-> skill association
+internship_skills = Table(
+    "internship_skills",
+    Base.metadata,
+    Column("internship_id", Integer, ForeignKey("internships.id", ondelete="CASCADE"), primary_key=True),
+    Column("skill_id", Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_internship_skills_skill_id", "skill_id", "internship_id"),
+)
+
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False, unique=True)  # Canonical lowercase name, e.g. "machine learning"
+
 class Internship(Base):
     __tablename__ = "internships"
+    __table_args__ = (
+        Index("ix_internships_active_sector", "is_active", "sector"),
+        Index("ix_internships_active_location", "is_active", "location"),
+        Index("ix_internships_active_min_education", "is_active", "min_education"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     min_education = Column(String(100), nullable=False)  # e.g., "Bachelor's", "Master's", "12th Pass"
-    skills = Column(Text, nullable=False)  # Comma-separated skills
+    skills = Column(Text, nullable=False)  # Comma-separated skills, as entered (normalized copy in skill_set)
     sector = Column(String(100), nullable=False)  # e.g., "IT", "Finance", "Marketing"
     location = Column(String(100), nullable=False)  # e.g., "Delhi", "Mumbai", "Remote"
     duration = Column(String(50), nullable=False)  # e.g., "3 months", "6 months"
     no_of_posts = Column(Integer, default=1)
     is_active = Column(Boolean, default=True)
-    description = Column(Text, nullable=False)  # Detailed roles and responsibilities
\ No newline at end of file
+    description = Column(Text, nullable=False)  # Detailed roles and responsibilities
+    
+    skill_set = relationship("Skill", secondary=internship_skills)
+
+class SavedProfile(Base):
+    __tablename__ = "saved_profiles"
+    __table_args__ = {"sqlite_autoincrement": True}  # Ids are never reused
+    
+    id = Column(Integer, primary_key=True)
+    education = Column(String(100), nullable=False)
+    skills = Column(JSON, nullable=False)  # List of skills, as entered
+    sector = Column(String(100), nullable=False)
+    preferred_location = Column(String(100), nullable=False)
+    description = Column(Text, nullable=False)
+    threshold = Column(Float, nullable=False)  # Lowest match score recorded as a match
+    created_at = Column(DateTime, server_default=func.now())
+
+class ProfileMatch(Base):
+    __tablename__ = "profile_matches"
+    __table_args__ = (
+        Index("ix_profile_matches_profile_id", "profile_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+    
+    id = Column(Integer, primary_key=True)  # Increasing, used as the "since" cursor
+    profile_id = Column(Integer, ForeignKey("saved_profiles.id", ondelete="CASCADE"), nullable=False)
+    internship_id = Column(Integer, ForeignKey("internships.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+def canonical_skills(skills: str) -> set:
+    """
+    Canonical skill names of a comma-separated skills string
+    """
+    return set(name for name in (skill.strip().lower() for skill in skills.split(',')) if name)
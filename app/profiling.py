@@ -0,0 +1,294 @@
+# app/profiling.py
+import contextvars
+import cProfile
+import functools
+import inspect
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from . import config
+
+# Nothing is profiled while this is False
+enabled = config.PROFILING_ENABLED
+
+PROFILERS = ("cprofile", "sampling")
+
+
+@dataclass
+class Profile:
+    """
+    A finished request profile kept in the ring
+    """
+    id: int
+    method: str
+    path: str
+    trigger: str
+    profiler: str
+    started_at: float
+    duration_ms: float
+    pstats: Optional[bytes] = field(default=None, repr=False)
+    collapsed: Optional[str] = field(default=None, repr=False)
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "profiler": self.profiler,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "formats": [name for name in ("pstats", "collapsed") if getattr(self, name) is not None],
+        }
+
+
+# Threads with a cProfile.Profile enabled; only one can be active per thread,
+# so concurrent sampled requests on the event loop thread don't nest them
+_cprofile_threads = set()
+_cprofile_lock = threading.Lock()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class ProfileSession:
+    """
+    Profiling state of one sampled request.
+
+    With "cprofile" every thread running the request's handler or offloaded
+    work gets its own cProfile.Profile; they are merged when the request ends.
+    With "sampling" a background thread records the stacks of those threads
+    every `interval` seconds as collapsed stacks (flame graph input).
+    """
+
+    def __init__(self, profiler: str, interval: float):
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler}")
+        self.profiler = profiler
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        self._threads: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.profiler == "sampling":
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def _enter(self) -> Optional[cProfile.Profile]:
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] += 1
+            nested = self._threads[thread_id] > 1
+        if self.profiler != "cprofile" or nested:
+            return None
+        with _cprofile_lock:
+            if thread_id in _cprofile_threads:
+                return None
+            _cprofile_threads.add(thread_id)
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _exit(self, profile: Optional[cProfile.Profile]) -> None:
+        thread_id = threading.get_ident()
+        if profile is not None:
+            profile.disable()
+            with _cprofile_lock:
+                _cprofile_threads.discard(thread_id)
+        with self._lock:
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+            if profile is not None:
+                self._profiles.append(profile)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        profile = self._enter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._exit(profile)
+
+    async def call_async(self, fn: Callable, *args, **kwargs):
+        # On the event loop thread cProfile also sees other requests' coroutines
+        profile = self._enter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self._exit(profile)
+
+    def pstats_bytes(self) -> Optional[bytes]:
+        """
+        Merged profiles in the format written by pstats.Stats.dump_stats
+        """
+        if not self._profiles:
+            return None
+        stats = pstats.Stats(self._profiles[0])
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        return marshal.dumps(stats.stats)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+# Session of the request being handled, None for requests that are not sampled
+_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def profiled(fn: Callable) -> Callable:
+    """
+    Decorator profiling `fn` when it runs inside a sampled request.
+    Works for handlers and for work offloaded to the threadpool, which
+    inherits the request's context.
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            session = _session.get()
+            if session is None:
+                return await fn(*args, **kwargs)
+            return await session.call_async(fn, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        session = _session.get()
+        if session is None:
+            return fn(*args, **kwargs)
+        return session.call(fn, *args, **kwargs)
+    return wrapper
+
+
+class ProfileStore:
+    """
+    Bounded ring of the most recent request profiles
+    """
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._profiles: "deque[Profile]" = deque(maxlen=size)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfileStore(config.PROFILE_RING_SIZE)
+
+
+def token_matches(value: Optional[str]) -> bool:
+    return bool(config.PROFILE_TOKEN) and value == config.PROFILE_TOKEN
+
+
+def _trigger(scope) -> Optional[str]:
+    """
+    Why this request is profiled ("header", "query", "sample") or None
+    """
+    if config.PROFILE_TOKEN:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile" and token_matches(value.decode("latin-1")):
+                return "header"
+        query = scope.get("query_string", b"").decode("latin-1")
+        if any(token_matches(part[len("profile="):]) for part in query.split("&") if part.startswith("profile=")):
+            return "query"
+    if config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware choosing which requests to profile: those sending the
+    X-Profile header or ?profile= query flag with PROFILE_TOKEN, and a
+    PROFILE_SAMPLE_RATE fraction of all requests. Handlers decorated with
+    `profiled` only pay for profiling on those requests. Profiled responses
+    get an X-Profile-Id header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        trigger = _trigger(scope) if enabled and scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(config.PROFILER, config.PROFILE_SAMPLE_INTERVAL)
+        profile_id = profiles.next_id()
+        token = _session.set(session)
+        started_at, started = time.time(), time.perf_counter()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", str(profile_id).encode())]
+                message = dict(message, headers=headers)
+            await send(message)
+
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            session.stop()
+            _session.reset(token)
+            profiles.add(Profile(
+                id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                trigger=trigger,
+                profiler=session.profiler,
+                started_at=started_at,
+                duration_ms=round((time.perf_counter() - started) * 1000, 3),
+                pstats=session.pstats_bytes(),
+                collapsed=session.collapsed() if session.profiler == "sampling" else None,
+            ))
@@ -0,0 +1,95 @@
+# app/pruning.py
+from typing import Dict, Optional, Tuple
+import numpy as np
+from . import config
+from .catalog import CatalogSnapshot
+from .ranking import Cursor, after_cursor
+from .similarity import DescriptionIndex, tokenize
+
+# Candidates scored in the first step, best upper bounds first; later steps double it
+BLOCK_SIZE = 256
+
+
+def description_bounds(description_index: DescriptionIndex, tokens, positions: np.ndarray, mode: str) -> np.ndarray:
+    """
+    Upper bound of the description score (out of 40) of each position.
+
+    For Jaccard, |A & B| <= min(|A|, known query words) and |A | B| >= max(|A|, |B|),
+    so the word-set sizes alone bound the similarity. tfidf/bm25 are only bounded by 1.
+    """
+    if mode != "jaccard":
+        return np.full(len(positions), 40.0)
+    if not tokens:
+        return np.zeros(len(positions))
+    known = sum(1 for token in tokens if token in description_index.token_ids)
+    sizes = description_index.set_sizes[positions]
+    bounds = np.zeros(len(positions))
+    nonempty = sizes > 0
+    bounds[nonempty] = np.minimum(sizes[nonempty], known) / np.maximum(sizes[nonempty], len(tokens))
+    return bounds * 40
+
+
+def pruned_scores(
+    snapshot: CatalogSnapshot,
+    student_data: Dict,
+    positions: np.ndarray,
+    rule_scores: np.ndarray,
+    k: int,
+    cursor: Optional[Cursor] = None,
+    mode: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray, Dict, bool]:
+    """
+    Total scores of the candidates that can still reach the top k.
+
+    Candidates are visited by decreasing upper bound (exact rule score plus
+    the description bound), in blocks. Candidates whose bound is below the
+    k-th best total score among the visited ones ranked after `cursor` can't
+    enter the page, and their descriptions are never scored. Returns the visited positions (ascending), their total scores,
+    the candidate counts and whether a pruned candidate ranks after this page.
+    """
+    mode = mode or config.DESCRIPTION_SIMILARITY_MODE
+    description_index = snapshot.derived(DescriptionIndex)
+    tokens = tokenize(student_data["description"])
+    bounds = np.minimum(rule_scores + description_bounds(description_index, tokens, positions, mode), 100)
+
+    def ml_scores(selected: np.ndarray) -> np.ndarray:
+        if mode == "jaccard":
+            return description_index.jaccard_at(tokens, positions[selected]) * 40
+        return description_index.scores(student_data["description"], positions[selected], mode)
+
+    total_scores = np.zeros(len(positions))
+    visited = np.zeros(len(positions), dtype=bool)
+    pending = np.arange(len(positions))
+    # Best k total scores of visited candidates ranked after the cursor
+    best = np.zeros(0)
+    block_size = BLOCK_SIZE
+    while len(pending):
+        if k > 0 and len(best) >= k:
+            # Ties can still win on position, so only strictly lower bounds are pruned
+            pending = pending[bounds[pending] >= best.min()]
+            if not len(pending):
+                break
+        # Highest bounds first, in growing blocks (no full sort)
+        if len(pending) > block_size:
+            split = np.argpartition(-bounds[pending], block_size)
+            block, pending = pending[split[:block_size]], pending[split[block_size:]]
+        else:
+            block, pending = pending, pending[:0]
+        scores = np.minimum(rule_scores[block] + ml_scores(block), 100)  # Cap at 100
+        total_scores[block] = scores
+        visited[block] = True
+        eligible = (scores > 0) & after_cursor(positions[block], scores, cursor)
+        best = np.concatenate([best, scores[eligible]])
+        if k > 0 and len(best) > k:
+            best = np.partition(best, len(best) - k)[len(best) - k:]
+        block_size *= 2
+
+    kept = np.flatnonzero(visited)
+    pruned = np.flatnonzero(~visited)
+    # Pruned candidates score below this page: the next page exists if any of them scores at all
+    more = bool(np.any(rule_scores[pruned] > 0))
+    if not more:
+        no_rule_score = pruned[bounds[pruned] > 0]
+        more = len(no_rule_score) > 0 and bool(np.any(ml_scores(no_rule_score) > 0))
+    stats = {"retrieved": len(positions), "scored": len(kept), "pruned": len(pruned)}
+    return positions[kept], total_scores[kept], stats, more
@@ -0,0 +1,73 @@
+# app/ranking.py
+import base64
+import json
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+
+
+class InvalidCursorError(ValueError):
+    """
+    Raised for malformed cursors or cursors issued for another catalog version
+    """
+
+
+class Cursor(NamedTuple):
+    """
+    Position in a ranking: everything ranked after (score, position) comes next
+    """
+    version: int
+    score: float
+    position: int
+
+    def encode(self) -> str:
+        payload = json.dumps({"v": self.version, "s": self.score, "p": self.position})
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def parse(cls, token: str) -> "Cursor":
+        """
+        Cursor of a token, whatever version it was issued for
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return cls(int(payload["v"]), float(payload["s"]), int(payload["p"]))
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+
+    @classmethod
+    def decode(cls, token: str, version: int) -> "Cursor":
+        cursor = cls.parse(token)
+        if cursor.version != version:
+            raise InvalidCursorError("Cursor is stale, the catalog has changed since it was issued")
+        return cursor
+
+
+def after_cursor(positions: np.ndarray, scores: np.ndarray, cursor: Optional[Cursor]) -> np.ndarray:
+    """
+    Mask of entries ranked after the cursor (score descending, then position)
+    """
+    if cursor is None:
+        return np.ones(len(positions), dtype=bool)
+    return (scores < cursor.score) | ((scores == cursor.score) & (positions > cursor.position))
+
+
+def top_k(positions: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k best (position, score) pairs, ordered by score descending then position.
+
+    Uses a partial partition so only the k selected entries are ever sorted.
+    Positions must be ascending so ties keep catalog order, like a stable sort.
+    """
+    if k <= 0 or len(scores) == 0:
+        return positions[:0], scores[:0]
+    if len(scores) > k:
+        kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth_score)
+        # Ties at the boundary are resolved by position, earliest first
+        tied = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        selected = np.concatenate([above, tied])
+    else:
+        selected = np.arange(len(scores))
+    order = selected[np.lexsort((positions[selected], -scores[selected]))]
+    return positions[order], scores[order]
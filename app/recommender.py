@@ -0,0 +1,112 @@
+# app/recommender.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import numpy as np
+from . import config, metrics, schemas
+from .batch_scoring import BatchScorer
+from .catalog import CatalogSnapshot
+from .index import InvertedIndex
+from .pruning import pruned_scores
+from .ranking import Cursor, after_cursor, top_k
+from .rerank import two_stage
+from .sharding import shard_pool, sharded
+from .similarity import DescriptionIndex
+
+
+@dataclass
+class RecommendationPage:
+    recommendations: List[Dict]
+    next_cursor: Optional[str] = None
+    # Candidate counts per stage of the two-stage or pruned pipeline (None otherwise)
+    pipeline: Optional[Dict] = None
+    # Snapshot the page was ranked in, to serialize it from (None for pages from the shared cache)
+    snapshot: Optional[CatalogSnapshot] = field(default=None, repr=False, compare=False)
+
+
+def recommend(snapshot: CatalogSnapshot, student_form: schemas.StudentForm, k: int = 5, cursor: Optional[str] = None) -> RecommendationPage:
+    """
+    Rank the snapshot for a student profile and return a page of k recommendations
+    """
+    start = Cursor.decode(cursor, snapshot.version) if cursor else None
+    
+    # Convert student form to dict for scoring
+    student_data = {
+        "education": student_form.education,
+        "skills": student_form.skills,
+        "sector": student_form.sector,
+        "preferred_location": student_form.preferred_location,
+        "description": student_form.description
+    }
+    
+    # Large catalogs can be scored by shard worker processes instead, with the same result
+    merged = None
+    if sharded(snapshot):
+        with metrics.stage("scoring"):
+            merged = shard_pool.top_k(snapshot, student_data, k, start, config.SHARD_COUNT)
+    
+    pipeline = None
+    pruned_more = False
+    if merged is not None:
+        top_positions, top_scores = merged.positions, merged.scores
+        candidate_count, above_zero_count, eligible_count = merged.candidates, merged.above_zero, merged.eligible
+    else:
+        # Only internships sharing at least one scoring signal with the student can score > 0
+        with metrics.stage("candidates"):
+            candidates = snapshot.derived(InvertedIndex).candidates(student_data, len(snapshot))
+        
+        # Rule-based and description scores for all candidates at once
+        with metrics.stage("scoring"):
+            positions = np.asarray(candidates, dtype=np.int64)
+            rule_scores = snapshot.derived(BatchScorer).rule_scores(student_data, positions)
+            if config.RERANK_CANDIDATES > 0:
+                # Description similarity only for the best candidates by rule score
+                positions, total_scores, pipeline = two_stage(snapshot, student_data, positions, rule_scores)
+            elif config.SCORE_PRUNING:
+                # Description similarity only for candidates whose upper bound can still make the page
+                positions, total_scores, pipeline, pruned_more = pruned_scores(snapshot, student_data, positions, rule_scores, k, start)
+            else:
+                ml_scores = snapshot.derived(DescriptionIndex).scores(student_data["description"], positions)
+                total_scores = np.minimum(rule_scores + ml_scores, 100)  # Cap at 100
+        
+        with metrics.stage("ranking"):
+            # Only include internships with score > 0 that rank after the cursor
+            above_zero = total_scores > 0
+            eligible = above_zero & after_cursor(positions, total_scores, start)
+            positions, total_scores = positions[eligible], total_scores[eligible]
+            
+            # Select the top k without sorting the whole candidate list
+            # (in production, here you would apply ML model for better ranking)
+            top_positions, top_scores = top_k(positions, total_scores, k)
+        candidate_count, above_zero_count, eligible_count = len(candidates), int(np.count_nonzero(above_zero)), len(positions)
+    
+    if metrics.enabled:
+        metrics.candidates_scored.observe(candidate_count)
+        metrics.candidates_above_zero.observe(above_zero_count)
+        if pipeline is not None and "reranked" in pipeline:
+            metrics.candidates_reranked.observe(pipeline["reranked"])
+            if pipeline["budget_exhausted"]:
+                metrics.rerank_budget_exhausted.inc()
+        if pipeline is not None and "pruned" in pipeline:
+            metrics.candidates_pruned.observe(pipeline["pruned"])
+    
+    # Format response
+    with metrics.stage("format"):
+        recommendations = []
+        for position, score in zip(top_positions.tolist(), top_scores.tolist()):
+            internship = snapshot.records[position]
+            recommendations.append({
+                "id": internship.id,
+                "title": internship.title,
+                "sector": internship.sector,
+                "location": internship.location,
+                "skills": internship.skills,
+                "duration": internship.duration,
+                "description": internship.description,
+                "match_score": round(score, 2)
+            })
+    
+    next_cursor = None
+    if (eligible_count > len(top_positions) or pruned_more) and recommendations:
+        next_cursor = Cursor(snapshot.version, top_scores[-1].item(), top_positions[-1].item()).encode()
+    
+    return RecommendationPage(recommendations, next_cursor, pipeline, snapshot)
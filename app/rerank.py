@@ -0,0 +1,123 @@
+# app/rerank.py
+import time
+from typing import Dict, Optional, Tuple, Type
+import numpy as np
+from . import ann, config
+from .catalog import CatalogSnapshot
+from .ranking import top_k
+from .similarity import DescriptionIndex
+
+
+class Reranker:
+    """
+    Second pipeline stage: rescores the candidates kept by retrieval with an
+    expensive scorer. Implementations should check `deadline` (a
+    time.perf_counter() value) between units of work and return None once it
+    has passed, in which case the request keeps the retrieval order.
+    """
+    name = ""
+
+    def rerank(
+        self,
+        snapshot: CatalogSnapshot,
+        student_data: Dict,
+        positions: np.ndarray,
+        stage_one_scores: np.ndarray,
+        deadline: float
+    ) -> Optional[np.ndarray]:
+        """
+        Final scores (0-100) for `positions`, or None if the budget ran out
+        """
+        raise NotImplementedError
+
+
+class DescriptionReranker(Reranker):
+    """
+    Adds the description similarity (DESCRIPTION_SIMILARITY_MODE) to the
+    rule-based retrieval score, like the single-stage pipeline does
+    """
+    name = "description"
+    chunk_size = 512
+
+    def rerank(self, snapshot, student_data, positions, stage_one_scores, deadline):
+        description_index = snapshot.derived(DescriptionIndex)
+        ml_scores = np.empty(len(positions))
+        for start in range(0, len(positions), self.chunk_size):
+            if time.perf_counter() > deadline:
+                return None
+            chunk = positions[start:start + self.chunk_size]
+            ml_scores[start:start + len(chunk)] = description_index.scores(student_data["description"], chunk)
+        return np.minimum(stage_one_scores + ml_scores, 100)  # Cap at 100
+
+
+RERANKERS: Dict[str, Type[Reranker]] = {}
+
+
+def register_reranker(reranker: Type[Reranker]) -> Type[Reranker]:
+    """
+    Make a Reranker subclass selectable by name through the RERANKER setting
+    """
+    RERANKERS[reranker.name] = reranker
+    return reranker
+
+
+register_reranker(DescriptionReranker)
+
+
+def get_reranker(name: str) -> Reranker:
+    try:
+        return RERANKERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown reranker: {name}")
+
+
+def two_stage(
+    snapshot: CatalogSnapshot,
+    student_data: Dict,
+    positions: np.ndarray,
+    rule_scores: np.ndarray,
+    candidates: Optional[int] = None,
+    reranker: Optional[str] = None,
+    budget_ms: Optional[float] = None,
+    ann_candidates: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """
+    Keep the `candidates` best positions by rule score, plus the
+    `ann_candidates` best description matches from the ANN index, then rerank
+    only those within `budget_ms`. Returns the kept positions (ascending),
+    their final scores and the candidate count of each stage.
+    """
+    candidates = candidates or config.RERANK_CANDIDATES
+    ann_candidates = config.RERANK_ANN_CANDIDATES if ann_candidates is None else ann_candidates
+    budget_ms = config.RERANK_BUDGET_MS if budget_ms is None else budget_ms
+    deadline = time.perf_counter() + budget_ms / 1000
+
+    # 1. Retrieval: cheap rule-based scores pick the candidates
+    kept_positions, kept_scores = top_k(positions, rule_scores, candidates)
+    ann_added = 0
+    if ann_candidates > 0:
+        # Strong description matches can have a low rule score
+        matches, _ = ann.search(snapshot, student_data["description"], ann_candidates)
+        matches = matches[np.isin(matches, positions) & ~np.isin(matches, kept_positions)]
+        ann_added = len(matches)
+        kept_positions = np.concatenate([kept_positions, matches])
+        # positions is ascending
+        kept_scores = np.concatenate([kept_scores, rule_scores[np.searchsorted(positions, matches)]])
+    order = np.argsort(kept_positions)
+    kept_positions, kept_scores = kept_positions[order], kept_scores[order]
+
+    # 2. Re-ranking of the kept candidates, within the time budget
+    final_scores = get_reranker(reranker or config.RERANKER).rerank(
+        snapshot, student_data, kept_positions, kept_scores, deadline
+    )
+    stats = {
+        "retrieved": len(positions),
+        "kept": len(kept_positions),
+        "ann_added": ann_added,
+        "reranked": len(kept_positions) if final_scores is not None else 0,
+        "budget_exhausted": final_scores is None,
+    }
+    if final_scores is None:
+        # Out of budget: fall back to the retrieval order and scores
+        final_scores = np.minimum(kept_scores, 100)
+    return kept_positions, final_scores, stats
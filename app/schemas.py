@@ -1,5 +1,5 @@
 # app/schemas.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class InternshipBase(BaseModel):
@@ -29,12 +29,26 @@ class StudentForm(BaseModel):
     preferred_location: str
     description: str
 
+class SavedProfileCreate(StudentForm):
+    threshold: float = Field(60, gt=0, le=100)  # Match score that records a match
+
+class SavedProfileResponse(SavedProfileCreate):
+    id: int
+    
+    class Config:
+        from_attributes = True
+
 class FormOptions(BaseModel):
     education_options: List[str]
     skills_options: List[str]
     sector_options: List[str]
     location_options: List[str]
 
+class FormOptionsChanges(BaseModel):
+    version: int
+    added: FormOptions
+    removed: FormOptions
+
 class RecommendationResponse(BaseModel):
     id: int
     title: str
@@ -46,4 +60,9 @@ class RecommendationResponse(BaseModel):
     match_score: float
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProfileMatches(BaseModel):
+    profile_id: int
+    matches: List[RecommendationResponse]  # Oldest match first
+    next_since: int  # Pass as `since` to get only later matches
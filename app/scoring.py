@@ -19,6 +19,9 @@ EDUCATION_HIERARCHY = {
     "PhD": 5
 }
 
+# Common stop words ignored by description matching
+STOP_WORDS = {'the', 'is', 'at', 'which', 'on', 'and', 'a', 'an', 'as', 'are', 'was', 'were', 'to', 'in', 'for', 'of', 'with', 'by'}
+
 def calculate_rule_based_score(internship: Internship, student_data: Dict) -> float:
     """
     Calculate score based on rules (60% weightage in final score)
@@ -30,6 +33,7 @@ def calculate_rule_based_score(internship: Internship, student_data: Dict) -> fl
     internship_skills = set(skill.strip().lower() for skill in internship.skills.split(','))
     student_skills = set(skill.strip().lower() for skill in student_data['skills'])
     
+    skill_match_ratio = 0
     if internship_skills and student_skills:
         skill_match_ratio = len(internship_skills.intersection(student_skills)) / len(internship_skills)
         score += skill_match_ratio * SKILL_MATCH_WEIGHT
@@ -86,9 +90,8 @@ def calculate_description_similarity_mock(internship_desc: str, student_desc: st
     student_words = set(student_desc.lower().split())
     
     # Remove common stop words
-    stop_words = {'the', 'is', 'at', 'which', 'on', 'and', 'a', 'an', 'as', 'are', 'was', 'were', 'to', 'in', 'for', 'of', 'with', 'by'}
-    internship_words -= stop_words
-    student_words -= stop_words
+    internship_words -= STOP_WORDS
+    student_words -= STOP_WORDS
     
     if not internship_words or not student_words:
         return 0
@@ -0,0 +1,66 @@
+# app/serialization.py
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+from . import schemas
+from .catalog import CatalogRecord, CatalogSnapshot
+
+# Fields of RecommendationResponse, in serialization order
+RECOMMENDATION_FIELDS = tuple(schemas.RecommendationResponse.model_fields)
+# Static fields come from the record, match_score (last) is spliced in per request
+STATIC_FIELDS = RECOMMENDATION_FIELDS[:-1]
+assert RECOMMENDATION_FIELDS[-1] == "match_score"
+
+
+def dumps(value) -> bytes:
+    """
+    JSON encoding used by FastAPI responses (compact, UTF-8, no ASCII escaping)
+    """
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _prefix(record: CatalogRecord) -> bytes:
+    # '{"id":1,...,"description":"..."' -- the object without match_score and the closing brace
+    return dumps({field: getattr(record, field) for field in STATIC_FIELDS})[:-1]
+
+
+class RecommendationFragments:
+    """
+    Pre-serialized static part of each record's RecommendationResponse,
+    built once per snapshot and extended as internships are appended
+    """
+
+    def __init__(self, prefixes: List[bytes]):
+        self.prefixes = prefixes
+
+    @classmethod
+    def build(cls, records: Iterable[CatalogRecord]) -> "RecommendationFragments":
+        return cls([_prefix(record) for record in records])
+
+    def extend(self, records: Sequence[CatalogRecord], start: int) -> "RecommendationFragments":
+        assert start == len(self.prefixes)
+        self.prefixes.extend(_prefix(records[position]) for position in range(start, len(records)))
+        return self
+
+
+def _encode_score(score: float) -> bytes:
+    # json.dumps (and pydantic, for scores in 0..100) encode finite floats like float.__repr__
+    return b',"match_score":' + repr(float(score)).encode() + b"}"
+
+
+def encode_recommendations(snapshot: Optional[CatalogSnapshot], recommendations: List[Dict]) -> bytes:
+    """
+    JSON array of RecommendationResponse objects, byte-identical to FastAPI's
+    response_model output, without validating or re-encoding the static fields
+    """
+    positions = snapshot.positions if snapshot is not None else {}
+    prefixes = snapshot.derived(RecommendationFragments).prefixes if snapshot is not None else None
+    items = []
+    for recommendation in recommendations:
+        position = positions.get(recommendation["id"])
+        if position is not None:
+            prefix = prefixes[position]
+        else:
+            # Not in the snapshot (e.g. deactivated since the page was cached): encode the fields directly
+            prefix = dumps({field: recommendation[field] for field in STATIC_FIELDS})[:-1]
+        items.append(prefix + _encode_score(recommendation["match_score"]))
+    return b"[" + b",".join(items) + b"]"
@@ -0,0 +1,268 @@
+# app/sharding.py
+import atexit
+import multiprocessing
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from . import config
+from .batch_scoring import BatchScorer
+from .catalog import CatalogSnapshot
+from .index import InvertedIndex
+from .ranking import Cursor, after_cursor, top_k
+from .similarity import DescriptionIndex
+
+# A shard that grew this much past the average size triggers a re-partition
+REBALANCE_FACTOR = 1.5
+
+
+class ShardResult:
+    """
+    Local top k of one shard (global positions) and the counts the page needs
+    """
+    __slots__ = ("positions", "scores", "candidates", "above_zero", "eligible")
+
+    def __init__(self, positions: np.ndarray, scores: np.ndarray, candidates: int, above_zero: int, eligible: int):
+        self.positions = positions
+        self.scores = scores
+        self.candidates = candidates
+        self.above_zero = above_zero
+        self.eligible = eligible
+
+
+def shard_top_k(snapshot: CatalogSnapshot, offset: int, student_data: Dict, k: int, start: Optional[Cursor]) -> ShardResult:
+    """
+    Single-stage scoring of one shard, like recommend(); positions are offset to
+    the whole catalog so cursors and ties resolve exactly as in the serial path
+    """
+    candidates = snapshot.derived(InvertedIndex).candidates(student_data, len(snapshot))
+    positions = np.asarray(candidates, dtype=np.int64)
+    rule_scores = snapshot.derived(BatchScorer).rule_scores(student_data, positions)
+    ml_scores = snapshot.derived(DescriptionIndex).scores(student_data["description"], positions, "jaccard")
+    total_scores = np.minimum(rule_scores + ml_scores, 100)  # Cap at 100
+
+    positions = positions + offset
+    above_zero = total_scores > 0
+    eligible = above_zero & after_cursor(positions, total_scores, start)
+    top_positions, top_scores = top_k(positions[eligible], total_scores[eligible], k)
+    return ShardResult(top_positions, top_scores, len(candidates), int(np.count_nonzero(above_zero)), int(np.count_nonzero(eligible)))
+
+
+def _serve_shard(connection) -> None:
+    """
+    Shard worker loop: holds one id range of the catalog and answers queries on
+    it. Messages are (request id, command, *arguments), replies (request id, result).
+    """
+    snapshot, offset = CatalogSnapshot(0, ()), 0
+    while True:
+        request_id, command, *arguments = connection.recv()
+        if command == "stop":
+            return
+        try:
+            if command == "load":
+                offset, records = arguments
+                snapshot = CatalogSnapshot(0, records)
+                # Build the derived structures now rather than on the first query
+                for builder in (InvertedIndex, BatchScorer, DescriptionIndex):
+                    snapshot.derived(builder)
+                reply = None
+            elif command == "append":
+                snapshot = snapshot.appended(0, arguments[0])
+                reply = None
+            else:
+                reply = shard_top_k(snapshot, offset, *arguments)
+        except Exception as e:
+            reply = e
+        connection.send((request_id, reply))
+
+
+class ShardConnection:
+    """
+    Pipe to one shard worker. Requests are tagged with an id; the caller
+    currently reading the pipe keeps replies meant for other callers, so
+    concurrent queries share the pipe without a lock held for the round trip.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._send_lock = threading.Lock()
+        self._next_id = 0
+        self._condition = threading.Condition()
+        self._replies: Dict[int, object] = {}
+        self._reading = False
+
+    def send(self, message: Tuple) -> int:
+        with self._send_lock:
+            request_id = self._next_id
+            self._next_id += 1
+            self.connection.send((request_id,) + message)
+        return request_id
+
+    def receive(self, request_id: int):
+        while True:
+            with self._condition:
+                while request_id not in self._replies and self._reading:
+                    self._condition.wait()
+                if request_id in self._replies:
+                    return self._replies.pop(request_id)
+                self._reading = True
+            reply = None
+            try:
+                reply = self.connection.recv()
+            finally:
+                # On errors too, so a waiting caller takes over reading (and fails the same way)
+                with self._condition:
+                    if reply is not None:
+                        self._replies[reply[0]] = reply[1]
+                    self._reading = False
+                    self._condition.notify_all()
+
+
+def shardable() -> bool:
+    """
+    Whether the configured pipeline scores each internship independently of the
+    others: two-stage ranking and the tfidf/bm25 corpus statistics are global
+    """
+    return config.RERANK_CANDIDATES <= 0 and config.DESCRIPTION_SIMILARITY_MODE == "jaccard"
+
+
+class ShardPool:
+    """
+    Persistent worker processes, one per shard, for scatter-gather scoring.
+
+    The catalog is split by id range into contiguous position ranges. Each
+    query is sent to every shard, which returns its local top k; merging them
+    with top_k gives the same page as scoring serially, ties included, since
+    positions are global. Workers follow the catalog: appended internships are
+    sent to the last shard only, other changes reload and re-partition all shards.
+    The pool lock covers syncing and sending a query; replies are awaited
+    outside it, so concurrent queries are pipelined through the shards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workers: List[Tuple[multiprocessing.Process, ShardConnection]] = []
+        self._bounds: List[int] = []
+        self._version: Optional[int] = None
+        # Id of the last record held, to check that a snapshot extends what was loaded
+        self._last_id: Optional[int] = None
+        self._synced = None
+
+    def _start(self, shards: int) -> None:
+        self.stop()
+        context = multiprocessing.get_context("spawn")
+        for _ in range(shards):
+            connection, child_connection = context.Pipe()
+            process = context.Process(target=_serve_shard, args=(child_connection,), daemon=True, name="shard")
+            process.start()
+            self._workers.append((process, ShardConnection(connection)))
+
+    def stop(self) -> None:
+        workers, self._workers = self._workers, []
+        for process, connection in workers:
+            try:
+                connection.send(("stop",))
+            except OSError:
+                pass
+            process.join(timeout=5)
+        self._bounds, self._version, self._last_id, self._synced = [], None, None, None
+
+    def _send(self, messages: List[Optional[Tuple]]) -> List[Tuple[ShardConnection, Optional[int]]]:
+        """
+        Send one message per shard (None skips a shard); returns what to gather replies with
+        """
+        return [
+            (connection, connection.send(message) if message is not None else None)
+            for (_, connection), message in zip(self._workers, messages)
+        ]
+
+    @staticmethod
+    def _gather(requests: List[Tuple[ShardConnection, Optional[int]]]) -> List:
+        # Every reply is read before raising, so no reply is left behind
+        replies = [connection.receive(request_id) if request_id is not None else None for connection, request_id in requests]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _call(self, messages: List[Optional[Tuple]]) -> List:
+        """
+        Send one message per shard (None skips a shard), then gather the replies
+        """
+        return self._gather(self._send(messages))
+
+    def _sync(self, snapshot: CatalogSnapshot, shards: int) -> None:
+        """
+        Bring the shards to the snapshot's records
+        """
+        if len(self._workers) != shards:
+            self._start(shards)
+        if self._synced is not None and self._synced() is snapshot:
+            return
+        loaded = self._bounds[-1] if self._bounds else 0
+        if (
+            self._version is not None
+            and dict(snapshot.lineage).get(self._version) == loaded
+            and snapshot.records[loaded - 1].id == self._last_id
+            and len(snapshot) - self._bounds[-2] <= REBALANCE_FACTOR * len(snapshot) / shards
+        ):
+            # Only appended since the shards were loaded: extend the last shard
+            if len(snapshot) > loaded:
+                self._call([None] * (shards - 1) + [("append", tuple(snapshot.records[loaded:]))])
+        else:
+            bounds = [len(snapshot) * shard // shards for shard in range(shards + 1)]
+            self._version = None
+            self._call([
+                ("load", bounds[shard], tuple(snapshot.records[bounds[shard]:bounds[shard + 1]]))
+                for shard in range(shards)
+            ])
+            self._bounds = bounds
+        self._bounds[-1] = len(snapshot)
+        self._version, self._last_id, self._synced = snapshot.version, snapshot.records[-1].id, weakref.ref(snapshot)
+
+    def top_k(self, snapshot: CatalogSnapshot, student_data: Dict, k: int, start: Optional[Cursor], shards: int) -> Optional[ShardResult]:
+        """
+        Merged top k of all shards, or None when the shards already hold a newer snapshot
+        """
+        with self._lock:
+            if self._version is not None and snapshot.version < self._version:
+                return None
+            try:
+                self._sync(snapshot, shards)
+                workers = self._workers
+                # Workers answer in order, so a later sync cannot overtake this query
+                requests = self._send([("query", student_data, k, start)] * shards)
+            except (EOFError, OSError):
+                # A worker died, start over on the next query
+                self.stop()
+                raise
+        try:
+            results = self._gather(requests)
+        except (EOFError, OSError):
+            with self._lock:
+                if self._workers is workers:
+                    self.stop()
+            raise
+        positions = np.concatenate([result.positions for result in results])
+        scores = np.concatenate([result.scores for result in results])
+        # Shards hold ascending position ranges, so positions stay ascending
+        top_positions, top_scores = top_k(positions, scores, k)
+        return ShardResult(
+            top_positions, top_scores,
+            sum(result.candidates for result in results),
+            sum(result.above_zero for result in results),
+            sum(result.eligible for result in results),
+        )
+
+
+# Started on the first sharded query
+shard_pool = ShardPool()
+atexit.register(shard_pool.stop)
+
+
+def sharded(snapshot: CatalogSnapshot) -> bool:
+    """
+    Whether sharding is configured and applies to the snapshot
+    """
+    shards = config.SHARD_COUNT
+    return shards >= 2 and len(snapshot) >= max(config.SHARD_MIN_CATALOG, shards) and shardable()
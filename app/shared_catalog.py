@@ -0,0 +1,552 @@
+# app/shared_catalog.py
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .batch_scoring import BatchScorer
+from .catalog import Catalog, CatalogRecord, CatalogSnapshot
+from .facets import FACETS, FacetCounts
+from .index import InvertedIndex
+from .serialization import RecommendationFragments
+from .similarity import DescriptionIndex
+
+MAGIC = b"CATSNAP1"
+# Arrays start on cache-line boundaries
+ALIGNMENT = 64
+
+# Text columns of CatalogRecord, stored dictionary-encoded
+TEXT_FIELDS = ("title", "min_education", "skills", "sector", "location", "duration", "description")
+# InvertedIndex posting maps, stored as keys + CSR postings
+POSTING_FIELDS = ("skills", "sectors", "locations", "words", "education")
+
+logger = logging.getLogger(__name__)
+
+
+class BytesTable:
+    """
+    Read-only list of byte strings: one blob plus offsets
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code: int) -> bytes:
+        return self.blob[self.offsets[code]:self.offsets[code + 1]].tobytes()
+
+
+class StringTable(BytesTable):
+    """
+    Read-only list of strings with a sorted permutation for lookups, standing
+    in for the value -> code dicts of the in-memory structures
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, order: np.ndarray):
+        super().__init__(offsets, blob)
+        self.order = order
+
+    def __getitem__(self, code: int) -> str:
+        return super().__getitem__(code).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[code] for code in range(len(self)))
+
+    def get(self, value: str, default=None) -> Optional[int]:
+        # Binary search over the codes in value order
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[self.order[mid]] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.order) and self[self.order[lo]] == value:
+            return int(self.order[lo])
+        return default
+
+    def __contains__(self, value: str) -> bool:
+        return self.get(value) is not None
+
+
+class Postings:
+    """
+    Key -> positions map of a mapped InvertedIndex
+    """
+
+    def __init__(self, keys: StringTable, offsets: np.ndarray, positions: np.ndarray, key_type=str):
+        self.keys = keys
+        self.offsets = offsets
+        self.positions = positions
+        self.key_type = key_type
+
+    def _positions(self, code: int) -> np.ndarray:
+        return self.positions[self.offsets[code]:self.offsets[code + 1]]
+
+    def get(self, key, default=()):
+        code = self.keys.get(str(key))
+        return self._positions(code) if code is not None else default
+
+    def items(self) -> Iterator[Tuple]:
+        return ((self.key_type(key), self._positions(code)) for code, key in enumerate(self.keys))
+
+
+class MappedInvertedIndex(InvertedIndex):
+    """
+    InvertedIndex over posting arrays of a snapshot file; read-only.
+    Candidates are collected in a bitmap instead of a set.
+    """
+
+    def __init__(self, postings: Dict[str, Postings], remote: np.ndarray):
+        for field, value in postings.items():
+            setattr(self, field, value)
+        self.remote = remote
+
+    def candidates(self, student_data: Dict, size: int) -> np.ndarray:
+        hits = np.zeros(size, dtype=bool)
+        for positions in self._postings(student_data):
+            positions = np.asarray(positions, dtype=np.int64)
+            hits[positions[positions < size]] = True
+        return np.flatnonzero(hits)
+
+
+class MappedRecords:
+    """
+    CatalogRecord sequence decoded on access from the columns of a snapshot file
+    """
+
+    def __init__(self, ids: np.ndarray, no_of_posts: np.ndarray, columns: Dict[str, Tuple[np.ndarray, StringTable]]):
+        self.ids = ids
+        self.no_of_posts = no_of_posts
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return tuple(self[i] for i in range(*position.indices(len(self))))
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("record position out of range")
+        fields = {field: table[codes[position]] for field, (codes, table) in self.columns.items()}
+        return CatalogRecord(
+            id=int(self.ids[position]), no_of_posts=int(self.no_of_posts[position]), is_active=True, **fields
+        )
+
+    def __iter__(self) -> Iterator[CatalogRecord]:
+        return (self[i] for i in range(len(self)))
+
+    def __add__(self, other: Sequence[CatalogRecord]) -> Tuple[CatalogRecord, ...]:
+        return tuple(self) + tuple(other)
+
+    def __reduce__(self):
+        # Process pool workers get plain records
+        return tuple, (tuple(self),)
+
+
+class MappedPositions:
+    """
+    Internship id -> position by binary search over the sorted ids
+    """
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+
+    def get(self, internship_id: int, default=None) -> Optional[int]:
+        position = int(np.searchsorted(self.ids, internship_id))
+        if position < len(self.ids) and self.ids[position] == internship_id:
+            return position
+        return default
+
+    def __contains__(self, internship_id: int) -> bool:
+        return self.get(internship_id) is not None
+
+    def __getitem__(self, internship_id: int) -> int:
+        position = self.get(internship_id)
+        if position is None:
+            raise KeyError(internship_id)
+        return position
+
+
+class MappedSnapshot(CatalogSnapshot):
+    """
+    Catalog snapshot whose records and derived structures are read-only views
+    of a memory-mapped snapshot file, shared page by page by every process
+    mapping it. Structures not stored in the file are built privately on use.
+    """
+
+    def __init__(self, header: Dict, arrays: Dict[str, np.ndarray], buffer: mmap.mmap):
+        self.header = header
+        self.epoch = header["epoch"]
+        self.facets_version = header["facets_version"]
+        self._arrays = arrays
+        # Keeps the mapping alive as long as the snapshot
+        self._buffer = buffer
+
+        columns = {field: (arrays[f"records.{field}"], self._strings(f"records.{field}.table")) for field in TEXT_FIELDS}
+        records = MappedRecords(arrays["records.id"], arrays["records.no_of_posts"], columns)
+        super().__init__(header["version"], records, {
+            BatchScorer: self._scorer(),
+            DescriptionIndex: self._description_index(),
+            InvertedIndex: self._inverted_index(),
+            RecommendationFragments: RecommendationFragments(
+                BytesTable(arrays["fragments.offsets"], arrays["fragments.blob"])
+            ),
+        })
+        self._positions = MappedPositions(records.ids)
+
+    def _strings(self, name: str) -> StringTable:
+        arrays = self._arrays
+        return StringTable(arrays[f"{name}.offsets"], arrays[f"{name}.blob"], arrays[f"{name}.order"])
+
+    def _scorer(self) -> BatchScorer:
+        scorer = BatchScorer.__new__(BatchScorer)
+        for name in ("skill_ids", "sector_ids", "location_ids"):
+            setattr(scorer, name, self._strings(f"scorer.{name}"))
+        scorer.skill_count = len(scorer.skill_ids)
+        for name in ("skill_indices", "skill_rows", "skill_counts", "sectors", "locations", "remote", "education"):
+            setattr(scorer, name, self._arrays[f"scorer.{name}"])
+        return scorer
+
+    def _description_index(self) -> DescriptionIndex:
+        index = DescriptionIndex.__new__(DescriptionIndex)
+        index.token_ids = self._strings("description.token_ids")
+        for name in ("indptr", "indices", "counts", "rows", "document_frequency"):
+            setattr(index, name, self._arrays[f"description.{name}"])
+        index._cache = {}
+        return index
+
+    def _inverted_index(self) -> MappedInvertedIndex:
+        postings = {
+            field: Postings(
+                self._strings(f"index.{field}.keys"),
+                self._arrays[f"index.{field}.offsets"],
+                self._arrays[f"index.{field}.positions"],
+                int if field == "education" else str,
+            )
+            for field in POSTING_FIELDS
+        }
+        return MappedInvertedIndex(postings, self._arrays["index.remote"])
+
+    @property
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        for facet in FACETS:
+            values = self._strings(f"facets.{facet}")
+            counts[facet] = dict(zip(values, self._arrays[f"facets.{facet}.counts"].tolist()))
+        return counts
+
+    def appended(self, version: int, new_records: Tuple[CatalogRecord, ...]) -> CatalogSnapshot:
+        # The mapped structures are read-only: a writing process gets a private copy
+        lineage = self.lineage + ((self.version, len(self)),)
+        return CatalogSnapshot(version, tuple(self.records) + tuple(new_records), lineage=lineage)
+
+    def relabeled(self, version: int) -> "MappedSnapshot":
+        snapshot = MappedSnapshot(self.header, self._arrays, self._buffer)
+        snapshot.version = version
+        snapshot.lineage = self.lineage + ((self.version, len(self)),)
+        return snapshot
+
+
+def _strings(name: str, values: Sequence[str]) -> Dict[str, np.ndarray]:
+    encoded = [value.encode("utf-8") for value in values]
+    arrays = _bytes(name, encoded)
+    arrays[f"{name}.order"] = np.array(sorted(range(len(values)), key=values.__getitem__), dtype=np.int32)
+    return arrays
+
+
+def _bytes(name: str, values: Sequence[bytes]) -> Dict[str, np.ndarray]:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in values])
+    return {f"{name}.offsets": offsets, f"{name}.blob": np.frombuffer(b"".join(values), dtype=np.uint8)}
+
+
+def _postings(name: str, postings: Dict) -> Dict[str, np.ndarray]:
+    keys = [str(key) for key in postings]
+    lists = [np.asarray(positions, dtype=np.int32) for positions in postings.values()]
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(positions) for positions in lists])
+    arrays = _strings(f"{name}.keys", keys)
+    arrays[f"{name}.offsets"] = offsets
+    arrays[f"{name}.positions"] = np.concatenate(lists) if lists else np.zeros(0, dtype=np.int32)
+    return arrays
+
+
+def snapshot_arrays(snapshot: CatalogSnapshot, facet_counts: Dict[str, Dict[str, int]]) -> Dict[str, np.ndarray]:
+    """
+    Columnar encoding of a snapshot and its derived structures
+    """
+    records = snapshot.records
+    arrays = {
+        "records.id": np.array([record.id for record in records], dtype=np.int64),
+        "records.no_of_posts": np.array([record.no_of_posts for record in records], dtype=np.int64),
+    }
+    for field in TEXT_FIELDS:
+        codes: Dict[str, int] = {}
+        arrays[f"records.{field}"] = np.array(
+            [codes.setdefault(getattr(record, field), len(codes)) for record in records], dtype=np.int32
+        )
+        arrays.update(_strings(f"records.{field}.table", list(codes)))
+
+    scorer = snapshot.derived(BatchScorer)
+    for name in ("skill_ids", "sector_ids", "location_ids"):
+        arrays.update(_strings(f"scorer.{name}", _vocabulary(getattr(scorer, name))))
+    for name in ("skill_indices", "skill_rows", "skill_counts", "sectors", "locations", "remote", "education"):
+        arrays[f"scorer.{name}"] = getattr(scorer, name)
+
+    description_index = snapshot.derived(DescriptionIndex)
+    arrays.update(_strings("description.token_ids", _vocabulary(description_index.token_ids)))
+    for name in ("indptr", "indices", "counts", "rows", "document_frequency"):
+        arrays[f"description.{name}"] = getattr(description_index, name)
+
+    index = snapshot.derived(InvertedIndex)
+    for field in POSTING_FIELDS:
+        arrays.update(_postings(f"index.{field}", _below(getattr(index, field), len(snapshot))))
+    arrays["index.remote"] = np.array([position for position in index.remote if position < len(snapshot)], dtype=np.int32)
+
+    arrays.update(_bytes("fragments", snapshot.derived(RecommendationFragments).prefixes[:len(snapshot)]))
+
+    for facet in FACETS:
+        values = sorted(facet_counts.get(facet, {}))
+        arrays.update(_strings(f"facets.{facet}", values))
+        arrays[f"facets.{facet}.counts"] = np.array([facet_counts[facet][value] for value in values], dtype=np.int64)
+    return arrays
+
+
+def _vocabulary(ids: Dict[str, int]) -> List[str]:
+    # Shared with later snapshots, so it may grow meanwhile: copy first (atomic).
+    # Newer entries are harmless, no row of this snapshot uses their codes.
+    ids = dict(ids)
+    vocabulary = [""] * len(ids)
+    for value, code in ids.items():
+        vocabulary[code] = value
+    return vocabulary
+
+
+def _below(postings: Dict, size: int) -> Dict:
+    # Posting lists are shared with later snapshots and may hold newer positions
+    return {key: [position for position in positions if position < size] for key, positions in dict(postings).items()}
+
+
+def write_snapshot(path: str, snapshot: CatalogSnapshot, epoch: str, facets_version: int, facet_counts: Dict[str, Dict[str, int]]) -> None:
+    """
+    Write the snapshot file: magic, header length, JSON header, then aligned
+    arrays. Written to a temporary file and renamed over `path`, so readers
+    see either the old or the new snapshot.
+    """
+    arrays = snapshot_arrays(snapshot, facet_counts)
+    specs, offset = {}, 0
+    for name, array in arrays.items():
+        array = arrays[name] = np.ascontiguousarray(array)
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        "version": snapshot.version,
+        "epoch": epoch,
+        "facets_version": facets_version,
+        "count": len(snapshot),
+        "arrays": specs,
+    }).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for name, array in arrays.items():
+                f.seek(data_start + specs[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def map_snapshot(path: str) -> MappedSnapshot:
+    """
+    Memory-map a snapshot file read-only
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a catalog snapshot file: {path}")
+    header_length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 8], "little")
+    header = json.loads(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_length])
+    data_start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+    arrays = {
+        name: np.frombuffer(
+            buffer, dtype=spec["dtype"], count=int(np.prod(spec["shape"])), offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+        for name, spec in header["arrays"].items()
+    }
+    return MappedSnapshot(header, arrays, buffer)
+
+
+@contextmanager
+def _file_lock(path: str):
+    import fcntl
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield fd
+    finally:
+        os.close(fd)
+
+
+class SharedSnapshotFile:
+    """
+    Catalog snapshot file shared by the worker processes of one deployment.
+
+    - ``<path>.version`` holds the catalog version counter and epoch shared by
+      all processes, so a version (and ETag, cursor, cache key) means the
+      same catalog in every worker
+    - after a write, the writing process republishes the file at most every
+      ``interval`` seconds, from its own snapshot if no other process wrote
+      since, else from the database
+    - readers check the file on every catalog read (one stat) and switch to
+      a newer version by mapping it; the old mapping goes away with the last
+      request using it
+
+    Processes coordinate through ``fcntl`` file locks, so sharing the catalog
+    is POSIX-only; on other platforms leave CATALOG_SNAPSHOT_PATH unset.
+    """
+
+    def __init__(self, path: str, interval: float = 1.0, session_factory=None):
+        self.path = path
+        self.interval = interval
+        self.session_factory = session_factory
+        self._counter_path = f"{path}.version"
+        self._publish_lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        self._stat = None
+        self._mapped: Optional[MappedSnapshot] = None
+        self._pending = threading.Event()
+        self._publisher: Optional[threading.Thread] = None
+        self.epoch = self._read_counter()[1]
+
+    def _read_counter(self, increment: bool = False, at_least: int = 0) -> Tuple[int, str]:
+        with _file_lock(self._counter_path) as fd:
+            content = os.pread(fd, 64, 0).decode()
+            if content:
+                version, epoch = int(content[:20]), content[20:]
+            else:
+                version, epoch = 0, uuid.uuid4().hex[:12]
+            new_version = max(version, at_least) + increment
+            if new_version != version or not content:
+                os.pwrite(fd, f"{new_version:020d}{epoch}".encode(), 0)
+            return new_version, epoch
+
+    def next_version(self) -> int:
+        return self._read_counter(increment=True)[0]
+
+    def latest(self) -> Optional[MappedSnapshot]:
+        """
+        The published snapshot, mapped again only when the file was replaced
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key != self._stat:
+                self._mapped, self._stat = map_snapshot(self.path), key
+            return self._mapped
+
+    def publish(self, catalog: Catalog) -> Optional[int]:
+        """
+        Write the catalog as of now; returns the published version, or None if
+        the file was already current
+        """
+        with _file_lock(self._publish_lock_path):
+            published = self.latest()
+            latest_version = self._read_counter()[0]
+            if published is not None and published.version == latest_version:
+                return None
+            with catalog._lock:
+                snapshot = catalog._snapshot
+                facets_version, facet_counts = catalog.facets.saved()
+            if not self._extends(snapshot, published, latest_version):
+                # Other processes wrote since: the database has every change
+                snapshot, facets_version, facet_counts = self._load(self.next_version())
+            write_snapshot(self.path, snapshot, self.epoch, facets_version, facet_counts)
+            return snapshot.version
+
+    @staticmethod
+    def _extends(snapshot: Optional[CatalogSnapshot], published: Optional[MappedSnapshot], latest_version: int) -> bool:
+        """
+        Whether the snapshot holds every write up to the latest version: it
+        descends from the published file and every version issued since was
+        one of its own ancestors
+        """
+        if snapshot is None or isinstance(snapshot, MappedSnapshot) or snapshot.version != latest_version:
+            return False
+        ancestors = {version for version, _ in snapshot.lineage}
+        base = published.version if published is not None else 0
+        if published is not None and base not in ancestors:
+            return False
+        return all(version in ancestors for version in range(base + 1, snapshot.version))
+
+    def _load(self, version: int) -> Tuple[CatalogSnapshot, int, Dict[str, Dict[str, int]]]:
+        from . import models
+        if self.session_factory is None:
+            from .database import SessionLocal
+            self.session_factory = SessionLocal
+        with self.session_factory() as db:
+            internships = (
+                db.query(models.Internship)
+                .filter(models.Internship.is_active == True)
+                .order_by(models.Internship.id)
+                .all()
+            )
+            records = tuple(CatalogRecord.from_model(internship) for internship in internships)
+        facets = FacetCounts()
+        facets.reset(records, version)
+        return (CatalogSnapshot(version, records), *facets.saved())
+
+    def schedule_publish(self, catalog: Catalog) -> None:
+        if self.interval <= 0:
+            self.publish(catalog)
+            return
+        self._pending.set()
+        with self._lock:
+            if self._publisher is None:
+                self._publisher = threading.Thread(target=self._run_publisher, args=(catalog,), daemon=True, name="catalog-publisher")
+                self._publisher.start()
+
+    def _run_publisher(self, catalog: Catalog) -> None:
+        while True:
+            self._pending.wait()
+            # Coalesce the writes of the next interval into one publish
+            time.sleep(self.interval)
+            self._pending.clear()
+            try:
+                self.publish(catalog)
+            except Exception:
+                logger.exception("Publishing the shared catalog snapshot to %s failed", self.path)
+
+
+def share(catalog: Catalog, path: str, interval: float = 1.0, session_factory=None) -> SharedSnapshotFile:
+    """
+    Make `catalog` publish to and read from the snapshot file at `path`
+    """
+    shared = SharedSnapshotFile(path, interval, session_factory)
+    with catalog._lock:
+        catalog.shared = shared
+        catalog.epoch = shared.epoch
+        # Versions never go backwards in this process either
+        catalog.version = shared._read_counter(at_least=catalog.version)[0]
+    return shared
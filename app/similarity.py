@@ -0,0 +1,232 @@
+# app/similarity.py
+import math
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from . import config
+from .scoring import STOP_WORDS
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Positions-only scoring is used when fewer than 1/SELECTED_ROWS_FACTOR of the rows are selected
+SELECTED_ROWS_FACTOR = 4
+
+
+def tokenize(description: str) -> Counter:
+    """
+    Lowercased words without stop words, with their counts
+    """
+    if not description:
+        return Counter()
+    return Counter(word for word in description.lower().split() if word not in STOP_WORDS)
+
+
+class DescriptionIndex:
+    """
+    Internship descriptions tokenized once into a sparse token-id matrix (CSR).
+
+    A student description is scored against every internship with one sparse
+    matrix-vector product (``np.bincount`` over the non-zeros). Scores are out
+    of 40 like calculate_description_similarity_mock:
+
+    - "jaccard": exact Jaccard similarity of the word sets (same as the mock)
+    - "tfidf": cosine similarity of TF-IDF vectors
+    - "bm25": BM25 normalized by the query's saturation upper bound
+    """
+
+    def __init__(self):
+        self.token_ids: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.float64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.document_frequency = np.zeros(0, dtype=np.float64)
+        # Per-snapshot weights for the tfidf/bm25 modes, computed on first use
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, records: Sequence) -> "DescriptionIndex":
+        return cls()._appended(records, 0)
+
+    def extend(self, records: Sequence, start: int) -> "DescriptionIndex":
+        index = DescriptionIndex()
+        index.token_ids = self.token_ids
+        return index._appended(records, start, base=self)
+
+    def _appended(self, records: Sequence, start: int, base: Optional["DescriptionIndex"] = None) -> "DescriptionIndex":
+        indices, counts, rows, lengths = [], [], [], []
+        for position in range(start, len(records)):
+            tokens = tokenize(records[position].description)
+            for token, count in tokens.items():
+                token_id = self.token_ids.get(token)
+                if token_id is None:
+                    token_id = self.token_ids[token] = len(self.token_ids)
+                indices.append(token_id)
+                counts.append(count)
+            rows.extend([position] * len(tokens))
+            lengths.append(len(tokens))
+
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.cumsum(np.asarray(lengths, dtype=np.int64))
+        new_frequency = np.bincount(indices, minlength=len(self.token_ids)).astype(np.float64)
+        if base is None:
+            self.indptr = np.concatenate([[0], indptr])
+            self.indices = indices
+            self.counts = np.asarray(counts, dtype=np.float64)
+            self.rows = np.asarray(rows, dtype=np.int32)
+            self.document_frequency = new_frequency
+        else:
+            self.indptr = np.concatenate([base.indptr, base.indptr[-1] + indptr])
+            self.indices = np.concatenate([base.indices, indices])
+            self.counts = np.concatenate([base.counts, np.asarray(counts, dtype=np.float64)])
+            self.rows = np.concatenate([base.rows, np.asarray(rows, dtype=np.int32)])
+            new_frequency[:len(base.document_frequency)] += base.document_frequency
+            self.document_frequency = new_frequency
+        return self
+
+    @property
+    def set_sizes(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def _cached(self, name: str, compute):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = compute()
+        return value
+
+    def _query(self, tokens, weights=None) -> np.ndarray:
+        vector = np.zeros(len(self.document_frequency), dtype=np.float64)
+        for token, count in tokens.items():
+            token_id = self.token_ids.get(token)
+            # Tokens added by later snapshots are unknown to this one
+            if token_id is not None and token_id < len(vector):
+                vector[token_id] = count if weights is None else count * weights[token_id]
+        return vector
+
+    def _product(self, weights, query: np.ndarray) -> np.ndarray:
+        """
+        Sparse matrix-vector product: sum of weights * query per row
+        """
+        return np.bincount(self.rows, weights=weights * query[self.indices], minlength=len(self))
+
+    def jaccard(self, tokens: Counter) -> np.ndarray:
+        query = np.minimum(self._query(tokens), 1.0)
+        intersection = self._product(1.0, query)
+        union = self.set_sizes + len(tokens) - intersection
+        similarity = np.zeros(len(self), dtype=np.float64)
+        # Same as the mock: an empty word set on either side scores 0
+        if tokens:
+            nonempty = self.set_sizes > 0
+            similarity[nonempty] = intersection[nonempty] / union[nonempty]
+        return similarity
+
+    def _selected(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Offsets of every non-zero of the given rows (row after row), the index of
+        the row each belongs to, and the row lengths
+        """
+        starts = self.indptr[positions]
+        lengths = self.indptr[positions + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return offsets, np.repeat(np.arange(len(positions)), lengths), lengths
+
+    def _product_at(self, weights, query: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """
+        _product for the given rows only; sums in the same order, so the values are identical
+        """
+        offsets, rows, _ = self._selected(positions)
+        values = (weights[offsets] if np.ndim(weights) else weights) * query[self.indices[offsets]]
+        return np.bincount(rows, weights=values, minlength=len(positions))
+
+    def jaccard_at(self, tokens: Counter, positions: np.ndarray) -> np.ndarray:
+        """
+        Jaccard similarity of the given positions only, in time proportional to
+        their token counts instead of the whole catalog
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        similarity = np.zeros(len(positions), dtype=np.float64)
+        if not tokens or not len(positions):
+            return similarity
+        query_ids = [self.token_ids.get(token) for token in tokens]
+        query_ids = np.array([token_id for token_id in query_ids if token_id is not None], dtype=np.int64)
+        offsets, rows, lengths = self._selected(positions)
+        hits = np.isin(self.indices[offsets], query_ids)
+        intersection = np.bincount(rows, weights=hits, minlength=len(positions))
+        nonempty = lengths > 0
+        similarity[nonempty] = intersection[nonempty] / (lengths + len(tokens) - intersection)[nonempty]
+        return similarity
+
+    def _tfidf_weights(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        idf = self._cached("idf", lambda: np.log((1 + len(self)) / (1 + self.document_frequency)) + 1)
+        weights = self._cached("tfidf_weights", lambda: self.counts * idf[self.indices])
+        norms = self._cached("tfidf_norms", lambda: np.sqrt(np.bincount(self.rows, weights=weights ** 2, minlength=len(self))))
+        return idf, weights, norms
+
+    def tfidf(self, tokens: Counter) -> np.ndarray:
+        return self.tfidf_at(tokens, None)
+
+    def tfidf_at(self, tokens: Counter, positions: Optional[np.ndarray]) -> np.ndarray:
+        """
+        TF-IDF cosine similarity of the given positions (None: every row)
+        """
+        idf, weights, norms = self._tfidf_weights()
+        size = len(self) if positions is None else len(positions)
+        query = self._query(tokens, idf)
+        query_norm = math.sqrt(float(query @ query))
+        similarity = np.zeros(size, dtype=np.float64)
+        if query_norm == 0 or not size:
+            return similarity
+        if positions is None:
+            dot = self._product(weights, query)
+        else:
+            norms = norms[positions]
+            dot = self._product_at(weights, query, positions)
+        nonzero = norms > 0
+        similarity[nonzero] = dot[nonzero] / (norms[nonzero] * query_norm)
+        return np.minimum(similarity, 1.0)
+
+    def bm25(self, tokens: Counter) -> np.ndarray:
+        return self.bm25_at(tokens, None)
+
+    def bm25_at(self, tokens: Counter, positions: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Normalized BM25 of the given positions (None: every row)
+        """
+        idf = self._cached("bm25_idf", lambda: np.log(1 + (len(self) - self.document_frequency + 0.5) / (self.document_frequency + 0.5)))
+        saturation = self._cached("bm25_saturation", self._bm25_saturation)
+        query = self._query({token: 1 for token in tokens}, idf)
+        upper_bound = float(query.sum()) * (BM25_K1 + 1)
+        if upper_bound == 0:
+            return np.zeros(len(self) if positions is None else len(positions), dtype=np.float64)
+        if positions is None:
+            return self._product(saturation, query) / upper_bound
+        return self._product_at(saturation, query, positions) / upper_bound
+
+    def _bm25_saturation(self) -> np.ndarray:
+        lengths = np.bincount(self.rows, weights=self.counts, minlength=len(self))
+        average_length = lengths.mean() if len(lengths) and lengths.mean() > 0 else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+        return self.counts * (BM25_K1 + 1) / (self.counts + norm[self.rows])
+
+    def scores(self, student_description: str, positions: Optional[np.ndarray] = None, mode: Optional[str] = None) -> np.ndarray:
+        """
+        Description similarity (out of 40) of every internship, or the given positions
+        """
+        mode = mode or config.DESCRIPTION_SIMILARITY_MODE
+        if mode not in ("jaccard", "tfidf", "bm25"):
+            raise ValueError(f"Unknown description similarity mode: {mode}")
+        tokens = tokenize(student_description)
+        if positions is None or len(positions) * SELECTED_ROWS_FACTOR > len(self):
+            similarity = getattr(self, mode)(tokens)
+            if positions is not None:
+                similarity = similarity[positions]
+        else:
+            # Only the selected rows are scored (same values as slicing the full scores)
+            similarity = getattr(self, f"{mode}_at")(tokens, np.asarray(positions, dtype=np.int64))
+        # Return score out of 40 (40% weightage)
+        return similarity * 40
@@ -0,0 +1,182 @@
+# app/traffic.py
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import unquote_plus
+from . import config
+
+# Nothing is captured while this is False
+enabled = config.TRAFFIC_CAPTURE
+
+REDACTED = ""
+
+# Captured entries waiting for the writer thread before new ones are dropped
+QUEUE_SIZE = 10000
+
+
+def redact(body):
+    """
+    Blank out free-text descriptions (possible PII) in a StudentForm or a list of them
+    """
+    if isinstance(body, list):
+        return [redact(item) for item in body]
+    if isinstance(body, dict) and isinstance(body.get("description"), str):
+        return dict(body, description=REDACTED)
+    return body
+
+
+def recorded_query(query: str) -> str:
+    """
+    Query string without the profile parameter, which may carry PROFILE_TOKEN
+    """
+    return "&".join(part for part in query.split("&") if part and unquote_plus(part.split("=", 1)[0]) != "profile")
+
+
+class TrafficLog:
+    """
+    Append-only JSONL file of captured requests, one object per line:
+    {"ts", "method", "path", "query", "body", "status", "duration_ms"}
+    plus "content_type", "redacted" or "body_skipped" when applicable.
+
+    Entries are queued and written by a background thread, so capturing never
+    blocks the event loop on disk I/O. When QUEUE_SIZE entries are waiting,
+    new ones are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def write(self, entry: dict) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, daemon=True, name="traffic-log")
+                self._writer.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+                # Flush once the backlog is written rather than after every entry
+                if self._queue.empty():
+                    file.flush()
+
+    def close(self) -> None:
+        """
+        Write out the queued entries and close the file
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+
+_log: Optional[TrafficLog] = None
+_log_lock = threading.Lock()
+
+
+def traffic_log() -> TrafficLog:
+    global _log
+    with _log_lock:
+        if _log is None or _log.path != config.TRAFFIC_CAPTURE_PATH:
+            if _log is not None:
+                _log.close()
+            _log = TrafficLog(config.TRAFFIC_CAPTURE_PATH)
+        return _log
+
+
+def _close_log() -> None:
+    with _log_lock:
+        if _log is not None:
+            _log.close()
+
+
+# Entries still queued at exit are written out
+atexit.register(_close_log)
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware appending a TRAFFIC_CAPTURE_RATE sample of /api requests to
+    TRAFFIC_CAPTURE_PATH for offline replay (python -m benchmarks replay).
+    Bodies larger than TRAFFIC_CAPTURE_MAX_BODY bytes are not kept. Admin
+    endpoints and the profile query parameter are never recorded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not enabled
+            or scope["type"] != "http"
+            or not scope["path"].startswith("/api/")
+            or scope["path"].startswith("/api/admin/")
+            or random.random() >= config.TRAFFIC_CAPTURE_RATE
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        ts = time.time()
+        started = time.perf_counter()
+        chunks = []
+        size = 0
+        status = 500
+
+        async def capture_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request":
+                size += len(message.get("body", b""))
+                if size <= config.TRAFFIC_CAPTURE_MAX_BODY:
+                    chunks.append(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            entry = {
+                "ts": round(ts, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": recorded_query(scope.get("query_string", b"").decode("latin-1")),
+                "body": None,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            if size > config.TRAFFIC_CAPTURE_MAX_BODY:
+                entry["body_skipped"] = size
+            elif size:
+                raw = b"".join(chunks)
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    body = raw.decode("utf-8", "replace")
+                entry["content_type"] = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1")
+                if config.TRAFFIC_CAPTURE_REDACT:
+                    body = redact(body)
+                    entry["redacted"] = True
+                entry["body"] = body
+            traffic_log().write(entry)
@@ -0,0 +1,25 @@
+"""
+Reproducible benchmarks for the recommendation service.
+
+    python -m benchmarks generate --internships 1000 --students 100
+    python -m benchmarks micro --internships 10000
+    python -m benchmarks load --internships 100000 --requests 2000 --concurrency 16
+    python -m benchmarks ann --internships 100000 --queries 200
+    python -m benchmarks replay requests.jsonl --speed 10
+    python -m benchmarks compare requests.jsonl ../baseline-checkout . --database prod-copy.db
+
+Data comes from a seeded synthetic generator, so two runs with the same
+arguments score the same catalog and profiles. Reports are JSON (stdout or
+--output) and can be diffed between releases.
+
+Benchmarks run against a throwaway SQLite database, never ./internships.db;
+set BENCHMARK_DATABASE_URL to use another database (it is cleared first).
+"""
+import os
+import tempfile
+
+# Must happen before app.database is imported
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCHMARK_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='benchmarks-'), 'benchmark.db')}"
+)
@@ -0,0 +1,114 @@
+# benchmarks/__main__.py
+import argparse
+import json
+import sys
+from itertools import chain
+from .report import write_report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Recommendation service benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name: str, help: str, students: int) -> argparse.ArgumentParser:
+        command = commands.add_parser(name, help=help)
+        command.add_argument("--internships", type=int, default=10000, help="synthetic catalog size")
+        command.add_argument("--students", type=int, default=students, help="number of synthetic student profiles")
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--output", help="write the JSON report here instead of stdout")
+        return command
+
+    generate = add_command("generate", "print synthetic internships and students as NDJSON", 100)
+    generate.add_argument("--kind", choices=["internships", "students", "both"], default="both")
+
+    micro = add_command("micro", "time scoring functions and crud entry points", 100)
+    micro.add_argument("--calls", type=int, default=100000, help="calls per scoring function")
+    micro.add_argument("-k", type=int, default=5)
+    micro.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+
+    load = add_command("load", "drive POST /api/recommendations in-process", 1000)
+    load.add_argument("--requests", type=int, default=1000)
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--warmup", type=int, default=50, help="untimed requests sent first")
+    load.add_argument("-k", type=int, default=5)
+    load.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+
+    ann = add_command("ann", "recall@k and latency of the approximate description index", 100)
+    ann.add_argument("--queries", type=int, default=100)
+    ann.add_argument("-k", type=int, default=10)
+
+    shards = add_command("shards", "single-query latency of sharded scatter-gather scoring", 100)
+    shards.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4], help="shard counts to time (1 = serial)")
+    shards.add_argument("-k", type=int, default=5)
+
+    replay = commands.add_parser("replay", help="replay a captured traffic log against one build")
+    compare = commands.add_parser("compare", help="replay a traffic log against two builds and compare them")
+    for command in (replay, compare):
+        command.add_argument("log", help="JSONL traffic log (TRAFFIC_CAPTURE_PATH)")
+        command.add_argument("--speed", type=float, default=0, help="recorded pace multiplier, 0 = as fast as possible")
+        command.add_argument("--concurrency", type=int, default=8, help="concurrent clients when --speed is 0")
+        command.add_argument("--include-writes", action="store_true", help="also replay requests that change data")
+        command.add_argument("--output", help="write the JSON report here instead of stdout")
+    replay.add_argument("--app-dir", help="source tree of the build to run (default: this one)")
+    compare.add_argument("baseline", help="source tree of the baseline build")
+    compare.add_argument("candidate", help="source tree of the candidate build")
+    compare.add_argument("--database", help="SQLite file to copy for both builds (default: synthetic catalog)")
+    compare.add_argument("--internships", type=int, default=10000, help="synthetic catalog size")
+    compare.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    # Imported lazily: these load the app against the benchmark database
+    if args.command == "generate":
+        from .synthetic import generate_internships, generate_students
+        rows = []
+        if args.kind in ("internships", "both"):
+            rows.append(({"internship": row} for row in generate_internships(args.internships, args.seed)))
+        if args.kind in ("students", "both"):
+            rows.append(({"student": row} for row in generate_students(args.students, args.seed)))
+        out = open(args.output, "w") if args.output else sys.stdout
+        try:
+            for row in chain(*rows):
+                out.write(json.dumps(row) + "\n")
+        finally:
+            if args.output:
+                out.close()
+    elif args.command == "micro":
+        from .micro import run_micro
+        write_report(run_micro(args.internships, args.students, args.calls, args.k, args.seed, args.cache), args.output)
+    elif args.command == "ann":
+        from app.ann import evaluate
+        from .report import environment
+        from .synthetic import synthetic_snapshot
+        report = evaluate(synthetic_snapshot(args.internships, args.seed), args.queries, args.k, args.seed)
+        params = {"internships": args.internships, "queries": args.queries, "k": args.k, "seed": args.seed}
+        write_report({"benchmark": "ann", "params": params, "environment": environment(), "results": report}, args.output)
+    elif args.command == "shards":
+        from .micro import run_shards
+        write_report(run_shards(args.internships, args.students, args.shards, args.k, args.seed), args.output)
+    elif args.command == "replay":
+        from .replay import run_replay
+        write_report(run_replay(args.log, args.app_dir, args.speed, args.concurrency, args.include_writes), args.output)
+    elif args.command == "compare":
+        from .replay import compare
+        report = compare(
+            args.log, args.baseline, args.candidate, args.database, args.internships,
+            args.seed, args.speed, args.concurrency, args.include_writes
+        )
+        write_report(report, args.output)
+        # Non-zero exit so the comparison can gate a change
+        if report["mismatches"]:
+            sys.exit(1)
+    else:
+        from .load import run_load
+        write_report(
+            run_load(
+                args.internships, args.students, args.requests, args.concurrency,
+                args.k, args.warmup, args.seed, args.cache
+            ),
+            args.output
+        )
+
+
+if __name__ == "__main__":
+    main()
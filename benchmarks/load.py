@@ -0,0 +1,92 @@
+# benchmarks/load.py
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List
+import httpx
+from app.cache import result_cache
+from app.database import SessionLocal
+from app.main import app
+from .report import environment, latency_stats, peak_rss_mb
+from .synthetic import generate_students, populate_database
+
+
+async def drive(client: httpx.AsyncClient, forms: List[Dict], requests: int, concurrency: int, k: int) -> Dict:
+    """
+    POST /api/recommendations `requests` times from `concurrency` concurrent
+    clients, cycling through the forms, and summarize latency and throughput
+    """
+    latencies = []
+    statuses = Counter()
+    next_request = iter(range(requests))
+
+    async def worker():
+        for i in next_request:
+            t0 = time.perf_counter()
+            response = await client.post("/api/recommendations", params={"k": k}, json=forms[i % len(forms)])
+            latencies.append(time.perf_counter() - t0)
+            statuses[str(response.status_code)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stats = latency_stats(latencies)
+    stats["seconds"] = round(elapsed, 3)
+    stats["throughput_rps"] = round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0
+    stats["status_codes"] = dict(statuses)
+    return stats
+
+
+async def _run(forms: List[Dict], requests: int, concurrency: int, k: int, warmup: int) -> Dict:
+    # In-process: requests go straight to the ASGI app, no sockets involved
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        if warmup:
+            await drive(client, forms, warmup, concurrency, k)
+        return await drive(client, forms, requests, concurrency, k)
+
+
+def run_load(
+    internships: int = 10000,
+    students: int = 1000,
+    requests: int = 1000,
+    concurrency: int = 8,
+    k: int = 5,
+    warmup: int = 50,
+    seed: int = 0,
+    cache: bool = False
+) -> Dict:
+    """
+    Load the generated catalog, then drive the recommendation endpoint in-process.
+    The result cache is disabled unless `cache` is set.
+    """
+    with SessionLocal() as db:
+        populate_database(db, internships, seed)
+    forms = list(generate_students(students, seed))
+
+    max_size = result_cache.max_size
+    if not cache:
+        result_cache.max_size = 0
+    try:
+        results = asyncio.run(_run(forms, requests, concurrency, k, warmup))
+    finally:
+        result_cache.max_size = max_size
+        result_cache.clear()
+
+    return {
+        "benchmark": "load",
+        "params": {
+            "internships": internships,
+            "students": students,
+            "requests": requests,
+            "concurrency": concurrency,
+            "k": k,
+            "warmup": warmup,
+            "seed": seed,
+            "cache": cache,
+        },
+        "environment": environment(),
+        "results": {"recommendations": results},
+        "peak_rss_mb": peak_rss_mb(),
+    }
@@ -0,0 +1,132 @@
+# benchmarks/micro.py
+import time
+from itertools import cycle, islice
+from typing import Callable, Dict, Iterable
+from app import crud, migrations, schemas
+from app.cache import result_cache
+from app.catalog import catalog
+from app.database import SessionLocal, engine
+from app.scoring import calculate_description_similarity_mock, calculate_rule_based_score
+from .report import environment, latency_stats, peak_rss_mb
+from .synthetic import generate_students, populate_database, synthetic_snapshot
+
+
+def time_calls(fn: Callable, calls: Iterable[tuple]) -> Dict:
+    """
+    Call fn(*args) for each args tuple and summarize the per-call latency
+    """
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for args in calls:
+        t0 = clock()
+        fn(*args)
+        latencies.append(clock() - t0)
+    elapsed = clock() - started
+    stats = latency_stats(latencies)
+    stats["ops_per_s"] = round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def run_micro(
+    internships: int = 10000,
+    students: int = 100,
+    calls: int = 100000,
+    k: int = 5,
+    seed: int = 0,
+    cache: bool = False
+) -> Dict:
+    """
+    Time the scoring functions on (internship, student) pairs and the crud
+    entry points against a database holding `internships` generated rows.
+    The result cache is disabled unless `cache` is set.
+    """
+    snapshot = synthetic_snapshot(internships, seed)
+    forms = list(generate_students(students, seed))
+    pairs = list(islice(zip(cycle(snapshot.records), cycle(forms)), calls))
+    results = {}
+
+    # 1. Scoring functions, one internship/student pair per call
+    results["calculate_rule_based_score"] = time_calls(calculate_rule_based_score, pairs)
+    results["calculate_description_similarity_mock"] = time_calls(
+        calculate_description_similarity_mock,
+        ((record.description, form["description"]) for record, form in pairs)
+    )
+    del snapshot, pairs
+
+    # 2. Crud entry points on a populated database
+    migrations.migrate(engine)
+    max_size = result_cache.max_size
+    if not cache:
+        result_cache.max_size = 0
+    try:
+        with SessionLocal() as db:
+            t0 = time.perf_counter()
+            populate_database(db, internships, seed)
+            populate_seconds = time.perf_counter() - t0
+
+            # First call loads the catalog snapshot from the database
+            catalog.invalidate()
+            results["get_form_options_cold"] = time_calls(crud.get_form_options, [(db,)])
+            results["get_form_options"] = time_calls(crud.get_form_options, [(db,)] * students)
+
+            # First recommendation builds the snapshot's indexes and score arrays
+            student_forms = [schemas.StudentForm(**form) for form in forms]
+            results["get_recommendations_cold"] = time_calls(crud.get_recommendations, [(db, student_forms[0], k)])
+            results["get_recommendations"] = time_calls(
+                crud.get_recommendations, [(db, form, k) for form in student_forms]
+            )
+    finally:
+        result_cache.max_size = max_size
+        result_cache.clear()
+
+    return {
+        "benchmark": "micro",
+        "params": {
+            "internships": internships,
+            "students": students,
+            "calls": calls,
+            "k": k,
+            "seed": seed,
+            "cache": cache,
+        },
+        "environment": environment(),
+        "populate_seconds": round(populate_seconds, 3),
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_shards(internships: int = 100000, students: int = 100, shard_counts: Iterable[int] = (1, 2, 4), k: int = 5, seed: int = 0) -> Dict:
+    """
+    Latency of recommend() on one synthetic snapshot per shard count
+    (1 = serial); every count must return the serial pages
+    """
+    from app import config
+    from app.recommender import recommend
+    from app.sharding import shard_pool
+
+    snapshot = synthetic_snapshot(internships, seed)
+    student_forms = [schemas.StudentForm(**form) for form in generate_students(students, seed)]
+    shard_count, min_catalog = config.SHARD_COUNT, config.SHARD_MIN_CATALOG
+    config.SHARD_MIN_CATALOG = 0
+    results, expected = {}, None
+    try:
+        for shards in shard_counts:
+            config.SHARD_COUNT = shards
+            # Untimed: starts the shard workers and builds their indexes
+            recommend(snapshot, student_forms[0], k)
+            pages = [recommend(snapshot, form, k).recommendations for form in student_forms]
+            results[f"shards_{shards}"] = time_calls(recommend, [(snapshot, form, k) for form in student_forms])
+            expected = expected or pages
+            results[f"shards_{shards}"]["matches_serial"] = pages == expected
+            shard_pool.stop()
+    finally:
+        config.SHARD_COUNT, config.SHARD_MIN_CATALOG = shard_count, min_catalog
+
+    return {
+        "benchmark": "shards",
+        "params": {"internships": internships, "students": students, "shard_counts": list(shard_counts), "k": k, "seed": seed},
+        "environment": environment(),
+        "results": results,
+    }
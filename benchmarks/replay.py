@@ -0,0 +1,256 @@
+# benchmarks/replay.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy.engine import make_url
+from .report import environment, latency_stats, peak_rss_mb
+
+# Requests replayed by default: reads, plus the POST endpoints that don't change data
+READ_ONLY_POSTS = {"/api/recommendations", "/api/recommendations/batch"}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_log(path: str, include_writes: bool = False) -> List[Dict]:
+    """
+    Captured requests from a traffic log in timestamp order. Lines that are not
+    captured requests and requests whose body was not kept are skipped.
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or "method" not in entry or "path" not in entry or "body_skipped" in entry:
+                continue
+            if not include_writes and entry["method"] != "GET" and entry["path"] not in READ_ONLY_POSTS:
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda entry: entry.get("ts", 0))
+    return entries
+
+
+def _request_args(entry: Dict) -> Dict:
+    url = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+    args = {"method": entry["method"], "url": url}
+    body = entry.get("body")
+    if isinstance(body, str):
+        args["content"] = body.encode("utf-8")
+        args["headers"] = {"Content-Type": entry.get("content_type") or "text/plain"}
+    elif body is not None:
+        args["json"] = body
+    return args
+
+
+async def replay(app, entries: List[Dict], speed: float = 0, concurrency: int = 8) -> List[Dict]:
+    """
+    Send the captured requests to an ASGI app. With speed > 0 requests start at
+    their recorded offsets divided by speed; with speed 0 they are sent as fast
+    as `concurrency` clients allow. Returns status, body digest and latency per entry.
+    """
+    import httpx
+
+    results: List[Optional[Dict]] = [None] * len(entries)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+
+        async def send(i: int) -> None:
+            t0 = time.perf_counter()
+            response = await client.request(**_request_args(entries[i]))
+            results[i] = {
+                "status": response.status_code,
+                "digest": hashlib.sha256(response.content).hexdigest()[:16],
+                "latency": time.perf_counter() - t0,
+            }
+
+        if speed > 0 and entries:
+            first_ts, started = entries[0].get("ts", 0), time.perf_counter()
+            tasks = []
+            for i, entry in enumerate(entries):
+                delay = (entry.get("ts", 0) - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(i)))
+            await asyncio.gather(*tasks)
+        else:
+            next_entry = iter(range(len(entries)))
+
+            async def worker():
+                for i in next_entry:
+                    await send(i)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_replay(
+    log: str,
+    app_dir: Optional[str] = None,
+    speed: float = 0,
+    concurrency: int = 8,
+    include_writes: bool = False
+) -> Dict:
+    """
+    Replay a traffic log against the app of the build in `app_dir` (default:
+    this tree), in-process, against the database in BENCHMARK_DATABASE_URL
+    """
+    if app_dir:
+        sys.path.insert(0, os.path.abspath(app_dir))
+    # Checked before app.main is imported, which creates tables in its database
+    _check_database(app_dir or ROOT)
+    from app.main import app
+
+    entries = load_log(log, include_writes)
+    started = time.perf_counter()
+    results = asyncio.run(replay(app, entries, speed, concurrency))
+    elapsed = time.perf_counter() - started
+
+    by_route = defaultdict(list)
+    for entry, result in zip(entries, results):
+        by_route[f"{entry['method']} {entry['path']}"].append(result["latency"])
+    return {
+        "benchmark": "replay",
+        "params": {
+            "log": os.path.abspath(log),
+            "app_dir": os.path.abspath(app_dir or ROOT),
+            "speed": speed,
+            "concurrency": concurrency,
+            "include_writes": include_writes,
+        },
+        "environment": environment(),
+        "results": {
+            "requests": dict(
+                latency_stats([result["latency"] for result in results]),
+                seconds=round(elapsed, 3),
+                throughput_rps=round(len(results) / elapsed, 1) if elapsed > 0 else 0.0,
+                status_codes=dict(Counter(str(result["status"]) for result in results)),
+            ),
+            "routes": {route: latency_stats(latencies) for route, latencies in sorted(by_route.items())},
+        },
+        "responses": [{"status": result["status"], "digest": result["digest"]} for result in results],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _check_database(app_dir: str) -> None:
+    """
+    Fail unless the build's engine uses DATABASE_URL: builds from before the
+    database was configurable hard-code ./internships.db, and replaying them
+    would run against (and with --include-writes, change) that file instead
+    """
+    from app.database import engine
+    expected = make_url(os.environ["DATABASE_URL"]).database
+    found = engine.url.database
+    if not found or os.path.abspath(found) != os.path.abspath(expected):
+        raise RuntimeError(
+            f"The build in {app_dir} ignores DATABASE_URL and uses {engine.url}; "
+            f"only builds that read DATABASE_URL can be replayed"
+        )
+
+
+def _backup(source: str, target: str) -> None:
+    # The sqlite backup API gives a consistent copy, WAL contents included
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+def _prepare_database(target: str, database: Optional[str], internships: int, seed: int) -> None:
+    if database:
+        _backup(database, target)
+        return
+    from app import migrations
+    from app.database import SessionLocal, engine
+    from .synthetic import populate_database
+    migrations.migrate(engine)
+    with SessionLocal() as db:
+        populate_database(db, internships, seed)
+    engine.dispose()
+    _backup(engine.url.database, target)
+
+
+def compare(
+    log: str,
+    baseline: str,
+    candidate: str,
+    database: Optional[str] = None,
+    internships: int = 10000,
+    seed: int = 0,
+    speed: float = 0,
+    concurrency: int = 8,
+    include_writes: bool = False
+) -> Dict:
+    """
+    Replay a traffic log against two builds (source trees) in separate
+    processes, each on its own copy of the same database, and compare
+    response bodies and latency. The database is a copy of `database` or a
+    synthetic catalog of `internships` rows. Both builds must read
+    DATABASE_URL; a build that does not is refused (see _check_database).
+    """
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    base_db = os.path.join(workdir, "base.db")
+    _prepare_database(base_db, database, internships, seed)
+
+    reports = {}
+    for name, app_dir in (("baseline", baseline), ("candidate", candidate)):
+        db_path = os.path.join(workdir, f"{name}.db")
+        _backup(base_db, db_path)
+        output = os.path.join(workdir, f"{name}.json")
+        command = [
+            sys.executable, "-m", "benchmarks", "replay", log,
+            "--app-dir", app_dir, "--speed", str(speed), "--concurrency", str(concurrency), "--output", output,
+        ]
+        if include_writes:
+            command.append("--include-writes")
+        env = dict(os.environ, BENCHMARK_DATABASE_URL=f"sqlite:///{db_path}")
+        subprocess.run(command, cwd=ROOT, env=env, check=True)
+        with open(output) as f:
+            reports[name] = json.load(f)
+
+    entries = load_log(log, include_writes)
+    mismatches = [
+        {
+            "index": i,
+            "method": entry["method"],
+            "path": entry["path"],
+            "query": entry.get("query", ""),
+            "baseline_status": old["status"],
+            "candidate_status": new["status"],
+        }
+        for i, (entry, old, new) in enumerate(zip(entries, reports["baseline"]["responses"], reports["candidate"]["responses"]))
+        if old != new
+    ]
+    old, new = reports["baseline"]["results"]["requests"], reports["candidate"]["results"]["requests"]
+    return {
+        "benchmark": "replay-compare",
+        "params": {
+            "log": os.path.abspath(log),
+            "baseline": os.path.abspath(baseline),
+            "candidate": os.path.abspath(candidate),
+            "database": database,
+            "internships": None if database else internships,
+            "seed": seed,
+            "speed": speed,
+            "concurrency": concurrency,
+            "include_writes": include_writes,
+        },
+        "environment": environment(),
+        "requests": len(entries),
+        "mismatches": len(mismatches),
+        "mismatch_examples": mismatches[:50],
+        "latency_ratio": {
+            stat: round(new[stat] / old[stat], 3) if old[stat] else None
+            for stat in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")
+        },
+        "baseline": reports["baseline"]["results"],
+        "candidate": reports["candidate"]["results"],
+    }
@@ -0,0 +1,76 @@
+# benchmarks/report.py
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def latency_stats(seconds: List[float]) -> Dict:
+    """
+    Count, mean and p50/p95/p99/max of latencies, in milliseconds
+    """
+    values = sorted(seconds)
+    ms = lambda value: round(value * 1000, 6)
+    return {
+        "count": len(values),
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_report(report: Dict, output: Optional[str] = None) -> None:
+    """
+    Write a report as JSON with sorted keys, so two reports diff cleanly
+    """
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
@@ -0,0 +1,125 @@
+# benchmarks/synthetic.py
+import random
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List
+from sqlalchemy.orm import Session
+from app import config, crud, models, schemas
+from app.catalog import CatalogRecord, CatalogSnapshot, catalog
+from app.dummy_data import DUMMY_INTERNSHIPS
+from app.scoring import EDUCATION_HIERARCHY
+
+# Vocabularies come from the dummy data so synthetic rows look like real ones
+SECTORS = sorted(set(internship["sector"] for internship in DUMMY_INTERNSHIPS))
+EDUCATION_LEVELS = list(EDUCATION_HIERARCHY)
+SECTOR_SKILLS: Dict[str, List[str]] = defaultdict(list)
+SECTOR_TITLES: Dict[str, List[str]] = defaultdict(list)
+SECTOR_WORDS: Dict[str, List[str]] = defaultdict(list)
+for _internship in DUMMY_INTERNSHIPS:
+    _sector = _internship["sector"]
+    SECTOR_SKILLS[_sector].extend(
+        skill.strip() for skill in _internship["skills"].split(',') if skill.strip() not in SECTOR_SKILLS[_sector]
+    )
+    SECTOR_TITLES[_sector].append(_internship["title"])
+    SECTOR_WORDS[_sector].extend(word.strip(".,") for word in _internship["description"].split())
+ALL_SKILLS = sorted(set(skill for skills in SECTOR_SKILLS.values() for skill in skills))
+ALL_WORDS = [word for words in SECTOR_WORDS.values() for word in words]
+
+LOCATIONS = sorted(set(internship["location"] for internship in DUMMY_INTERNSHIPS) | {
+    "Ahmedabad", "Jaipur", "Kolkata", "Lucknow", "Noida", "Gurgaon", "Kochi", "Indore",
+})
+DURATIONS = ["1 month", "2 months", "3 months", "4 months", "6 months"]
+
+# Rough shape of the real catalog: more IT, mostly graduate-level postings
+SECTOR_WEIGHTS = [3 if sector == "IT" else 1 for sector in SECTORS]
+EDUCATION_WEIGHTS = [1, 3, 2, 5, 2, 1]
+
+
+def _description(rng: random.Random, sector: str, skills: List[str], words: int) -> str:
+    pool = SECTOR_WORDS[sector]
+    text = [rng.choice(pool) if rng.random() < 0.7 else rng.choice(ALL_WORDS) for _ in range(words)]
+    for skill in skills[:2]:
+        text.insert(rng.randrange(len(text) + 1), skill)
+    return " ".join(text).capitalize() + "."
+
+
+def _skills(rng: random.Random, sector: str, low: int, high: int) -> List[str]:
+    own = SECTOR_SKILLS[sector]
+    skills = rng.sample(own, min(len(own), rng.randint(low, high)))
+    # Some postings ask for a skill from another sector
+    if rng.random() < 0.2:
+        extra = rng.choice(ALL_SKILLS)
+        if extra not in skills:
+            skills.append(extra)
+    return skills
+
+
+def generate_internships(count: int, seed: int = 0) -> Iterator[Dict]:
+    """
+    Yield `count` InternshipCreate-shaped dicts; the same seed gives the same rows
+    """
+    rng = random.Random(f"internships:{seed}")
+    for _ in range(count):
+        sector = rng.choices(SECTORS, SECTOR_WEIGHTS)[0]
+        skills = _skills(rng, sector, 3, 5)
+        yield {
+            "title": rng.choice(SECTOR_TITLES[sector]),
+            "min_education": rng.choices(EDUCATION_LEVELS, EDUCATION_WEIGHTS)[0],
+            "skills": ", ".join(skills),
+            "sector": sector,
+            "location": rng.choice(LOCATIONS),
+            "duration": rng.choice(DURATIONS),
+            "no_of_posts": rng.randint(1, 20),
+            "is_active": True,
+            "description": _description(rng, sector, skills, rng.randint(12, 30)),
+        }
+
+
+def generate_students(count: int, seed: int = 0) -> Iterator[Dict]:
+    """
+    Yield `count` StudentForm-shaped dicts; the same seed gives the same profiles
+    """
+    rng = random.Random(f"students:{seed}")
+    for _ in range(count):
+        sector = rng.choices(SECTORS, SECTOR_WEIGHTS)[0]
+        skills = _skills(rng, sector, 2, 5)
+        yield {
+            "education": rng.choices(EDUCATION_LEVELS, EDUCATION_WEIGHTS)[0],
+            "skills": skills,
+            "sector": sector,
+            "preferred_location": rng.choice(LOCATIONS),
+            "description": _description(rng, sector, skills, rng.randint(8, 20)),
+        }
+
+
+def synthetic_snapshot(count: int, seed: int = 0) -> CatalogSnapshot:
+    """
+    Catalog snapshot of generated internships (ids 1..count) without a database
+    """
+    records = tuple(
+        CatalogRecord(id=i, **row)
+        for i, row in enumerate(generate_internships(count, seed), start=1)
+    )
+    return CatalogSnapshot(0, records)
+
+
+def populate_database(db: Session, count: int, seed: int = 0, chunk_size: int = None) -> int:
+    """
+    Replace the database contents with `count` generated internships
+    """
+    db.execute(models.internship_skills.delete())
+    db.query(models.Internship).delete()
+    db.query(models.Skill).delete()
+    db.commit()
+    catalog.clear()
+
+    chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+    rows = generate_internships(count, seed)
+    inserted = 0
+    while True:
+        chunk = [schemas.InternshipCreate(**row) for row in islice(rows, chunk_size)]
+        if not chunk:
+            break
+        inserted += crud.create_internships_bulk(db, chunk)
+    catalog.invalidate()
+    return inserted
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import tempfile
+
+# Keep tests away from the bundled internships.db
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
@@ -0,0 +1,90 @@
+# test_benchmarks.py
+import json
+import sqlite3
+import subprocess
+
+import pytest
+
+from benchmarks.load import run_load
+from benchmarks.replay import compare, load_log, run_replay
+from benchmarks.report import latency_stats
+from benchmarks.synthetic import EDUCATION_LEVELS, SECTORS, generate_internships, generate_students, populate_database
+from app import schemas
+from app.database import SessionLocal
+
+
+def test_generator_is_seeded():
+    assert list(generate_internships(50, seed=1)) == list(generate_internships(50, seed=1))
+    assert list(generate_internships(50, seed=1)) != list(generate_internships(50, seed=2))
+    assert list(generate_students(50, seed=1)) == list(generate_students(50, seed=1))
+
+    for row in generate_internships(200):
+        internship = schemas.InternshipCreate(**row)
+        assert internship.sector in SECTORS
+        assert internship.min_education in EDUCATION_LEVELS
+    for row in generate_students(200):
+        schemas.StudentForm(**row)
+
+
+def test_latency_stats_percentiles():
+    stats = latency_stats([i / 1000 for i in range(1, 101)])
+    assert stats["count"] == 100
+    assert (stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"]) == (50, 95, 99, 100)
+
+
+def test_load_driver_with_cold_catalog():
+    # Concurrent requests all find the catalog unloaded; this used to deadlock
+    report = run_load(internships=300, students=20, requests=40, concurrency=4, warmup=0)
+    results = report["results"]["recommendations"]
+    assert results["count"] == 40
+    assert sum(results["status_codes"].values()) == 40
+    assert set(results["status_codes"]) <= {"200", "404"}
+    assert results["throughput_rps"] > 0
+    assert report["peak_rss_mb"] > 0
+
+
+def test_replay_traffic_log(tmp_path):
+    with SessionLocal() as db:
+        populate_database(db, 300)
+    log = tmp_path / "traffic.jsonl"
+    lines = [
+        {"ts": 10.0, "method": "GET", "path": "/api/form-options", "query": "", "body": None},
+        {"ts": 11.0, "method": "DELETE", "path": "/api/clear-database", "query": "", "body": None},
+        {"ts": 12.0, "method": "POST", "path": "/api/internships/bulk", "body_skipped": 10 ** 6},
+    ] + [
+        {"ts": float(i), "method": "POST", "path": "/api/recommendations", "query": "k=3", "body": student}
+        for i, student in enumerate(generate_students(5))
+    ]
+    log.write_text("\n".join(json.dumps(line) for line in lines) + "\nnot json\n")
+
+    # Writes and requests without a kept body are skipped; entries are in time order
+    entries = load_log(str(log))
+    assert [entry["path"] for entry in entries] == ["/api/recommendations"] * 5 + ["/api/form-options"]
+    assert len(load_log(str(log), include_writes=True)) == 7
+
+    first = run_replay(str(log), concurrency=2)
+    second = run_replay(str(log), speed=100)
+    assert first["results"]["requests"]["count"] == 6
+    assert set(first["results"]["routes"]) == {"GET /api/form-options", "POST /api/recommendations"}
+    assert first["responses"] == second["responses"]
+    assert {response["status"] for response in first["responses"]} == {200}
+
+
+def test_compare_refuses_builds_with_a_hard_coded_database(tmp_path, capfd):
+    # An old build whose engine ignores DATABASE_URL
+    old_build = tmp_path / "old"
+    (old_build / "app").mkdir(parents=True)
+    (old_build / "app" / "__init__.py").write_text("")
+    (old_build / "app" / "database.py").write_text(
+        "from sqlalchemy import create_engine\n"
+        "engine = create_engine('sqlite:///./internships.db')\n"
+    )
+    (old_build / "app" / "main.py").write_text("raise AssertionError('must not be imported')\n")
+    log = tmp_path / "traffic.jsonl"
+    log.write_text(json.dumps({"ts": 1.0, "method": "GET", "path": "/api/form-options", "query": "", "body": None}) + "\n")
+    database = tmp_path / "empty.db"
+    sqlite3.connect(database).close()
+
+    with pytest.raises(subprocess.CalledProcessError):
+        compare(str(log), str(old_build), ".", database=str(database))
+    assert "ignores DATABASE_URL" in capfd.readouterr().err
@@ -0,0 +1,163 @@
+# test_cache.py
+import asyncio
+import threading
+
+import pytest
+
+from app import schemas
+from app.admission import AdmissionQueue, Overloaded, SingleFlight
+from app.cache import InMemorySharedBackend, ResultCache, canonical_form_key
+from app.ranking import Cursor
+from app.recommender import RecommendationPage
+
+
+def student(**overrides):
+    form = {
+        "education": "Bachelor's",
+        "skills": ["Python", "SQL"],
+        "sector": "IT",
+        "preferred_location": "Mumbai",
+        "description": "I like data science and Python",
+    }
+    form.update(overrides)
+    return schemas.StudentForm(**form)
+
+
+def test_canonical_key_ignores_case_order_duplicates_and_stop_words():
+    key = canonical_form_key(student())
+    assert canonical_form_key(student(skills=[" sql", "python", "Python"], sector="it", preferred_location="MUMBAI")) == key
+    assert canonical_form_key(student(description="I like the data science and python and data")) == key
+    assert canonical_form_key(student(skills=["Python"])) != key
+    assert canonical_form_key(student(), k=10) != key
+
+
+def test_lru_eviction_ttl_and_version_invalidation(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(max_size=2, ttl=60)
+    page = RecommendationPage([{"id": 1}])
+
+    cache.set("a", 1, page)
+    cache.set("b", 1, page)
+    assert cache.get("a", 1) is page
+    cache.set("c", 1, page)  # evicts "b", the least recently used
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is page
+
+    now[0] += 61
+    assert cache.get("a", 1) is None
+
+    cache.set("c", 1, page)
+    assert cache.get("c", 2) is None
+
+    assert cache.stats() == {
+        "size": 0, "max_size": 2, "ttl": 60, "hits": 2, "shared_hits": 0,
+        "misses": 3, "evictions": 1, "expirations": 1, "invalidations": 1,
+    }
+
+
+def test_shared_backend_serves_other_workers():
+    shared = InMemorySharedBackend()
+    first, second = ResultCache(10, 60, shared), ResultCache(10, 60, shared)
+    page = RecommendationPage([{"id": 1, "match_score": 42.0}], next_cursor=Cursor(1, 42.0, 7).encode())
+
+    first.set("key", 1, page)
+    assert second.get("key", 1) == page
+    assert second.stats()["shared_hits"] == 1
+    assert second.get("key", 2) is None
+    # The cursor is re-issued at the version of the worker reading it
+    assert Cursor.decode(second.get("key", 3, shared_version="1").next_cursor, 3) == Cursor(3, 42.0, 7)
+
+
+def test_pages_of_an_older_version_do_not_flush_the_cache():
+    cache = ResultCache(max_size=10, ttl=60)
+    newer, older = RecommendationPage([{"id": 2}]), RecommendationPage([{"id": 1}])
+    cache.set("a", 2, newer)
+    # A slow request finishing with the previous snapshot
+    cache.set("b", 1, older)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 2) is newer
+    assert cache.stats()["invalidations"] == 0 and cache.stats()["size"] == 1
+    cache.set("c", 3, newer)
+    assert cache.get("a", 2) is None and cache.stats()["invalidations"] == 1
+
+
+def test_single_flight_shares_one_run_between_concurrent_callers():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        started.set()
+        release.wait()
+        return "page"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.run("key", work)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.run("key", work))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    while flights.coalesced < 5:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+    assert results == ["page"] * 6 and len(runs) == 1
+    assert len(flights) == 0 and flights.run("key", lambda: "again") == "again"
+
+
+def test_admission_queue_sheds_when_full_or_late():
+    queue = AdmissionQueue(concurrency=1, queue_size=1, timeout=0.05)
+
+    async def scenario():
+        async def hold(seconds):
+            async with queue.slot_async():
+                await asyncio.sleep(seconds)
+                return "done"
+
+        first = asyncio.create_task(hold(0.2))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(0))
+        await asyncio.sleep(0)
+        assert queue.active == 1 and queue.depth == 1
+        with pytest.raises(Overloaded) as full:
+            await hold(0)
+        assert full.value.retry_after == 1
+        # The queued request is shed at its deadline, before the slot frees up
+        with pytest.raises(Overloaded):
+            await queued
+        assert await first == "done"
+        # Freed slots admit again
+        assert await hold(0) == "done"
+
+    asyncio.run(scenario())
+    assert queue.shed == {"queue_full": 1, "deadline": 1}
+    assert queue.active == 0 and queue.depth == 0
+
+    queue = AdmissionQueue(concurrency=1, queue_size=1, timeout=1)
+    held = [queue.slot()]
+    with queue.slot():
+        waiter = threading.Thread(target=held[0].__enter__)
+        waiter.start()
+        while queue.depth == 0:
+            pass
+    # Released slots are handed to the waiter in order
+    waiter.join()
+    assert queue.active == 1 and queue.depth == 0
+
+
+def test_admission_without_concurrency_limit_admits_everything():
+    queue = AdmissionQueue(concurrency=0, queue_size=0, timeout=0)
+    with queue.slot(), queue.slot(), queue.slot():
+        assert queue.active == 0 and queue.depth == 0
+
+    async def scenario():
+        async with queue.slot_async():
+            async with queue.slot_async():
+                return "done"
+
+    assert asyncio.run(scenario()) == "done"
+    assert queue.shed == {"queue_full": 0, "deadline": 0}
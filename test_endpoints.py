@@ -0,0 +1,358 @@
+# test_endpoints.py
+import json
+import pstats
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config, matching, metrics, profiling, serialization, traffic
+from app.admission import AdmissionQueue
+from app.cache import result_cache
+from app.catalog import catalog
+from app.main import app
+from benchmarks.synthetic import generate_internships, generate_students
+
+STUDENT = {
+    "education": "Bachelor's",
+    "skills": ["Python", "Machine Learning", "SQL"],
+    "sector": "IT",
+    "preferred_location": "Mumbai",
+    "description": "I am passionate about data science and machine learning with Python."
+}
+
+INTERNSHIP = {
+    "title": "Robotics Intern",
+    "min_education": "Bachelor's",
+    "skills": "ROS, C++",
+    "sector": "Robotics",
+    "location": "Pune",
+    "duration": "6 months",
+    "no_of_posts": 2,
+    "is_active": True,
+    "description": "Build robot control software."
+}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        client.delete("/api/clear-database")
+        catalog.invalidate()
+        client.post("/api/populate-dummy-data")
+        yield client
+        client.delete("/api/clear-database")
+
+
+def test_recommendations(client):
+    response = client.post("/api/recommendations", json=STUDENT)
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()][:1] == ["Data Science Intern"]
+
+
+def test_form_options_etag_and_changes(client):
+    response = client.get("/api/form-options")
+    etag, version = response.headers["ETag"], int(response.headers["X-Catalog-Version"])
+    assert "Python" in response.json()["skills_options"]
+
+    assert client.get("/api/form-options", headers={"If-None-Match": etag}).status_code == 304
+
+    created = client.post("/api/internships", json=INTERNSHIP).json()
+    response = client.get("/api/form-options", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Robotics" in response.json()["sector_options"]
+
+    changes = client.get("/api/form-options/changes", params={"since": version}).json()
+    assert changes["added"]["sector_options"] == ["Robotics"]
+    assert changes["added"]["skills_options"] == ["C++", "ROS"]
+    assert changes["removed"]["sector_options"] == []
+
+    # Added then removed again: no net change since the first version
+    assert client.post(f"/api/internships/{created['id']}/deactivate").status_code == 200
+    changes = client.get("/api/form-options/changes", params={"since": version}).json()
+    assert changes["added"]["sector_options"] == []
+    assert "Robotics" not in client.get("/api/form-options").json()["sector_options"]
+
+    assert client.get("/api/form-options/changes", params={"since": -1}).status_code == 410
+
+
+def test_bulk_ingestion_ndjson_and_csv(client, monkeypatch):
+    monkeypatch.setattr(config, "BULK_CHUNK_SIZE", 2)
+    rows = [dict(INTERNSHIP, title=f"Robotics Intern {i}") for i in range(5)]
+    body = "\n".join(json.dumps(row) for row in rows[:3]) + "\n{not json}\n" + json.dumps({"title": "x"}) + "\n"
+    body += "\n".join(json.dumps(row) for row in rows[3:])
+    response = client.post("/api/internships/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    report = response.json()
+    assert report["inserted"] == 5
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [4, 5]
+
+    csv_body = (
+        "title,min_education,skills,sector,location,duration,no_of_posts,is_active,description\n"
+        'Drone Intern,Diploma,"Drones, GIS",Aviation,Remote,2 months,1,true,"Fly drones,\nmap fields"\n'
+        "Bad Intern,Diploma,GIS,Aviation,Remote,2 months,many,true,desc\n"
+    )
+    report = client.post("/api/internships/bulk", content=csv_body, headers={"Content-Type": "text/csv"}).json()
+    assert report["inserted"] == 1
+    assert report["errors"][0]["row"] == 2 and "no_of_posts" in report["errors"][0]["error"]
+
+    titles = [internship["title"] for internship in client.get("/api/internships").json()]
+    assert "Robotics Intern 4" in titles and "Drone Intern" in titles
+    options = client.get("/api/form-options").json()
+    assert "Aviation" in options["sector_options"] and "GIS" in options["skills_options"]
+
+
+def test_bulk_ingestion_reports_invalid_utf8_per_row(client):
+    row = json.dumps(dict(INTERNSHIP, title="Robotics Intern \u00e9"), ensure_ascii=False).encode()
+    body = row + b"\n" + row.replace("\u00e9".encode(), b"\xe9") + b"\n" + row
+    report = client.post("/api/internships/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert report["inserted"] == 2 and report["failed"] == 1
+    assert report["errors"][0]["row"] == 2 and "UTF-8" in report["errors"][0]["error"]
+
+    csv_body = (
+        b"title,min_education,skills,sector,location,duration,no_of_posts,is_active,description\n"
+        b'Drone Intern,Diploma,GIS,Aviation,Remote,2 months,1,true,"Fly \xff drones,\nmap fields"\n'
+        b"Map Intern,Diploma,GIS,Aviation,Remote,2 months,1,true,Map fields\n"
+    )
+    report = client.post("/api/internships/bulk", content=csv_body, headers={"Content-Type": "text/csv"}).json()
+    assert report["inserted"] == 1
+    assert report["errors"] == [{"row": 1, "error": "Invalid UTF-8 at byte 62 of the line"}]
+
+
+def test_internships_keyset_pagination_projection_and_streaming(client):
+    everything = client.get("/api/internships").json()
+    assert [row["id"] for row in everything] == sorted(row["id"] for row in everything)
+
+    pages, after = [], None
+    while True:
+        params = {"limit": 3, "fields": "title,sector"}
+        if after is not None:
+            params["after"] = after
+        response = client.get("/api/internships", params=params)
+        pages.extend(response.json())
+        after = response.headers.get("X-Next-After")
+        if after is None:
+            break
+    assert pages == [{"title": row["title"], "sector": row["sector"], "id": row["id"]} for row in everything]
+
+    lines = client.get("/api/internships", params={"format": "ndjson", "sector": "IT", "location": "Mumbai"}).text.splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Data Science Intern"]
+    assert client.get("/api/internships", params={"fields": "salary"}).status_code == 400
+
+    # Skill filters are counted over the normalized skill tables, case-insensitively
+    def required(row):
+        return {skill.strip().lower() for skill in row["skills"].split(",")}
+
+    for skills, min_skills in (("python, SQL", 1), ("Python,sql", 2), ("excel", 1)):
+        wanted = {skill.strip().lower() for skill in skills.split(",")}
+        found = client.get("/api/internships", params={"skills": skills, "min_skills": min_skills, "fields": "skills"}).json()
+        expected = [row for row in everything if len(required(row) & wanted) >= min_skills]
+        assert expected
+        assert found == [{"skills": row["skills"], "id": row["id"]} for row in expected]
+    assert any(len(required(row) & {"python", "sql"}) == 1 for row in everything)
+
+
+def test_metrics_and_server_timing(client, monkeypatch):
+    assert client.get("/metrics").status_code == 404
+    assert "server-timing" not in client.post("/api/recommendations", json=STUDENT).headers
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(result_cache, "max_size", 0)
+    response = client.post("/api/recommendations", json=STUDENT)
+    stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert stages == ["catalog", "candidates", "scoring", "ranking", "format", "serialize", "total"]
+    response = client.get("/api/form-options")
+    assert [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")] == ["catalog", "facets", "total"]
+
+    text = client.get("/metrics").text
+    assert 'http_requests_total{method="POST",route="/api/recommendations",status="200"} 1' in text
+    assert 'recommendation_requests_total{cache="off"} 1' in text
+    assert "recommendation_candidates_scored_count 1" in text
+    assert 'pipeline_stage_duration_seconds_count{stage="scoring"} 1' in text
+    assert "catalog_size 10" in text
+
+
+def test_profiling_sampled_requests(client, monkeypatch, tmp_path):
+    assert client.get("/api/admin/profiles").status_code == 404
+
+    monkeypatch.setattr(profiling, "enabled", True)
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "")
+    # Without a token the admin endpoints stay closed
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles/1", headers={"X-Profile": ""}).status_code == 403
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "profiles", profiling.ProfileStore(2))
+    monkeypatch.setattr(result_cache, "max_size", 0)
+    assert "x-profile-id" not in client.post("/api/recommendations", json=STUDENT).headers
+    assert "x-profile-id" not in client.post("/api/recommendations", json=STUDENT, headers={"X-Profile": "wrong"}).headers
+    assert client.get("/api/admin/profiles").status_code == 403
+
+    response = client.post("/api/recommendations", json=STUDENT, headers={"X-Profile": "secret"})
+    profile_id = int(response.headers["x-profile-id"])
+    listed = client.get("/api/admin/profiles", headers={"X-Profile": "secret"}).json()
+    assert [(p["id"], p["path"], p["trigger"], p["formats"]) for p in listed] == [
+        (profile_id, "/api/recommendations", "header", ["pstats"])
+    ]
+
+    # Scoring runs in the threadpool and is still part of the profile
+    response = client.get(f"/api/admin/profiles/{profile_id}", headers={"X-Profile": "secret"})
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(response.content)
+    functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+    assert {"get_recommendations", "recommend", "rule_scores"} <= functions
+
+    monkeypatch.setattr(config, "PROFILER", "sampling")
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_RATE", 1.0)
+    response = client.get("/api/internships", params={"limit": 5})
+    sampled_id = int(response.headers["x-profile-id"])
+    response = client.get(f"/api/admin/profiles/{sampled_id}", params={"format": "collapsed"}, headers={"X-Profile": "secret"})
+    assert response.status_code == 200
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+    assert client.get(f"/api/admin/profiles/{sampled_id}", headers={"X-Profile": "secret"}).status_code == 404
+
+    # The ring keeps the two most recent profiles
+    client.get("/")
+    assert profile_id not in [p["id"] for p in client.get("/api/admin/profiles", headers={"X-Profile": "secret"}).json()]
+
+
+def test_fast_serialization_is_byte_identical(client, monkeypatch):
+    monkeypatch.setattr(result_cache, "max_size", 0)
+    rows = list(generate_internships(300, seed=3))
+    for i, row in enumerate(rows[:20]):
+        # Non-ASCII text, quotes, escapes and control characters
+        row["title"] = f'Intern "{i}" \\ naïve café – 日本語 \u2028 \x7f'
+        row["description"] += " tab\there\nnew line / slash"
+    body = "\n".join(json.dumps(row) for row in rows)
+    assert client.post("/api/internships/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).json()["inserted"] == 300
+
+    special = False
+    for student in generate_students(30, seed=3):
+        for params in ({}, {"k": 17}):
+            monkeypatch.setattr(config, "FAST_SERIALIZATION", False)
+            expected = client.post("/api/recommendations", json=student, params=params)
+            monkeypatch.setattr(config, "FAST_SERIALIZATION", True)
+            actual = client.post("/api/recommendations", json=student, params=params)
+            assert actual.status_code == expected.status_code
+            assert actual.content == expected.content
+            assert actual.headers.get("x-next-cursor") == expected.headers.get("x-next-cursor")
+            assert actual.headers["content-type"] == expected.headers["content-type"]
+            special = special or "日本語" in expected.text
+    assert special
+
+    # Recommendations no longer in the catalog are encoded from their fields
+    recommendations = json.loads(expected.content)
+    assert serialization.encode_recommendations(None, recommendations) == expected.content
+
+
+def test_traffic_capture(client, monkeypatch, tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(config, "TRAFFIC_CAPTURE_PATH", str(path))
+    client.post("/api/recommendations", json=STUDENT)
+    assert not path.exists()
+
+    monkeypatch.setattr(traffic, "enabled", True)
+    monkeypatch.setattr(config, "TRAFFIC_CAPTURE_MAX_BODY", 1000)
+    client.post("/api/recommendations", json=STUDENT, params={"k": 3})
+    client.get("/api/form-options")
+    client.get("/")
+    monkeypatch.setattr(config, "TRAFFIC_CAPTURE_REDACT", True)
+    client.post("/api/recommendations", json=STUDENT)
+    client.post("/api/recommendations/batch", json=[STUDENT] * 20)
+    traffic.traffic_log().close()
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(e["method"], e["path"]) for e in entries] == [
+        ("POST", "/api/recommendations"),
+        ("GET", "/api/form-options"),
+        ("POST", "/api/recommendations"),
+        ("POST", "/api/recommendations/batch"),
+    ]
+    assert entries[0]["body"] == STUDENT and entries[0]["query"] == "k=3" and entries[0]["status"] == 200
+    assert entries[0]["duration_ms"] > 0
+    assert entries[1]["body"] is None
+    assert entries[2]["body"] == dict(STUDENT, description="") and entries[2]["redacted"]
+    assert entries[3]["body"] is None and entries[3]["body_skipped"] > 1000
+
+
+def test_traffic_capture_never_records_the_profiling_token(client, monkeypatch, tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    monkeypatch.setattr(config, "TRAFFIC_CAPTURE_PATH", str(path))
+    monkeypatch.setattr(traffic, "enabled", True)
+    monkeypatch.setattr(profiling, "enabled", True)
+    monkeypatch.setattr(config, "PROFILE_TOKEN", "secret-token")
+    monkeypatch.setattr(profiling, "profiles", profiling.ProfileStore(2))
+
+    response = client.post("/api/recommendations?k=3&profile=secret-token", json=STUDENT)
+    assert "x-profile-id" in response.headers
+    client.get("/api/internships?limit=2&%70rofile=secret-token")
+    client.get("/api/admin/profiles", params={"profile": "secret-token"}, headers={"X-Profile": "secret-token"})
+    traffic.traffic_log().close()
+
+    text = path.read_text()
+    assert "secret-token" not in text
+    entries = [json.loads(line) for line in text.splitlines()]
+    assert [(e["path"], e["query"]) for e in entries] == [("/api/recommendations", "k=3"), ("/api/internships", "limit=2")]
+
+
+def test_traffic_log_writes_off_the_calling_thread(monkeypatch, tmp_path):
+    monkeypatch.setattr(traffic, "QUEUE_SIZE", 2)
+    started, release = threading.Event(), threading.Event()
+    dumps = json.dumps
+
+    def slow_dumps(*args, **kwargs):
+        started.set()
+        release.wait()
+        return dumps(*args, **kwargs)
+
+    monkeypatch.setattr(traffic.json, "dumps", slow_dumps)
+    log = traffic.TrafficLog(str(tmp_path / "traffic.jsonl"))
+    log.write({"n": 0})
+    started.wait()
+    # The writer is busy: writes still return at once, past the queue size they are dropped
+    for n in range(1, 4):
+        log.write({"n": n})
+    assert log.dropped == 1
+    release.set()
+    log.close()
+    assert [json.loads(line)["n"] for line in (tmp_path / "traffic.jsonl").read_text().splitlines()] == [0, 1, 2]
+
+
+def test_saved_profile_matches_since(client):
+    profile = client.post("/api/profiles", json={**STUDENT, "sector": "Robotics", "skills": ["ROS"], "threshold": 30}).json()
+    page = client.get(f"/api/profiles/{profile['id']}/matches").json()
+    assert page == {"profile_id": profile["id"], "matches": [], "next_since": 0}
+
+    created = client.post("/api/internships", json=INTERNSHIP).json()
+    client.post("/api/internships", json={**INTERNSHIP, "sector": "Finance", "skills": "Tally"})
+    page = client.get(f"/api/profiles/{profile['id']}/matches").json()
+    assert [item["id"] for item in page["matches"]] == [created["id"]]
+    assert client.get(f"/api/profiles/{profile['id']}/matches", params={"since": page["next_since"]}).json()["matches"] == []
+
+    assert client.delete(f"/api/profiles/{profile['id']}").status_code == 200
+    assert client.get(f"/api/profiles/{profile['id']}/matches").status_code == 404
+
+
+def test_failed_match_recording_does_not_fail_the_insert(client, monkeypatch, caplog):
+    client.post("/api/profiles", json={**STUDENT, "threshold": 1})
+
+    def broken(self, internships):
+        raise RuntimeError("matching is down")
+
+    monkeypatch.setattr(matching.ProfileIndex, "matches", broken)
+    response = client.post("/api/internships", json=INTERNSHIP)
+    assert response.status_code == 200
+    assert "Recording saved profile matches failed" in caplog.text
+    titles = [internship["title"] for internship in client.get("/api/internships").json()]
+    assert titles.count(INTERNSHIP["title"]) == 1
+
+
+def test_recommendations_shed_with_retry_after(client, monkeypatch):
+    queue = AdmissionQueue(concurrency=1, queue_size=0, timeout=3)
+    monkeypatch.setattr("app.crud.admission", queue)
+    monkeypatch.setattr(result_cache, "max_size", 0)
+    with queue.slot():
+        response = client.post("/api/recommendations", json=STUDENT)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert queue.shed["queue_full"] == 1
+    assert client.post("/api/recommendations", json=STUDENT).status_code == 200
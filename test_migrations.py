@@ -0,0 +1,63 @@
+# test_migrations.py
+import shutil
+import sqlite3
+
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import Session
+
+from app import crud, database, models, schemas
+from app.catalog import catalog
+from app.migrations import migrate
+
+
+def test_migrate_backfills_existing_database(tmp_path):
+    # Start from the bundled database, created before skills were normalized
+    path = tmp_path / "internships.db"
+    shutil.copy("internships.db", path)
+    with sqlite3.connect(path) as connection:
+        connection.executemany(
+            "INSERT INTO internships (title, min_education, skills, sector, location, duration, no_of_posts, is_active, description)"
+            " VALUES (?, ?, ?, ?, ?, ?, 1, ?, 'desc')",
+            [
+                ("Data", "Bachelor's", "Python, SQL, Machine Learning", "IT", "Mumbai", "6 months", 1),
+                ("Web", "Bachelor's", "HTML, CSS, python", "IT", "Delhi", "3 months", 1),
+                ("Old", "Bachelor's", "Python, SQL", "IT", "Delhi", "3 months", 0),
+            ],
+        )
+
+    engine = create_engine(f"sqlite:///{path}")
+    assert migrate(engine) == 3
+    assert migrate(engine) == 0
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("internships")}
+    assert {"ix_internships_active_sector", "ix_internships_active_location", "ix_internships_active_min_education"} <= indexes
+
+    catalog.invalidate()
+    with Session(engine) as db:
+        skills = {skill.name for skill in db.query(models.Skill)}
+        assert skills == {"python", "sql", "machine learning", "html", "css"}
+        links = db.execute(
+            select(models.internship_skills.c.internship_id, models.Skill.name)
+            .join(models.Skill, models.Skill.id == models.internship_skills.c.skill_id)
+            .order_by(models.internship_skills.c.internship_id, models.Skill.name)
+        ).all()
+        assert [tuple(link) for link in links] == [
+            (1, "machine learning"), (1, "python"), (1, "sql"),
+            (2, "css"), (2, "html"), (2, "python"),
+            (3, "python"), (3, "sql"),
+        ]
+
+        created = crud.create_internship(db, schemas.InternshipCreate(
+            title="ML", min_education="Master's", skills="Machine Learning, PyTorch", sector="IT",
+            location="Pune", duration="6 months", no_of_posts=1, is_active=True, description="desc",
+        ))
+        assert sorted(skill.name for skill in created.skill_set) == ["machine learning", "pytorch"]
+        # API still sees the original comma-separated string
+        assert created.skills == "Machine Learning, PyTorch"
+    catalog.invalidate()
+
+
+def test_sqlite_engine_gets_its_pragmas():
+    assert database.IS_SQLITE
+    with database.engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
@@ -0,0 +1,729 @@
+# test_recommendations.py
+import json
+import random
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import ann, config, crud, matching, models, pruning, rerank, schemas, scoring, shared_catalog
+from app.batch_scoring import BatchScorer
+from app.cache import InMemorySharedBackend, ResultCache, result_cache
+from app.catalog import Catalog, CatalogRecord, CatalogSnapshot, catalog
+from app.index import InvertedIndex
+from app.ranking import Cursor, InvalidCursorError
+from app.recommender import recommend
+from app.scoring import calculate_description_similarity_mock, calculate_rule_based_score, calculate_total_score
+from app.serialization import RecommendationFragments, encode_recommendations
+from app.sharding import shard_pool
+from app.similarity import DescriptionIndex
+
+SKILLS = ["Python", "SQL", "Machine Learning", "React", "Node.js", "Excel", "SEO", "Content Writing",
+          "Communication", "Photoshop", "Flutter", "Django", "Sales", "Tally", "Recruitment"]
+SECTORS = ["IT", "Finance", "Marketing", "HR", "Design", "Sales"]
+LOCATIONS = ["Delhi", "Mumbai", "Bangalore", "Remote", "Pune", "Chennai"]
+EDUCATION = ["10th Pass", "12th Pass", "Diploma", "Bachelor's", "Master's", "PhD", "Other"]
+WORDS = ["the", "and", "build", "data", "web", "apps", "with", "python", "Team", "analysis",
+         "design", "content", "marketing", "sales", "customer", "research", "for", "models"]
+
+
+def random_internship(rng):
+    return schemas.InternshipCreate(
+        title="Intern",
+        min_education=rng.choice(EDUCATION),
+        skills=", ".join(rng.sample(SKILLS, rng.randint(1, 5))),
+        sector=rng.choice(SECTORS),
+        location=rng.choice(LOCATIONS),
+        duration="3 months",
+        no_of_posts=1,
+        is_active=rng.random() > 0.1,
+        description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))),
+    )
+
+
+def random_student(rng):
+    return schemas.StudentForm(
+        education=rng.choice(EDUCATION),
+        skills=rng.sample([skill.lower() if rng.random() < 0.3 else skill for skill in SKILLS], rng.randint(1, 4)),
+        sector=rng.choice(SECTORS + ["Legal"]),
+        preferred_location=rng.choice(LOCATIONS + ["Jaipur"]),
+        description=" ".join(rng.choice(WORDS + ["unrelated"]) for _ in range(rng.randint(0, 10))),
+    )
+
+
+def exhaustive_recommendations(db, student_form):
+    """
+    Reference implementation: score every active internship, sort, take top 5
+    """
+    student_data = student_form.model_dump()
+    scored = []
+    for internship in crud.get_all_internships(db):
+        score = calculate_total_score(internship, student_data)
+        if score > 0:
+            scored.append((internship.id, score))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [(internship_id, round(score, 2)) for internship_id, score in scored[:5]]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    catalog.invalidate()
+    try:
+        yield session
+    finally:
+        session.close()
+        catalog.invalidate()
+
+
+def test_recommendations_match_exhaustive_scoring(db):
+    rng = random.Random(7)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+    db.commit()
+
+    students = [random_student(rng) for _ in range(200)]
+    for student_form in students[:100]:
+        result = [(item["id"], item["match_score"]) for item in crud.get_recommendations(db, student_form)]
+        assert result == exhaustive_recommendations(db, student_form)
+
+    # Incremental inserts patch the loaded snapshot and its indexes
+    for _ in range(100):
+        crud.create_internship(db, random_internship(rng))
+    for student_form in students[100:]:
+        result = [(item["id"], item["match_score"]) for item in crud.get_recommendations(db, student_form)]
+        assert result == exhaustive_recommendations(db, student_form)
+
+
+def test_index_candidates_are_exactly_the_positive_scores(db):
+    rng = random.Random(11)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+    db.commit()
+
+    snapshot = catalog.snapshot(db)
+    index = snapshot.derived(InvertedIndex)
+    for _ in range(200):
+        student_data = random_student(rng).model_dump()
+        expected = [
+            position for position, internship in enumerate(snapshot.records)
+            if calculate_total_score(internship, student_data) > 0
+        ]
+        assert index.candidates(student_data, len(snapshot)) == expected
+
+
+def test_batch_rule_scores_match_scalar_function(db, monkeypatch):
+    rng = random.Random(3)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(200))
+    db.commit()
+
+    snapshot = catalog.snapshot(db)
+    scorer = snapshot.derived(BatchScorer)
+    students = [random_student(rng).model_dump() for _ in range(50)]
+    for student_data in students:
+        expected = [calculate_rule_based_score(internship, student_data) for internship in snapshot.records]
+        assert scorer.rule_scores(student_data) == pytest.approx(expected, abs=1e-9)
+
+    # Weights are read at call time
+    monkeypatch.setattr(scoring, "SKILL_MATCH_WEIGHT", 5)
+    monkeypatch.setattr(scoring, "PERFECT_MATCH_BONUS", 0.5)
+    for student_data in students:
+        expected = [calculate_rule_based_score(internship, student_data) for internship in snapshot.records]
+        assert scorer.rule_scores(student_data) == pytest.approx(expected, abs=1e-9)
+
+
+def test_batch_scorer_ignores_skills_added_by_later_snapshots():
+    rng = random.Random(5)
+    records = tuple(
+        CatalogRecord(i, **random_internship(rng).model_copy(update={"is_active": True}).model_dump())
+        for i in range(1, 21)
+    )
+    old = CatalogSnapshot(1, records)
+    scorer = old.derived(BatchScorer)
+    student_data = random_student(rng).model_dump()
+    expected = scorer.rule_scores(student_data)
+    student_data["skills"] = student_data["skills"] + ["Quantum Computing"]
+    new_record = records[0]._replace(id=21, skills="Quantum Computing, Python")
+    appended = []
+
+    class RacingVocabulary(dict):
+        def get(self, key, default=None):
+            # An insert extends the shared vocabulary while the old scorer is scoring
+            if not appended:
+                appended.append(None)
+                appended[0] = old.appended(2, (new_record,))
+            return super().get(key, default)
+
+    scorer.skill_ids = RacingVocabulary(scorer.skill_ids)
+    assert scorer.rule_scores(student_data) == pytest.approx(expected, abs=1e-12)
+    newer = appended[0].derived(BatchScorer)
+    assert newer is not scorer and "quantum computing" in scorer.skill_ids
+    assert newer.rule_scores(student_data)[-1] == pytest.approx(calculate_rule_based_score(new_record, student_data), abs=1e-9)
+
+
+def test_description_index_matches_mock_similarity(db):
+    rng = random.Random(5)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(150))
+    db.commit()
+
+    snapshot = catalog.snapshot(db)
+    index = snapshot.derived(DescriptionIndex)
+    for _ in range(50):
+        crud.create_internship(db, random_internship(rng))
+    extended = catalog.snapshot(db)
+
+    # An index patched on insert equals one built from scratch
+    rebuilt = DescriptionIndex.build(extended.records)
+    assert np.array_equal(extended.derived(DescriptionIndex).indices, rebuilt.indices)
+    assert np.array_equal(extended.derived(DescriptionIndex).document_frequency, rebuilt.document_frequency)
+
+    for _ in range(50):
+        description = random_student(rng).description
+        expected = [calculate_description_similarity_mock(internship.description, description) for internship in extended.records]
+        assert extended.derived(DescriptionIndex).scores(description, mode="jaccard").tolist() == expected
+        # The earlier snapshot keeps scoring its own rows
+        assert len(index.scores(description)) == len(snapshot)
+
+        for mode in ("tfidf", "bm25"):
+            scores = rebuilt.scores(description, mode=mode)
+            assert ((scores >= 0) & (scores <= 40)).all()
+            assert ((scores > 0) == (np.asarray(expected) > 0)).all()
+
+
+def test_cursor_pagination_walks_the_full_ranking(db):
+    rng = random.Random(13)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(200))
+    db.commit()
+
+    for _ in range(20):
+        student_form = random_student(rng)
+        full = crud.get_recommendations(db, student_form, k=1000)
+        pages, cursor = [], None
+        while True:
+            page = crud.get_recommendation_page(db, student_form, k=7, cursor=cursor)
+            assert len(page.recommendations) <= 7
+            pages.extend(page.recommendations)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert pages == full
+
+    page = crud.get_recommendation_page(db, random_student(rng), k=1)
+    crud.create_internship(db, random_internship(rng))
+    with pytest.raises(InvalidCursorError):
+        crud.get_recommendation_page(db, random_student(rng), k=1, cursor=page.next_cursor)
+    with pytest.raises(InvalidCursorError):
+        crud.get_recommendation_page(db, random_student(rng), k=1, cursor="not-a-cursor")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_batch_recommendations_match_single_requests_in_order(db, executor):
+    rng = random.Random(17)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(200))
+    db.commit()
+
+    students = [random_student(rng) for _ in range(30)]
+    payloads = [student_form.model_dump() for student_form in students]
+    payloads.insert(4, {"education": "Bachelor's"})
+
+    results = list(crud.get_recommendations_batch(db, payloads, k=3, executor=executor, workers=2))
+    assert [result["index"] for result in results] == list(range(len(payloads)))
+    assert "error" in results[4]
+    expected = [crud.get_recommendations(db, student_form, k=3) for student_form in students]
+    assert [result["recommendations"] for result in results[:4] + results[5:]] == expected
+
+
+def two_stage_reference(db, student_form, candidates, k=5):
+    """
+    Reference two-stage ranking: keep the best candidates by rule score, then rank them by total score
+    """
+    student_data = student_form.model_dump()
+    matching = [internship for internship in crud.get_all_internships(db) if calculate_total_score(internship, student_data) > 0]
+    kept = sorted(matching, key=lambda internship: (-calculate_rule_based_score(internship, student_data), internship.id))[:candidates]
+    scored = [(internship.id, calculate_total_score(internship, student_data)) for internship in kept]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return [(internship_id, round(score, 2)) for internship_id, score in scored[:k]]
+
+
+def test_two_stage_reranks_only_retrieved_candidates(db, monkeypatch):
+    rng = random.Random(17)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+    db.commit()
+    monkeypatch.setattr(config, "RERANK_BUDGET_MS", 10_000)
+
+    students = [random_student(rng) for _ in range(60)]
+    # Keeping every candidate gives exactly the single-stage results
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 10_000)
+    for student_form in students[:20]:
+        result = [(item["id"], item["match_score"]) for item in crud.get_recommendations(db, student_form)]
+        assert result == exhaustive_recommendations(db, student_form)
+
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 12)
+    for student_form in students[20:]:
+        page = crud.get_recommendation_page(db, student_form)
+        assert [(item["id"], item["match_score"]) for item in page.recommendations] == two_stage_reference(db, student_form, 12)
+        if page.pipeline is not None:
+            assert page.pipeline["kept"] == min(12, page.pipeline["retrieved"]) == page.pipeline["reranked"]
+            assert not page.pipeline["budget_exhausted"]
+
+
+def test_reranker_scores_only_the_kept_candidates(db, monkeypatch):
+    rng = random.Random(23)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(400))
+    db.commit()
+    snapshot = catalog.snapshot(db)
+    description_index = snapshot.derived(DescriptionIndex)
+    students = [random_student(rng) for _ in range(20)]
+    monkeypatch.setattr(config, "RERANK_BUDGET_MS", 10_000)
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 15)
+
+    for mode in ("jaccard", "tfidf", "bm25"):
+        monkeypatch.setattr(config, "DESCRIPTION_SIMILARITY_MODE", mode)
+        expected = []
+        for student_form in students:
+            # Positions-only scores equal the full scores of those rows
+            positions = np.sort(np.array(rng.sample(range(len(snapshot)), 30)))
+            full = description_index.scores(student_form.description, mode=mode)
+            assert description_index.scores(student_form.description, positions, mode).tolist() == full[positions].tolist()
+            expected.append(recommend(snapshot, student_form))
+            if mode == "jaccard":
+                page = [(item["id"], item["match_score"]) for item in expected[-1].recommendations]
+                assert page == two_stage_reference(db, student_form, 15)
+
+        scored_rows = []
+        original = getattr(DescriptionIndex, f"{mode}_at")
+        with monkeypatch.context() as patch:
+            # Full-catalog scoring is off limits: only the kept rows may be scored
+            patch.setattr(DescriptionIndex, mode, lambda self, tokens: pytest.fail("scored the whole catalog"))
+            patch.setattr(DescriptionIndex, f"{mode}_at", lambda self, tokens, positions: scored_rows.append(len(positions)) or original(self, tokens, positions))
+            for student_form, page in zip(students, expected):
+                assert recommend(snapshot, student_form) == page
+        assert scored_rows and max(scored_rows) <= 15
+
+
+def test_two_stage_falls_back_to_retrieval_order_without_budget(db, monkeypatch):
+    rng = random.Random(19)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(200))
+    db.commit()
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 20)
+    monkeypatch.setattr(config, "RERANK_BUDGET_MS", 0)
+
+    for _ in range(30):
+        student_form = random_student(rng)
+        student_data = student_form.model_dump()
+        page = crud.get_recommendation_page(db, student_form)
+        rule_scores = sorted(
+            ((-calculate_rule_based_score(internship, student_data), internship.id) for internship in crud.get_all_internships(db)
+             if calculate_total_score(internship, student_data) > 0)
+        )
+        expected = [(internship_id, round(-score, 2)) for score, internship_id in rule_scores if score < 0][:5]
+        assert [(item["id"], item["match_score"]) for item in page.recommendations] == expected
+        if expected:
+            assert page.pipeline["budget_exhausted"] and page.pipeline["reranked"] == 0
+
+
+def test_custom_reranker(db, monkeypatch):
+    rng = random.Random(23)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(100))
+    db.commit()
+
+    class ByPosition(rerank.Reranker):
+        name = "by-position"
+
+        def rerank(self, snapshot, student_data, positions, stage_one_scores, deadline):
+            return positions.astype(float) + 1
+
+    monkeypatch.setitem(rerank.RERANKERS, "by-position", ByPosition)
+    monkeypatch.setattr(config, "RERANKER", "by-position")
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 30)
+    snapshot = catalog.snapshot(db)
+    student_form = random_student(rng)
+    page = crud.get_recommendation_page(db, student_form)
+    ids = [item["id"] for item in page.recommendations]
+    assert ids == sorted(ids, reverse=True)
+    assert all(item["match_score"] == snapshot.positions[item["id"]] + 1 for item in page.recommendations)
+
+
+def test_ann_index_recall_and_exact_scores():
+    from benchmarks.synthetic import synthetic_snapshot
+    snapshot = synthetic_snapshot(3000)
+
+    report = ann.evaluate(snapshot, queries=40, k=10, exact="mock")
+    assert report["recall_at_k"] >= 0.9
+    assert report["mean_candidates"] < len(snapshot) / 2
+
+    description = snapshot.records[7].description
+    positions, scores = ann.search(snapshot, description, 5)
+    assert positions[0] == 7 and scores[0] == 40
+    for position, score in zip(positions.tolist(), scores.tolist()):
+        assert score == calculate_description_similarity_mock(snapshot.records[position].description, description)
+
+
+def test_ann_index_persists_and_follows_new_internships(db, tmp_path, monkeypatch):
+    rng = random.Random(29)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+    db.commit()
+    path = str(tmp_path / "ann.npz")
+    monkeypatch.setattr(config, "ANN_INDEX_PATH", path)
+    catalog.snapshot(db).derived(ann.MinHashLSH).save(path)
+
+    # Internships created after the index was saved are added on load
+    internship = crud.create_internship(db, random_internship(rng).model_copy(update={
+        "is_active": True, "description": "quantum cryptography fellowship",
+    }))
+    catalog.invalidate()
+    snapshot = catalog.snapshot(db)
+    loaded = snapshot.derived(ann.MinHashLSH)
+    fresh = ann.MinHashLSH(config.ANN_BANDS, config.ANN_ROWS).extend(snapshot.records, 0)
+    assert np.array_equal(loaded.ids, fresh.ids) and np.array_equal(loaded.keys, fresh.keys)
+
+    # create_internship patches the index of the live snapshot
+    for description in (internship.description, "fellowship in quantum cryptography"):
+        positions, _ = ann.search(snapshot, description, 1)
+        assert snapshot.records[positions[0]].id == internship.id
+    internship = crud.create_internship(db, random_internship(rng).model_copy(update={
+        "is_active": True, "description": "marine biology survey",
+    }))
+    snapshot = catalog.snapshot(db)
+    assert snapshot.derived(ann.MinHashLSH) is loaded
+    positions, _ = ann.search(snapshot, "marine biology", 1)
+    assert snapshot.records[positions[0]].id == internship.id
+
+
+def test_two_stage_adds_ann_matches(db, monkeypatch):
+    rng = random.Random(31)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+    db.commit()
+    monkeypatch.setattr(config, "RERANK_BUDGET_MS", 10_000)
+    monkeypatch.setattr(config, "RERANK_CANDIDATES", 5)
+    monkeypatch.setattr(config, "RERANK_ANN_CANDIDATES", 10)
+
+    for _ in range(30):
+        student_form = random_student(rng)
+        page = crud.get_recommendation_page(db, student_form)
+        if page.pipeline is None:
+            continue
+        snapshot = catalog.snapshot(db)
+        matches, _ = ann.search(snapshot, student_form.description, 10)
+        assert page.pipeline["kept"] <= 5 + page.pipeline["ann_added"] <= 5 + len(matches)
+        # Every result is scored exactly
+        student_data = student_form.model_dump()
+        for item in page.recommendations:
+            internship = snapshot.records[snapshot.positions[item["id"]]]
+            assert item["match_score"] == round(calculate_total_score(internship, student_data), 2)
+
+
+def test_shared_snapshot_file_across_workers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(37)
+    with Session() as db:
+        db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(300))
+        db.commit()
+
+    # Two catalogs stand in for two worker processes
+    path = str(tmp_path / "catalog.snapshot")
+    writer, reader = Catalog(), Catalog()
+    for worker in (writer, reader):
+        shared_catalog.share(worker, path, interval=0, session_factory=Session)
+
+    def add_internship(worker, description):
+        with Session() as db:
+            internship = models.Internship(**random_internship(rng).model_copy(update={
+                "is_active": True, "description": description,
+            }).model_dump())
+            db.add(internship)
+            db.commit()
+            worker.add([internship])
+            return internship.id
+
+    with Session() as db:
+        # The first worker loads the database and publishes, the second maps the file
+        expected = writer.snapshot(db)
+        mapped = reader.snapshot(db)
+        assert isinstance(mapped, shared_catalog.MappedSnapshot) and mapped.version == expected.version
+        assert list(mapped.records) == list(expected.records)
+        assert reader.etag() == writer.etag()
+        assert reader.facets.snapshot()[1] == writer.facets.snapshot()[1]
+        for _ in range(20):
+            student_form = random_student(rng)
+            page = recommend(mapped, student_form, 10)
+            assert page == recommend(expected, student_form, 10)
+            assert encode_recommendations(mapped, page.recommendations) == encode_recommendations(expected, page.recommendations)
+
+        # Writes from either worker reach the other one under a shared version
+        new_id = add_internship(writer, "quantum cryptography fellowship")
+        snapshot = reader.snapshot(db)
+        assert snapshot.version == writer.version and new_id in snapshot.positions
+        assert recommend(snapshot, schemas.StudentForm(
+            education="PhD", skills=[], sector="Legal", preferred_location="Jaipur", description="quantum cryptography",
+        ), 1).recommendations[0]["id"] == new_id
+
+        other_id = add_internship(reader, "marine biology survey")
+        reader.remove([-1])
+        snapshot = writer.snapshot(db)
+        assert isinstance(snapshot, shared_catalog.MappedSnapshot)
+        assert snapshot.version == reader.version and {new_id, other_id} <= set(snapshot.records.ids.tolist())
+
+        # After a reload the publisher rebuilds the file from the database
+        writer.invalidate()
+        assert reader.snapshot(db).version > snapshot.version
+        assert list(reader.snapshot(db).records) == list(CatalogSnapshot(0, tuple(
+            CatalogRecord.from_model(internship) for internship in crud.get_all_internships(db)
+        )).records)
+
+
+def test_score_pruning_keeps_pages_identical(db, monkeypatch):
+    rng = random.Random(41)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(600))
+    db.commit()
+    snapshot = catalog.snapshot(db)
+    monkeypatch.setattr(pruning, "BLOCK_SIZE", 16)
+
+    pruned_total = 0
+    for i in range(30):
+        student_form = random_student(rng)
+        for k in (1, 5, 50):
+            monkeypatch.setattr(config, "SCORE_PRUNING", False)
+            expected = recommend(snapshot, student_form, k)
+            monkeypatch.setattr(config, "SCORE_PRUNING", True)
+            page = recommend(snapshot, student_form, k)
+            assert (page.recommendations, page.next_cursor) == (expected.recommendations, expected.next_cursor)
+            if page.pipeline is not None:
+                assert page.pipeline["scored"] + page.pipeline["pruned"] == page.pipeline["retrieved"]
+                pruned_total += page.pipeline["pruned"]
+
+        if i % 5:
+            continue
+        # Walking the pages with pruning gives the full ranking
+        walked, cursor = [], None
+        while True:
+            page = recommend(snapshot, student_form, 25, cursor)
+            walked += page.recommendations
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        monkeypatch.setattr(config, "SCORE_PRUNING", False)
+        assert walked == recommend(snapshot, student_form, len(snapshot)).recommendations
+    assert pruned_total > 0
+
+
+def test_saved_profiles_match_new_internships_like_exhaustive_scoring(db):
+    rng = random.Random(29)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(50))
+    db.commit()
+    profiles = [
+        crud.create_saved_profile(db, schemas.SavedProfileCreate(**random_student(rng).model_dump(), threshold=rng.choice([5, 10, 30, 45, 60])))
+        for _ in range(80)
+    ]
+
+    new_internships = [crud.create_internship(db, random_internship(rng)) for _ in range(30)]
+    crud.create_internships_bulk(db, [random_internship(rng) for _ in range(60)])
+    new_internships += db.query(models.Internship).order_by(models.Internship.id).all()[-60:]
+
+    expected = {
+        (profile.id, internship.id)
+        for internship in new_internships if internship.is_active
+        for profile in profiles
+        if calculate_total_score(internship, matching.profile_data(profile)) >= profile.threshold
+    }
+    recorded = {(match.profile_id, match.internship_id) for match in db.query(models.ProfileMatch)}
+    assert recorded == expected
+    # Existing internships are never matched
+    assert all(internship_id > 50 for _, internship_id in recorded)
+
+    # Paging through the events with `since` returns every match once, in order
+    profile = max(profiles, key=lambda profile: sum(1 for match in recorded if match[0] == profile.id))
+    seen, since = [], 0
+    while True:
+        page = crud.get_profile_matches(db, profile.id, since, limit=3)
+        if page["next_since"] == since:
+            break
+        seen += [item["id"] for item in page["matches"]]
+        since = page["next_since"]
+    assert seen == sorted(internship_id for profile_id, internship_id in expected if profile_id == profile.id)
+
+
+def test_sharded_scoring_matches_serial_pages(db, monkeypatch):
+    rng = random.Random(43)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(400))
+    db.commit()
+    students = [random_student(rng) for _ in range(6)]
+    monkeypatch.setattr(config, "SHARD_MIN_CATALOG", 0)
+
+    def pages(student_form, k):
+        walked, cursor = [], None
+        while True:
+            page = crud.get_recommendation_page(db, student_form, k, cursor)
+            walked.append((page.recommendations, page.next_cursor is not None))
+            cursor = page.next_cursor
+            if cursor is None:
+                return walked
+
+    def assert_same_pages():
+        for student_form in students:
+            for k in (7, 40):
+                monkeypatch.setattr(config, "SHARD_COUNT", 0)
+                expected = pages(student_form, k)
+                monkeypatch.setattr(config, "SHARD_COUNT", 3)
+                assert pages(student_form, k) == expected
+
+    def partition():
+        size = len(catalog.current())
+        return [0, size // 3, size * 2 // 3, size]
+
+    monkeypatch.setattr(result_cache, "max_size", 0)
+    try:
+        assert_same_pages()
+        bounds = partition()
+        assert len(shard_pool._workers) == 3 and shard_pool._bounds == bounds
+
+        # New internships are appended to the last shard only
+        for _ in range(20):
+            crud.create_internship(db, random_internship(rng))
+        assert_same_pages()
+        assert shard_pool._bounds == bounds[:3] + [len(catalog.current())]
+
+        # Other changes re-partition the catalog
+        crud.deactivate_internship(db, catalog.current().records[10].id)
+        assert_same_pages()
+        assert shard_pool._bounds == partition()
+
+        # Queries in flight together each get their own replies, whoever reads the pipe
+        queries = [("query", student_form.model_dump(), 5, None) for student_form in students[:3]]
+        expected = [shard_pool._call([query] * 3) for query in queries]
+        with shard_pool._lock:
+            requests = [shard_pool._send([query] * 3) for query in queries]
+        gathered = [shard_pool._gather(sent) for sent in reversed(requests)][::-1]
+        assert [[result.positions.tolist() for result in results] for results in gathered] == [
+            [result.positions.tolist() for result in results] for results in expected
+        ]
+    finally:
+        shard_pool.stop()
+
+
+def test_shared_snapshot_keeps_writes_of_both_workers(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'catalog.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(53)
+
+    def insert(worker=None):
+        with Session() as db:
+            internship = models.Internship(**random_internship(rng).model_copy(update={"is_active": True}).model_dump())
+            db.add(internship)
+            db.commit()
+            if worker is not None:
+                worker.add([internship])
+            return internship.id
+
+    seed_id = insert()
+    path = str(tmp_path / "catalog.snapshot")
+    first, second = Catalog(), Catalog()
+    # Publishing is left to the test, in the order that used to lose a write
+    shared = [shared_catalog.share(worker, path, interval=3600, session_factory=Session) for worker in (first, second)]
+    with Session() as db:
+        first.snapshot(db)
+        shared[0].publish(first)
+        second.snapshot(db)
+
+        first_id = insert(first)
+        shared[0].publish(first)
+        # The second worker served no read since, its snapshot predates the first write
+        second_id = insert(second)
+        shared[1].publish(second)
+
+        expected = [seed_id, first_id, second_id]
+        assert [record.id for record in shared[0].latest().records] == expected
+        for worker in (first, second):
+            assert [record.id for record in worker.snapshot(db).records] == expected
+
+
+def test_result_cache_entries_are_shared_between_workers(db, monkeypatch):
+    rng = random.Random(43)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(200))
+    db.commit()
+    shared = InMemorySharedBackend()
+    student_form = schemas.StudentForm(
+        education="Bachelor's", skills=["Python", "SQL"], sector="IT",
+        preferred_location="Mumbai", description="build data models with python",
+    )
+
+    # Two catalogs and caches stand in for two worker processes sharing a backend
+    workers = [(Catalog(), ResultCache(10, 60, shared)) for _ in range(2)]
+    # Same records, but a different version in the second worker
+    workers[1][0].snapshot(db)
+    workers[1][0].remove([])
+    pages = []
+    for worker_catalog, worker_cache in workers:
+        monkeypatch.setattr(crud, "catalog", worker_catalog)
+        monkeypatch.setattr(crud, "result_cache", worker_cache)
+        first = crud.get_recommendation_page(db, student_form, k=3)
+        second = crud.get_recommendation_page(db, student_form, k=3, cursor=first.next_cursor)
+        pages.append((worker_catalog.snapshot(db).version, first, second))
+
+    (version, first, second), (shared_version, shared_first, shared_second) = pages
+    assert version != shared_version
+    assert workers[0][1].stats()["shared_hits"] == 0
+    # Both pages of the second worker come from the first worker's entries
+    assert workers[1][1].stats()["shared_hits"] == 2 and workers[1][1].stats()["misses"] == 0
+    assert shared_first.recommendations == first.recommendations
+    assert shared_second.recommendations == second.recommendations
+    # Cursors are re-issued at the version of the worker reading them
+    assert Cursor.decode(shared_first.next_cursor, shared_version)[1:] == Cursor.decode(first.next_cursor, version)[1:]
+    # Shared pages are serialized from the reading worker's snapshot
+    assert shared_first.snapshot is workers[1][0].current()
+
+
+def test_pages_are_serialized_from_the_snapshot_they_were_ranked_in(db, monkeypatch):
+    rng = random.Random(59)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(100))
+    db.commit()
+    student_form = random_student(rng)
+    page = crud.get_recommendation_page(db, student_form, k=10)
+    assert page.snapshot is catalog.current()
+
+    # The catalog moves on before the response is serialized
+    crud.deactivate_internship(db, page.recommendations[0]["id"])
+    assert page.snapshot is not catalog.current()
+    page.snapshot.derived(RecommendationFragments)
+    monkeypatch.setattr("app.serialization.dumps", lambda value: pytest.fail("fell back to encoding the fields"))
+    body = encode_recommendations(page.snapshot, page.recommendations)
+    assert [item["id"] for item in json.loads(body)] == [item["id"] for item in page.recommendations]
+
+
+def test_catalog_follows_writes_of_other_workers(db, monkeypatch):
+    monkeypatch.setattr(config, "CATALOG_CHECK_INTERVAL", 0)
+    rng = random.Random(47)
+    db.add_all(models.Internship(**random_internship(rng).model_dump()) for _ in range(50))
+    db.commit()
+    # The other worker writes to the database without touching this catalog
+    other = Catalog()
+
+    def active_ids():
+        return [internship.id for internship in crud.get_all_internships(db)]
+
+    snapshot = catalog.snapshot(db)
+    assert catalog.snapshot(db) is snapshot
+
+    # Inserts are patched in
+    monkeypatch.setattr(crud, "catalog", other)
+    for _ in range(3):
+        crud.create_internship(db, random_internship(rng).model_copy(update={"is_active": True}))
+    patched = catalog.snapshot(db)
+    assert [record.id for record in patched.records] == active_ids()
+    assert patched.lineage[-1] == (snapshot.version, len(snapshot))
+
+    # Deactivations reload the snapshot
+    crud.deactivate_internship(db, patched.records[0].id)
+    reloaded = catalog.snapshot(db)
+    assert reloaded.version > patched.version and not reloaded.lineage
+    assert [record.id for record in reloaded.records] == active_ids()
+
+    # Within the check interval the snapshot is served without querying
+    monkeypatch.setattr(config, "CATALOG_CHECK_INTERVAL", 3600)
+    crud.create_internship(db, random_internship(rng).model_copy(update={"is_active": True}))
+    assert catalog.snapshot(db) is reloaded